@@ -0,0 +1,263 @@
+"""
+Near-duplicate reuse of previous analyses (MinHash + LSH).
+
+Each analysed text is normalised (lowercase, URL query strings and
+punctuation removed, whitespace collapsed), split into word 4-shingles and
+summarised by a 128-value MinHash signature. The signature is cut into 16
+bands of 8 rows; the hash of each band is stored in a multikey-indexed
+`bands` array of the `analysis_signatures` collection. A new input is looked
+up by its band hashes ($in on the index), and candidates are ranked by the
+fraction of equal signature values, which estimates Jaccard similarity of
+the shingle sets. With 16x8 bands, pairs above ~0.7 similarity are very
+likely to share a band, so the index finds them without scanning.
+
+Lookups are scoped per user by default (DEDUP_SCOPE=user); "global" shares
+results across all users.
+
+Backfill signatures from stored analyses and AI messages with:
+    python -m app.ai.dedup --backfill
+"""
+import asyncio
+import hashlib
+import logging
+import random
+import re
+from datetime import datetime, timedelta
+
+from app.config import get_settings
+from app.indexes import declare_index, declare_query
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 4
+MAX_SHINGLES = 4096  # bottom-k sample of shingle hashes for very long inputs
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Fixed seed: signatures are persisted, so permutations must never change
+_rng = random.Random(0x7275_7374)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+URL_QUERY_RE = re.compile(r"(https?://[^\s?#]+)[?#]\S*")
+NON_WORD_RE = re.compile(r"[^\w]+")
+
+declare_index("analysis_signatures", [("scope", 1), ("bands", 1)])
+declare_index("analysis_signatures", "expires_at", expireAfterSeconds=0)
+declare_query(
+    "analysis_signatures.band_lookup",
+    "analysis_signatures",
+    {"scope": "user:example", "bands": {"$in": ["0:0000000000000000", "1:0000000000000000"]}},
+)
+
+
+# -------------------------
+# SIGNATURES
+# -------------------------
+def normalize(text: str) -> list[str]:
+    text = URL_QUERY_RE.sub(r"\1", text.lower())  # drop tracking parameters
+    return NON_WORD_RE.sub(" ", text).split()
+
+
+def _hash64(value: str) -> int:
+    # Stable across processes (unlike hash()), which persisted signatures require
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def shingle_hashes(text: str) -> list[int]:
+    words = normalize(text)
+    if len(words) <= SHINGLE_WORDS:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    hashes = {_hash64(s) % MERSENNE_PRIME for s in shingles}
+    if len(hashes) > MAX_SHINGLES:
+        # The k smallest hashes are a consistent sample: similar texts keep similar samples
+        return sorted(hashes)[:MAX_SHINGLES]
+    return list(hashes)
+
+
+def minhash(text: str) -> list[int]:
+    hashes = shingle_hashes(text)
+    return [min([(a * h + b) % MERSENNE_PRIME for h in hashes]) for a, b in PERMUTATIONS]
+
+
+def band_keys(signature: list[int]) -> list[str]:
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(repr(rows).encode(), digest_size=8).hexdigest()
+        keys.append(f"{band}:{digest}")
+    return keys
+
+
+def similarity(a: list[int], b: list[int]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+async def signature_for(text: str) -> list[int]:
+    # Hashing is pure CPU; keep long inputs off the event loop
+    return await asyncio.to_thread(minhash, text)
+
+
+def _scope(user_id: str | None) -> str:
+    return "global" if settings.DEDUP_SCOPE == "global" else f"user:{user_id}"
+
+
+# -------------------------
+# LOOKUP / RECORD
+# -------------------------
+async def find_similar(signature: list[int], user_id: str, db) -> dict | None:
+    """Return a copy of the closest earlier result at or above the threshold, or None"""
+    cursor = db.analysis_signatures.find(
+        {"scope": _scope(user_id), "bands": {"$in": band_keys(signature)}},
+        {"signature": 1, "result": 1},
+    ).limit(settings.DEDUP_MAX_CANDIDATES)
+
+    best, best_similarity = None, 0.0
+    async for candidate in cursor:
+        score = similarity(signature, candidate["signature"])
+        if score > best_similarity:
+            best, best_similarity = candidate, score
+
+    if best is None or best_similarity < settings.DEDUP_SIMILARITY_THRESHOLD:
+        return None
+
+    result = dict(best["result"])
+    result["reused_similarity"] = round(best_similarity, 3)
+    return result
+
+
+async def remember_analysis(signature: list[int], user_id: str, result: dict, db, source: dict | None = None):
+    """Index a fresh analysis so later near-duplicates can reuse it"""
+    if result.get("verdict") == "error":
+        return
+    now = datetime.utcnow()
+    await db.analysis_signatures.insert_one({
+        "scope": _scope(user_id),
+        "user_id": user_id,
+        "bands": band_keys(signature),
+        "signature": signature,
+        "result": {
+            "score": result["score"],
+            "verdict": result["verdict"],
+            "citations": result.get("citations", []),
+            "analysis_markdown": result["analysis_markdown"],
+            "model": result.get("model"),
+        },
+        "source": source,
+        "created_at": now,
+        "expires_at": now + timedelta(days=settings.DEDUP_RETENTION_DAYS),
+    })
+
+
+async def analyze_with_reuse(text: str, user_id: str, db, analyze):
+    """
+    Reuse a near-duplicate's analysis when one exists, otherwise await
+    `analyze()` and index its result. Dedup errors never fail the analysis.
+    """
+    if not settings.DEDUP_ENABLED:
+        return await analyze()
+
+    signature = None
+    try:
+        signature = await signature_for(text)
+        reused = await find_similar(signature, user_id, db)
+        if reused is not None:
+            return reused
+    except Exception as e:
+        logger.warning(f"Near-duplicate lookup failed: {e}")
+
+    result = await analyze()
+
+    if signature is not None:
+        try:
+            await remember_analysis(signature, user_id, result, db)
+        except Exception as e:
+            logger.warning(f"Failed to index analysis signature: {e}")
+    return result
+
+
+# -------------------------
+# BACKFILL
+# -------------------------
+async def backfill(db, batch_size: int = 500) -> int:
+    """Index analyses and AI messages that have no signature yet; returns the number indexed"""
+    indexed = 0
+    seen = {doc["source"]["id"] async for doc in db.analysis_signatures.find(
+        {"source.id": {"$exists": True}}, {"source.id": 1}
+    )}
+
+    # Saved analyses keep their input text
+    cursor = db.analyses.find(
+        {"input_text": {"$nin": [None, ""]}},
+        {"user_id": 1, "input_text": 1, "trust_score": 1, "verdict": 1,
+         "citations": 1, "analysis_markdown": 1, "ai_model": 1},
+    ).batch_size(batch_size)
+    async for analysis in cursor:
+        if str(analysis["_id"]) in seen:
+            continue
+        result = {
+            "score": analysis["trust_score"],
+            "verdict": analysis["verdict"].lower(),
+            "citations": analysis.get("citations", []),
+            "analysis_markdown": analysis["analysis_markdown"],
+            "model": analysis.get("ai_model"),
+        }
+        signature = await signature_for(analysis["input_text"])
+        await remember_analysis(signature, analysis["user_id"], result, db,
+                                source={"collection": "analyses", "id": str(analysis["_id"])})
+        indexed += 1
+
+    # Chat history: an AI message answers the user message just before it
+    cursor = db.messages.find(
+        {}, {"project_id": 1, "user_id": 1, "role": 1, "content": 1, "score": 1,
+             "citations": 1, "model": 1, "created_at": 1},
+    ).sort([("project_id", -1), ("created_at", 1)]).batch_size(batch_size)  # walks the history index
+    previous = None
+    async for message in cursor:
+        prompt = previous
+        previous = message
+        if message["role"] != "ai" or message.get("score") is None or str(message["_id"]) in seen:
+            continue
+        if not prompt or prompt["role"] != "user" or prompt["project_id"] != message["project_id"]:
+            continue
+        score = message["score"]
+        result = {
+            "score": score,
+            "verdict": "trustworthy" if score >= 80 else "risky" if score < 50 else "neutral",
+            "citations": message.get("citations", []),
+            "analysis_markdown": message["content"],
+            "model": message.get("model"),
+        }
+        signature = await signature_for(prompt["content"])
+        await remember_analysis(signature, message["user_id"], result, db,
+                                source={"collection": "messages", "id": str(message["_id"])})
+        indexed += 1
+
+    return indexed
+
+
+async def _main():
+    import argparse
+    from app.db import db
+
+    parser = argparse.ArgumentParser(description="Near-duplicate analysis index")
+    parser.add_argument("--backfill", action="store_true", help="index stored analyses and AI messages")
+    args = parser.parse_args()
+
+    await db.connect()
+    try:
+        if args.backfill:
+            print(f"Indexed {await backfill(db.get_db())} analyses")
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,102 @@
+"""
+Local stand-in for the Groq / OpenAI chat completions API with failure and latency injection.
+
+Run it and point the backend at it:
+    FAKE_LLM_FAILURE_RATE=0.3 FAKE_LLM_LATENCY_MS=800 uvicorn app.ai.fake_provider:app --port 9000
+    GROQ_BASE_URL=http://localhost:9000 uvicorn app.main:app
+
+Behaviour can also be changed while it runs:
+    curl -X POST localhost:9000/control -H 'content-type: application/json' \\
+         -d '{"failure_rate": 1.0, "latency_ms": 0}'
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+app = FastAPI(title="Fake LLM provider")
+
+config = {
+    "failure_rate": float(os.getenv("FAKE_LLM_FAILURE_RATE", "0")),
+    "failure_status": int(os.getenv("FAKE_LLM_FAILURE_STATUS", "503")),
+    "latency_ms": float(os.getenv("FAKE_LLM_LATENCY_MS", "50")),
+    "latency_jitter_ms": float(os.getenv("FAKE_LLM_LATENCY_JITTER_MS", "0")),
+    "hang_rate": float(os.getenv("FAKE_LLM_HANG_RATE", "0")),  # never answers: exercises deadlines
+}
+stats = {"requests": 0, "failures": 0, "hangs": 0}
+
+
+def fake_analysis(text: str) -> dict:
+    """Deterministic result derived from the prompt so repeated inputs give the same answer"""
+    digest = hashlib.sha256(text.encode()).digest()
+    score = digest[0] % 101
+    verdict = "trustworthy" if score >= 80 else "risky" if score < 50 else "neutral"
+    return {
+        "score": score,
+        "verdict": verdict,
+        "citations": [f"https://example.com/fake/{digest.hex()[:8]}"],
+        "analysis_markdown": f"### Fake Analysis\n\nDeterministic score **{score}** ({verdict}).",
+    }
+
+
+class ControlUpdate(BaseModel):
+    failure_rate: float | None = None
+    failure_status: int | None = None
+    latency_ms: float | None = None
+    latency_jitter_ms: float | None = None
+    hang_rate: float | None = None
+
+
+@app.post("/control")
+async def update_control(update: ControlUpdate):
+    config.update(update.model_dump(exclude_none=True))
+    return {"config": config, "stats": stats}
+
+
+@app.get("/control")
+async def read_control():
+    return {"config": config, "stats": stats}
+
+
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(body: dict):
+    stats["requests"] += 1
+
+    if random.random() < config["hang_rate"]:
+        stats["hangs"] += 1
+        await asyncio.sleep(3600)
+
+    delay = config["latency_ms"] + random.uniform(0, config["latency_jitter_ms"])
+    await asyncio.sleep(delay / 1000)
+
+    if random.random() < config["failure_rate"]:
+        stats["failures"] += 1
+        return JSONResponse(
+            status_code=config["failure_status"],
+            content={"error": {"message": "Injected failure", "type": "server_error"}},
+        )
+
+    prompt = "".join(m.get("content", "") for m in body.get("messages", []))
+    content = json.dumps(fake_analysis(prompt))
+    return {
+        "id": f"chatcmpl-fake-{stats['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": (len(prompt) + len(content)) // 4,
+        },
+    }
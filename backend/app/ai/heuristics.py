@@ -0,0 +1,162 @@
+"""
+CPU-only heuristic trust pre-score.
+
+Scores text from lexical signals in well under a millisecond for typical
+inputs:
+- clickbait / manipulative phrasing
+- sourcing cues ("according to", "peer-reviewed", links...)
+- shouting (ALL CAPS, runs of "!!!" / "?!")
+- links to known unreliable or reputable domains
+
+Both phrase tables are compiled once into a single character-trie regex
+(shared prefixes are factored out, so each position is rejected after one
+or two character tests) and matched in one pass over the lowercased text;
+domain tables are frozensets. Cost is linear in input size. The result is provisional: a fast signal
+shown while the LLM works, or the final answer for inputs too trivial to be
+worth an LLM call.
+"""
+import re
+
+# -------------------------
+# SIGNAL TABLES
+# -------------------------
+CLICKBAIT_PHRASES = [
+    "you won't believe", "you will not believe", "what happened next", "doctors hate",
+    "this one trick", "one weird trick", "shocking", "mind-blowing", "jaw-dropping",
+    "goes viral", "must see", "must watch", "miracle cure", "100% guaranteed",
+    "guaranteed results", "they don't want you to know", "the truth about",
+    "exposed", "secret they", "banned video", "share before it's deleted",
+    "before it's deleted", "wake up", "do your own research", "mainstream media won't",
+    "big pharma", "cover-up", "cover up", "hoax", "plandemic", "act now", "limited time",
+    "click here", "breaking!!", "unbelievable",
+]
+
+SOURCE_CUES = [
+    "according to", "study", "studies", "published in", "peer-reviewed", "peer reviewed",
+    "journal", "et al", "doi:", "data from", "reported by", "survey", "researchers",
+    "official statement", "press release", "spokesperson", "source:", "sources:",
+    "citation", "findings",
+]
+
+UNRELIABLE_DOMAINS = frozenset({
+    "infowars.com", "naturalnews.com", "beforeitsnews.com", "worldnewsdailyreport.com",
+    "yournewswire.com", "newspunch.com", "theonion.com", "babylonbee.com",
+    "nationalreport.net", "empirenews.net", "react365.com", "globalresearch.ca",
+})
+
+REPUTABLE_DOMAINS = frozenset({
+    "reuters.com", "apnews.com", "bbc.co.uk", "bbc.com", "nature.com", "science.org",
+    "who.int", "cdc.gov", "nih.gov", "nejm.org", "thelancet.com", "ft.com",
+    "nytimes.com", "washingtonpost.com", "theguardian.com", "economist.com",
+})
+
+
+def _trie_pattern(phrases) -> str:
+    """Regex source for a prefix trie of `phrases`, e.g. study|studies -> stud(?:ies|y)"""
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        alternatives = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ""
+        group = "(?:" + "|".join(alternatives) + ")" if len(alternatives) > 1 else alternatives[0]
+        # Optional tail is greedy, so the longest phrase wins
+        return f"(?:{group})?" if "" in node else group
+
+    return build(trie)
+
+
+PHRASE_KIND = {p.lower(): "clickbait" for p in CLICKBAIT_PHRASES}
+PHRASE_KIND.update({p.lower(): "source_cues" for p in SOURCE_CUES})
+# A phrase ending in a word character must end at a word boundary; one ending in
+# punctuation ("doi:", "source:") may run straight into the next word
+PHRASE_RE = re.compile(rf"\b{_trie_pattern(PHRASE_KIND)}(?:(?<!\w)|(?!\w))")
+DOMAIN_RE = re.compile(r"https?://(?:www\.)?([a-z0-9.-]+\.[a-z]{2,})", re.IGNORECASE)
+SHOUT_PUNCT_RE = re.compile(r"[!?]{2,}")
+WORD_RE = re.compile(r"[A-Za-z][A-Za-z'-]*")
+CAPS_WORD_RE = re.compile(r"\b[A-Z]{4,}\b")
+
+
+
+def _domain_hits(domains: list[str], table: frozenset) -> int:
+    hits = 0
+    for domain in domains:
+        domain = domain.lower()
+        # Match the registrable suffix, e.g. "edition.bbc.com" -> "bbc.com"
+        parts = domain.split(".")
+        if any(".".join(parts[i:]) in table for i in range(len(parts) - 1)):
+            hits += 1
+    return hits
+
+
+def is_trivial(text: str) -> bool:
+    """
+    Inputs with nothing to evaluate (no letters, or a single token) never need an LLM.
+    Short claims such as "The earth is flat" are exactly what needs checking.
+    """
+    return len(text.split()) <= 1 or WORD_RE.search(text) is None
+
+
+def prescore(text: str) -> dict:
+    word_count = len(text.split())
+    domains = DOMAIN_RE.findall(text)
+    phrases = {"clickbait": 0, "source_cues": 0}
+    for match in PHRASE_RE.findall(text.lower()):
+        phrases[PHRASE_KIND[match]] += 1
+
+    signals = {
+        "words": word_count,
+        **phrases,
+        "shouting_punctuation": len(SHOUT_PUNCT_RE.findall(text)),
+        "caps_words": len(CAPS_WORD_RE.findall(text)),
+        "links": len(domains),
+        "unreliable_domains": _domain_hits(domains, UNRELIABLE_DOMAINS),
+        "reputable_domains": _domain_hits(domains, REPUTABLE_DOMAINS),
+    }
+
+    per_100_words = 100 / max(word_count, 1)
+    score = 60.0
+    score -= min(30, 8 * signals["clickbait"])
+    score -= min(15, 5 * signals["shouting_punctuation"] * per_100_words)
+    score -= min(15, 2 * signals["caps_words"] * per_100_words)
+    score -= min(40, 25 * signals["unreliable_domains"])
+    score += min(20, 4 * signals["source_cues"])
+    score += min(15, 7 * signals["reputable_domains"])
+    if word_count >= 80 and not signals["source_cues"] and not signals["links"]:
+        score -= 10  # long claims with no sourcing at all
+    score = round(max(0.0, min(100.0, score)), 1)
+
+    verdict = "neutral"
+    if score >= 80:
+        verdict = "trustworthy"
+    elif score < 50:
+        verdict = "risky"
+
+    return {
+        "score": score,
+        "verdict": verdict,
+        "provisional": True,
+        "trivial": is_trivial(text),
+        "signals": signals,
+    }
+
+
+def heuristic_analysis(text: str) -> dict:
+    """Full analysis payload built from the pre-score, for inputs that skip the LLM"""
+    result = prescore(text)
+    return {
+        "score": result["score"],
+        "verdict": result["verdict"],
+        "citations": [],
+        "analysis_markdown": (
+            "### Quick Check\n\n"
+            "This input is too short for a full AI analysis, so it was scored "
+            "with local heuristics only. Add more context for a detailed review."
+        ),
+        "model": "heuristic",
+    }
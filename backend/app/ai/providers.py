@@ -0,0 +1,208 @@
+"""
+LLM provider backends and size/latency-based routing.
+
+A backend is one (provider, model) pair with its own circuit breaker and an
+EWMA of observed latency. `ModelRouter.candidates()` orders backends for a
+request:
+1. backends of the request's size class ("small" for short inputs, "large"
+   otherwise) plus "any"-class backends, fastest observed first
+2. the remaining backends as fallbacks
+
+Backends whose circuit is open are skipped.
+
+Providers:
+- groq:   Groq cloud (small + large model)
+- openai: any OpenAI-compatible /chat/completions endpoint (vLLM, Ollama, LM Studio...)
+- fake:   deterministic in-process results for tests and local development
+"""
+import json
+import time
+from dataclasses import dataclass, field
+
+import groq
+import httpx
+from groq import AsyncGroq
+
+from app.ai.fake_provider import fake_analysis
+from app.ai.resilience import CircuitBreaker
+from app.config import get_settings
+
+settings = get_settings()
+
+
+@dataclass
+class Completion:
+    content: str
+    model: str
+    usage: dict = field(default_factory=dict)
+
+
+class ProviderHTTPError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+
+
+# -------------------------
+# PROVIDERS
+# -------------------------
+class LLMProvider:
+    name = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    async def complete(self, messages: list[dict], timeout: float) -> Completion:
+        raise NotImplementedError
+
+    def is_retryable(self, exc: Exception) -> bool:
+        return False
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+    _clients: dict[str, AsyncGroq] = {}
+
+    def __init__(self, model: str, api_key: str, base_url: str = ""):
+        super().__init__(model)
+        # One client (and connection pool) per endpoint, shared by all models
+        key = f"{base_url}|{api_key}"
+        if key not in self._clients:
+            # SDK retries are disabled: retries are governed by the shared retry budget
+            self._clients[key] = AsyncGroq(api_key=api_key, base_url=base_url or None, max_retries=0)
+        self.client = self._clients[key]
+
+    async def complete(self, messages, timeout):
+        completion = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.1,
+            response_format={"type": "json_object"},
+            timeout=timeout,
+        )
+        usage = completion.usage.model_dump() if completion.usage else {}
+        return Completion(completion.choices[0].message.content, self.model, usage)
+
+    def is_retryable(self, exc):
+        """Transport failures, timeouts, rate limits and 5xx are worth retrying; other 4xx are not"""
+        if isinstance(exc, (groq.APIConnectionError, groq.APITimeoutError)):
+            return True
+        if isinstance(exc, groq.APIStatusError):
+            return exc.status_code == 429 or exc.status_code >= 500
+        return False
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    name = "openai"
+
+    def __init__(self, model: str, base_url: str, api_key: str = ""):
+        super().__init__(model)
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.AsyncClient(base_url=base_url.rstrip("/"), headers=headers)
+
+    async def complete(self, messages, timeout):
+        response = await self.client.post(
+            "/chat/completions",
+            json={
+                "model": self.model,
+                "messages": messages,
+                "temperature": 0.1,
+                "response_format": {"type": "json_object"},
+            },
+            timeout=timeout,
+        )
+        if response.status_code >= 400:
+            raise ProviderHTTPError(response.status_code, response.text[:200])
+        body = response.json()
+        return Completion(body["choices"][0]["message"]["content"], body.get("model", self.model), body.get("usage") or {})
+
+    def is_retryable(self, exc):
+        if isinstance(exc, httpx.TransportError):
+            return True
+        if isinstance(exc, ProviderHTTPError):
+            return exc.status_code == 429 or exc.status_code >= 500
+        return False
+
+
+class FakeProvider(LLMProvider):
+    name = "fake"
+
+    async def complete(self, messages, timeout):
+        prompt = "".join(m["content"] for m in messages)
+        content = json.dumps(fake_analysis(prompt))
+        return Completion(content, self.model, {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4})
+
+
+# -------------------------
+# ROUTING
+# -------------------------
+class Backend:
+    def __init__(self, provider: LLMProvider, size_class: str):
+        self.provider = provider
+        self.size_class = size_class  # small, large or any
+        self.label = f"{provider.name}/{provider.model}"
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.LLM_BREAKER_RESET_SECONDS,
+        )
+        self.latency: float | None = None  # EWMA seconds; None until first success
+        self.calls = 0
+
+    def record_latency(self, seconds: float):
+        self.calls += 1
+        self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+
+    def stats(self) -> dict:
+        return {
+            "size_class": self.size_class,
+            "calls": self.calls,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "circuit": self.breaker.stats(),
+        }
+
+
+class ModelRouter:
+    def __init__(self, backends: list[Backend], small_input_max: int):
+        self.backends = backends
+        self.small_input_max = small_input_max
+
+    def size_class(self, input_size: int) -> str:
+        return "small" if input_size <= self.small_input_max else "large"
+
+    def candidates(self, input_size: int) -> list[Backend]:
+        wanted = self.size_class(input_size)
+        healthy = [b for b in self.backends if b.breaker.state != CircuitBreaker.OPEN or self._cooled_down(b)]
+
+        def by_latency(backend: Backend):
+            # Unmeasured backends sort first so each one gets probed
+            return backend.latency if backend.latency is not None else 0.0
+
+        preferred = sorted((b for b in healthy if b.size_class in (wanted, "any")), key=by_latency)
+        fallback = sorted((b for b in healthy if b not in preferred), key=by_latency)
+        return preferred + fallback
+
+    @staticmethod
+    def _cooled_down(backend: Backend) -> bool:
+        return time.monotonic() - backend.breaker.opened_at >= backend.breaker.reset_timeout
+
+    def stats(self) -> dict:
+        return {backend.label: backend.stats() for backend in self.backends}
+
+
+def build_router() -> ModelRouter:
+    backends = []
+    for name in (n.strip().lower() for n in settings.LLM_BACKENDS.split(",")):
+        if name == "groq":
+            backends.append(Backend(GroqProvider(settings.GROQ_SMALL_MODEL, settings.GROQ_API_KEY, settings.GROQ_BASE_URL), "small"))
+            backends.append(Backend(GroqProvider(settings.GROQ_LARGE_MODEL, settings.GROQ_API_KEY, settings.GROQ_BASE_URL), "large"))
+        elif name == "openai" and settings.OPENAI_COMPAT_BASE_URL:
+            provider = OpenAICompatibleProvider(
+                settings.OPENAI_COMPAT_MODEL, settings.OPENAI_COMPAT_BASE_URL, settings.OPENAI_COMPAT_API_KEY
+            )
+            backends.append(Backend(provider, settings.OPENAI_COMPAT_SIZE_CLASS))
+        elif name == "fake":
+            backends.append(Backend(FakeProvider("deterministic"), "any"))
+
+    if not backends:
+        raise RuntimeError("No LLM backends configured (check LLM_BACKENDS)")
+    return ModelRouter(backends, settings.LLM_SMALL_INPUT_MAX_CHARS)
@@ -0,0 +1,185 @@
+"""
+Resilience primitives for calls to the LLM provider.
+
+- Every attempt has its own deadline, and a caller trying several backends
+  can pass one overall deadline that caps all attempts and backoff together.
+- Failed attempts are retried with full-jitter exponential backoff, but only
+  while the shared `RetryBudget` allows it. The budget caps retries to a
+  fraction of recent traffic, so an outage cannot turn into a retry storm.
+- A `CircuitBreaker` opens after consecutive failures and fails calls fast
+  until a cool-down passes. Then a few probe calls decide whether it closes
+  again.
+"""
+import asyncio
+import random
+import time
+
+
+class ProviderUnavailable(Exception):
+    def __init__(self, retry_after: int, reason: str = "AI provider is unavailable"):
+        super().__init__(reason)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class CircuitOpen(ProviderUnavailable):
+    pass
+
+
+# -------------------------
+# CIRCUIT BREAKER
+# -------------------------
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_in_flight = 0
+        self.counters = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go through right now"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.counters["rejected"] += 1
+                raise CircuitOpen(self.retry_after(), "AI provider circuit is open")
+            self.state = self.HALF_OPEN
+            self.half_open_in_flight = 0
+
+        if self.state == self.HALF_OPEN:
+            if self.half_open_in_flight >= self.half_open_max_calls:
+                self.counters["rejected"] += 1
+                raise CircuitOpen(self.retry_after(), "AI provider is recovering")
+            self.half_open_in_flight += 1
+
+    def record_success(self):
+        self.counters["successes"] += 1
+        self.consecutive_failures = 0
+        if self.state == self.HALF_OPEN:
+            self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        self.counters["failures"] += 1
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.counters["opened"] += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.half_open_in_flight = 0
+
+    def record_ignored(self):
+        """The call ended without saying anything about provider health (e.g. a 400)"""
+        if self.state == self.HALF_OPEN:
+            self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+
+    def retry_after(self) -> int:
+        if self.state != self.OPEN:
+            return 1
+        return max(1, int(self.reset_timeout - (time.monotonic() - self.opened_at)) + 1)
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            **self.counters,
+        }
+
+
+# -------------------------
+# RETRY BUDGET
+# -------------------------
+class RetryBudget:
+    """
+    Token bucket refilled by traffic: each request deposits `ratio` tokens and
+    each retry spends one, plus a small time-based floor so low-traffic
+    periods can still retry.
+    """
+
+    def __init__(self, ratio: float, min_per_second: float, max_tokens: float):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._last_refill = time.monotonic()
+        self.counters = {"retries": 0, "exhausted": 0}
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self._last_refill) * self.min_per_second)
+        self._last_refill = now
+
+    def record_request(self):
+        self._refill()
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.counters["retries"] += 1
+            return True
+        self.counters["exhausted"] += 1
+        return False
+
+    def stats(self) -> dict:
+        self._refill()
+        return {"tokens": round(self.tokens, 2), **self.counters}
+
+
+# -------------------------
+# CALL WRAPPER
+# -------------------------
+async def call_with_resilience(
+    fn,
+    breaker: CircuitBreaker,
+    budget: RetryBudget,
+    is_retryable,
+    max_attempts: int,
+    attempt_timeout: float,
+    backoff_base: float,
+    backoff_max: float,
+    deadline: float | None = None,
+):
+    """
+    Await `fn()` under the breaker, retrying retryable failures within the budget.
+    `deadline` (time.monotonic()) shortens the last attempt and stops further ones.
+    Non-retryable errors propagate unchanged; exhausted retries raise ProviderUnavailable.
+    """
+    budget.record_request()
+    last_error = None
+
+    for attempt in range(max_attempts):
+        timeout = attempt_timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                break
+        breaker.before_call()
+        try:
+            result = await asyncio.wait_for(fn(), timeout=timeout)
+        except asyncio.CancelledError:
+            breaker.record_ignored()
+            raise
+        except Exception as e:
+            if not isinstance(e, asyncio.TimeoutError) and not is_retryable(e):
+                breaker.record_ignored()
+                raise
+            breaker.record_failure()
+            last_error = e
+            if attempt + 1 >= max_attempts or breaker.state == CircuitBreaker.OPEN or not budget.try_spend():
+                break
+            await asyncio.sleep(random.uniform(0, min(backoff_max, backoff_base * 2 ** attempt)))
+            continue
+
+        breaker.record_success()
+        return result
+
+    raise ProviderUnavailable(breaker.retry_after()) from last_error
+
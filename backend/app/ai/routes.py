@@ -1,22 +1,43 @@
-from app.ai.service import analyze_text_with_groq
+from app.ai.service import analyze_for_user, analyze_text as run_analysis
+from app.ai.scheduler import llm_scheduler, SchedulerOverloaded
+from app.ai.resilience import ProviderUnavailable
+from app.ai.heuristics import prescore, is_trivial, heuristic_analysis
+from app.ai.dedup import analyze_with_reuse
+from app.config import get_settings
 from app.auth.service import get_current_user
 from app.db import get_database
-from fastapi import APIRouter, HTTPException, Depends, Request
+from app.jobs.schemas import JobSubmitted
+from app.jobs.service import enqueue_job
+from app.utils.idempotency import run_idempotent, request_fingerprint
+from app.utils.shared_state import shared_state
+from app.usage.service import check_analysis_quota, record_analysis
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, status
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List, Dict
-from datetime import datetime, timedelta
-import asyncio
+from typing import Any, List, Dict, Literal
 
 router = APIRouter(prefix="/ai", tags=["AI"])
+settings = get_settings()
 
-# In-memory rate limiting store (resets on server restart)
-# In production, use Redis for persistence across instances
-guest_usage: Dict[str, List[datetime]] = {}
+# Guest credits: one counter per IP in the shared state (see SHARED_STATE_BACKEND),
+# so every worker enforces the same daily limit
 GUEST_DAILY_LIMIT = 3
+GUEST_WINDOW_SECONDS = 24 * 3600
 GUEST_TEXT_LIMIT = 5000  # Max characters for guest
+PRESCORE_TEXT_LIMIT = 200_000
 
-# Lock for thread-safe access
-usage_lock = asyncio.Lock()
+def guest_usage_key(client_ip: str) -> str:
+    return f"guest_usage:{client_ip}"
+
+def skips_llm(text: str) -> bool:
+    return settings.HEURISTIC_SKIP_TRIVIAL and is_trivial(text)
+
+def overloaded_exception(e: SchedulerOverloaded | ProviderUnavailable) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"{e.reason}. Please retry shortly.",
+        headers={"Retry-After": str(e.retry_after)}
+    )
 
 class AnalysisRequest(BaseModel):
     project_id: str | None = None
@@ -25,30 +46,108 @@ class AnalysisRequest(BaseModel):
 class GuestAnalysisRequest(BaseModel):
     text: str
 
+class PrescoreRequest(BaseModel):
+    text: str
+
+class PrescoreResponse(BaseModel):
+    score: float
+    verdict: str
+    provisional: bool
+    trivial: bool
+    signals: Dict[str, int]
+
 class AnalysisResponse(BaseModel):
     score: float
     verdict: str
     citations: List[str]
     analysis_markdown: str
+    model: str | None = None
+    reused_similarity: float | None = None  # set when a near-duplicate's analysis was reused
+    usage: Dict[str, Any] | None = None  # token counts, latency and `truncated` flag of the LLM call
 
 class GuestAnalysisResponse(BaseModel):
     score: float
     verdict: str
     citations: List[str]
     analysis_markdown: str
+    model: str | None = None
     remaining_credits: int
 
-@router.post("/analyze", response_model=AnalysisResponse)
+@router.post(
+    "/analyze",
+    response_model=AnalysisResponse,
+    responses={202: {"model": JobSubmitted, "description": "Job accepted (mode=job)"}}
+)
 async def analyze_text(
     request: AnalysisRequest,
+    mode: Literal["sync", "job"] = "sync",
+    idempotency_key: str | None = Header(None),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_database)
 ):
+    """
+    mode=sync (default) waits for the analysis.
+    mode=job returns 202 with a job id and a provisional heuristic score at
+    once; poll GET /jobs/{id} or subscribe to GET /jobs/{id}/events. The
+    result is saved to the project exactly as in sync mode.
+    Trivially short inputs are always answered at once by the heuristic scorer.
+
+    Send an Idempotency-Key header to make retries safe: a repeated key
+    replays the first response instead of analysing (and saving) again.
+    """
     if not request.text:
         raise HTTPException(status_code=400, detail="Text is required")
+
+    return await run_idempotent(
+        idempotency_key,
+        "ai.analyze",
+        current_user["id"],
+        request_fingerprint(request.project_id, request.text, mode),
+        db,
+        lambda: _analyze(request, mode, current_user, db),
+    )
+
+
+async def _analyze(request: AnalysisRequest, mode: str, current_user: dict, db):
+    # Monthly quotas cover LLM calls only: checked before queueing and again
+    # right before the call (a near-duplicate reuse is free)
+    if mode == "job" and not skips_llm(request.text):
+        await check_analysis_quota(current_user["id"], db)
+        job = await enqueue_job(
+            "analysis",
+            current_user["id"],
+            {"text": request.text},
+            db,
+            project_id=request.project_id,
+        )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=JobSubmitted(
+                job_id=job["_id"],
+                status=job["status"],
+                status_url=f"/jobs/{job['_id']}",
+                events_url=f"/jobs/{job['_id']}/events",
+                provisional=prescore(request.text),
+            ).model_dump(),
+        )
     
-    # 1. Analyze
-    ai_result = analyze_text_with_groq(request.text)
+    # 1. Analyze (fair-queued per user; sheds with 503 when saturated).
+    #    Trivial inputs are answered locally, near-duplicates of earlier
+    #    inputs reuse that analysis; neither calls the LLM.
+    if skips_llm(request.text):
+        ai_result = heuristic_analysis(request.text)
+    else:
+        try:
+            ai_result = await analyze_with_reuse(
+                request.text,
+                current_user["id"],
+                db,
+                lambda: analyze_for_user(current_user["id"], request.text, db),
+            )
+        except (SchedulerOverloaded, ProviderUnavailable) as e:
+            raise overloaded_exception(e)
+
+    await record_analysis(current_user["id"], ai_result, db)
 
     # 2. Save as Message (Persistent Storage) - ONLY if project_id is provided
     if request.project_id:
@@ -65,7 +164,7 @@ async def analyze_text(
             print(f"Failed to save AI message: {e}")
 
 
-    return ai_result
+    return AnalysisResponse(**ai_result)
 
 
 @router.post("/analyze-guest", response_model=GuestAnalysisResponse)
@@ -89,60 +188,74 @@ async def analyze_text_guest(request: GuestAnalysisRequest, req: Request):
             detail=f"Text exceeds {GUEST_TEXT_LIMIT} character limit. Sign up for unlimited analysis!"
         )
     
-    # Check rate limit
-    async with usage_lock:
-        now = datetime.now()
-        day_ago = now - timedelta(days=1)
-        
-        # Clean old entries
-        if client_ip in guest_usage:
-            guest_usage[client_ip] = [
-                ts for ts in guest_usage[client_ip] if ts > day_ago
-            ]
+    # Check rate limit: take a credit atomically, give it back if over the limit.
+    # Heuristic-only answers are free, so they only look at the counter.
+    usage_key = guest_usage_key(client_ip)
+    trivial = skips_llm(request.text)
+    if trivial:
+        usage = await shared_state.counter(usage_key)
+        over_limit = usage.value >= GUEST_DAILY_LIMIT
+    else:
+        usage = await shared_state.incr(usage_key, GUEST_WINDOW_SECONDS)
+        over_limit = usage.value > GUEST_DAILY_LIMIT
+        if over_limit:
+            await shared_state.decr(usage_key)
+
+    if over_limit:
+        raise HTTPException(
+            status_code=429,
+            detail={
+                "message": "Daily limit reached. Sign up for unlimited analyses!",
+                "remaining_credits": 0,
+                "reset_time": usage.expires_at.isoformat()
+            }
+        )
+    remaining = max(0, GUEST_DAILY_LIMIT - usage.value)
+    
+    # Analyze (guest tier: lower share, shed first)
+    try:
+        if trivial:
+            ai_result = heuristic_analysis(request.text)
         else:
-            guest_usage[client_ip] = []
-        
-        current_usage = len(guest_usage[client_ip])
-        
-        if current_usage >= GUEST_DAILY_LIMIT:
-            raise HTTPException(
-                status_code=429,
-                detail={
-                    "message": "Daily limit reached. Sign up for unlimited analyses!",
-                    "remaining_credits": 0,
-                    "reset_time": (guest_usage[client_ip][0] + timedelta(days=1)).isoformat()
-                }
+            ai_result = await llm_scheduler.run(
+                f"guest:{client_ip}", "guest", run_analysis, request.text
             )
-        
-        # Record this usage
-        guest_usage[client_ip].append(now)
-        remaining = GUEST_DAILY_LIMIT - current_usage - 1
-    
-    # Analyze
-    ai_result = analyze_text_with_groq(request.text)
+    except (SchedulerOverloaded, ProviderUnavailable) as e:
+        # Shed or failed-fast requests don't consume a credit
+        if not trivial:
+            await shared_state.decr(usage_key)
+        raise overloaded_exception(e)
     
     return GuestAnalysisResponse(
         score=ai_result["score"],
         verdict=ai_result["verdict"],
         citations=ai_result["citations"],
         analysis_markdown=ai_result["analysis_markdown"],
+        model=ai_result.get("model"),
         remaining_credits=remaining
     )
 
 
+@router.post("/prescore", response_model=PrescoreResponse)
+async def prescore_text(request: PrescoreRequest):
+    """
+    Instant provisional score from local lexical heuristics (no LLM call, no credits).
+    Useful to show a signal while /ai/analyze is still running.
+    """
+    if not request.text:
+        raise HTTPException(status_code=400, detail="Text is required")
+    if len(request.text) > PRESCORE_TEXT_LIMIT:
+        raise HTTPException(status_code=400, detail=f"Text exceeds {PRESCORE_TEXT_LIMIT} character limit")
+    return prescore(request.text)
+
+
 @router.get("/guest-credits")
 async def get_guest_credits(req: Request):
     """Check remaining credits for a guest user"""
     client_ip = req.client.host if req.client else "unknown"
     
-    now = datetime.now()
-    day_ago = now - timedelta(days=1)
-    
-    if client_ip in guest_usage:
-        valid_usage = [ts for ts in guest_usage[client_ip] if ts > day_ago]
-        remaining = max(0, GUEST_DAILY_LIMIT - len(valid_usage))
-    else:
-        remaining = GUEST_DAILY_LIMIT
+    usage = await shared_state.counter(guest_usage_key(client_ip))
+    remaining = max(0, GUEST_DAILY_LIMIT - usage.value)
     
     return {
         "remaining_credits": remaining,
@@ -0,0 +1,180 @@
+"""
+Admission control and fair scheduling for LLM calls.
+
+Every call goes through `llm_scheduler.run(key, tier, fn, ...)`:
+- At most LLM_MAX_CONCURRENCY calls run at once across all callers.
+- Waiting calls are queued per tier ("user", "guest"). Tiers share capacity by
+  weight (stride scheduling), so authenticated users get most of it while
+  guests are never fully starved.
+- Inside a tier, callers (user id / guest IP) are served round-robin, so one
+  heavy user cannot push everyone else back.
+- When the queue is deep (globally, per tier or per caller), or a call waits
+  longer than LLM_QUEUE_TIMEOUT_SECONDS, `SchedulerOverloaded` is raised at
+  once with a Retry-After estimate instead of letting requests pile up.
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from app.config import get_settings
+from app.utils.metrics import register_metrics
+
+settings = get_settings()
+
+
+class SchedulerOverloaded(Exception):
+    def __init__(self, retry_after: int, reason: str = "LLM capacity exhausted"):
+        super().__init__(reason)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _Tier:
+    def __init__(self, name: str, weight: int, max_depth: int):
+        self.name = name
+        self.stride = 1.0 / max(weight, 1)
+        self.max_depth = max_depth
+        self.pass_value = 0.0
+        self.flows: OrderedDict[str, deque] = OrderedDict()
+        self.depth = 0
+
+    def push(self, key: str, waiter: asyncio.Future):
+        self.flows.setdefault(key, deque()).append(waiter)
+        self.depth += 1
+
+    def pop(self) -> asyncio.Future:
+        key, waiters = next(iter(self.flows.items()))
+        waiter = waiters.popleft()
+        if waiters:
+            self.flows.move_to_end(key)
+        else:
+            del self.flows[key]
+        self.depth -= 1
+        return waiter
+
+    def remove(self, key: str, waiter: asyncio.Future) -> bool:
+        waiters = self.flows.get(key)
+        if not waiters or waiter not in waiters:
+            return False
+        waiters.remove(waiter)
+        if not waiters:
+            del self.flows[key]
+        self.depth -= 1
+        return True
+
+    def queued_for(self, key: str) -> int:
+        return len(self.flows.get(key, ()))
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue_depth: int,
+        max_queued_per_key: int,
+        queue_timeout: float,
+        tiers: dict[str, tuple[int, int]],
+    ):
+        """`tiers` maps tier name -> (weight, max queue depth)"""
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.max_queued_per_key = max_queued_per_key
+        self.queue_timeout = queue_timeout
+        self.tiers = {name: _Tier(name, weight, depth) for name, (weight, depth) in tiers.items()}
+
+        self.running = 0
+        self.queued = 0
+        self._virtual_time = 0.0
+        self._service_time = 5.0  # EWMA of call duration, seeds Retry-After estimates
+        self.counters = {"admitted": 0, "enqueued": 0, "shed": 0, "timed_out": 0, "completed": 0}
+
+    async def run(self, key: str, tier: str, fn, *args, **kwargs):
+        await self._acquire(key, tier)
+        started = time.monotonic()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            self._service_time = 0.8 * self._service_time + 0.2 * (time.monotonic() - started)
+            self.counters["completed"] += 1
+            self._release()
+
+    def retry_after(self) -> int:
+        backlog = self.queued + self.running
+        return max(1, math.ceil(self._service_time * backlog / max(self.max_concurrency, 1)))
+
+    async def _acquire(self, key: str, tier_name: str):
+        if self.running < self.max_concurrency and self.queued == 0:
+            self.running += 1
+            self.counters["admitted"] += 1
+            return
+
+        tier = self.tiers[tier_name]
+        if (
+            self.queued >= self.max_queue_depth
+            or tier.depth >= tier.max_depth
+            or tier.queued_for(key) >= self.max_queued_per_key
+        ):
+            self.counters["shed"] += 1
+            raise SchedulerOverloaded(self.retry_after())
+
+        if tier.depth == 0:
+            # A tier that was idle must not bank credit and then monopolise the slots
+            tier.pass_value = max(tier.pass_value, self._virtual_time)
+
+        waiter = asyncio.get_running_loop().create_future()
+        tier.push(key, waiter)
+        self.queued += 1
+        self.counters["enqueued"] += 1
+
+        try:
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up: pass it on
+                self._release()
+            elif tier.remove(key, waiter):
+                self.queued -= 1
+            if isinstance(e, asyncio.TimeoutError):
+                self.counters["timed_out"] += 1
+                raise SchedulerOverloaded(self.retry_after(), "Timed out waiting for LLM capacity")
+            raise
+        self.counters["admitted"] += 1
+
+    def _release(self):
+        self.running -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.running < self.max_concurrency and self.queued:
+            tier = min((t for t in self.tiers.values() if t.depth), key=lambda t: t.pass_value)
+            waiter = tier.pop()
+            self.queued -= 1
+            self._virtual_time = tier.pass_value
+            tier.pass_value += tier.stride
+            if waiter.done():
+                continue
+            self.running += 1
+            waiter.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "queued_by_tier": {name: tier.depth for name, tier in self.tiers.items()},
+            "avg_service_seconds": round(self._service_time, 3),
+            **self.counters,
+        }
+
+
+llm_scheduler = LLMScheduler(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    max_queue_depth=settings.LLM_MAX_QUEUE_DEPTH,
+    max_queued_per_key=settings.LLM_MAX_QUEUED_PER_CALLER,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+    tiers={
+        "user": (settings.LLM_USER_WEIGHT, settings.LLM_MAX_QUEUE_DEPTH),
+        "guest": (settings.LLM_GUEST_WEIGHT, settings.LLM_GUEST_MAX_QUEUE_DEPTH),
+    },
+)
+register_metrics("llm_scheduler", llm_scheduler.stats)
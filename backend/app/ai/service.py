@@ -1,42 +1,144 @@
 import json
-from groq import Groq
+import logging
+import time
 from app.config import get_settings
+from app.ai.providers import build_router
+from app.ai.scheduler import llm_scheduler
+from app.ai.tokens import count_tokens, prepare_input
+from app.ai.resilience import (
+    ProviderUnavailable,
+    RetryBudget,
+    call_with_resilience,
+)
+from app.usage.service import check_analysis_quota
+from app.utils.metrics import register_metrics
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
-client = Groq(api_key=settings.GROQ_API_KEY)
-
-def analyze_text_with_groq(text: str):
-    prompt = f"""
-    You are TrustAI — an AI that evaluates the trustworthiness of text.
-    Analyze the following content and return ONLY valid JSON:
-    {{
-      "score": 0-100,
-      "verdict": "trustworthy" | "neutral" | "risky",
-      "citations": ["citation 1", "citation 2"],
-      "analysis_markdown": "### Full Markdown Analysis Here"
-    }}
-
-    Content to analyze:
-    {text}
-    """
-
-    completion = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant that outputs JSON."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.1,
-        response_format={"type": "json_object"}
+# Fixed instructions go in the system message: short, and an identical prefix
+# on every call so providers with prompt caching can reuse it
+SYSTEM_PROMPT = (
+    "You are TrustAI, which evaluates the trustworthiness of text. "
+    "Reply with only a JSON object: "
+    '{"score": 0-100, "verdict": "trustworthy"|"neutral"|"risky", '
+    '"citations": [string], "analysis_markdown": "markdown analysis"}'
+)
+
+# Backends (provider + model) ordered per request by input size and observed latency
+router = build_router()
+
+# One retry budget shared by every backend so an outage cannot multiply traffic
+retry_budget = RetryBudget(
+    ratio=settings.LLM_RETRY_BUDGET_RATIO,
+    min_per_second=settings.LLM_RETRY_MIN_PER_SECOND,
+    max_tokens=settings.LLM_RETRY_BUDGET_MAX,
+)
+
+# Running totals across calls, exposed on /metrics
+token_totals = {
+    "calls": 0,
+    "prompt_tokens": 0,
+    "completion_tokens": 0,
+    "input_tokens_saved": 0,
+    "truncated_inputs": 0,
+}
+register_metrics("llm_provider", lambda: {
+    "backends": router.stats(),
+    "retry_budget": retry_budget.stats(),
+    "tokens": dict(token_totals),
+})
+
+
+def _usage(completion, messages: list[dict], prepared, latency: float) -> dict:
+    """Provider-reported token counts, estimated locally when the provider sends none"""
+    reported = completion.usage or {}
+    prompt_tokens = reported.get("prompt_tokens") or sum(count_tokens(m["content"]) for m in messages)
+    completion_tokens = reported.get("completion_tokens") or count_tokens(completion.content)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "input_tokens": prepared.tokens,
+        "input_tokens_original": prepared.original_tokens,
+        "truncated": prepared.truncated,
+        "latency_ms": round(latency * 1000, 1),
+    }
+
+
+async def analyze_text(text: str):
+    # Drop whitespace, boilerplate and repeated lines; cap oversized inputs
+    prepared = prepare_input(text, settings.LLM_MAX_INPUT_TOKENS)
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Content to analyze:\n{prepared.text}"}
+    ]
+
+    # Try backends in routing order; each has its own breaker, retries share the budget
+    # and all of them share one deadline, so fallbacks cannot stretch a call past it.
+    # Routing uses the compacted size, so large inputs go to large-context models.
+    deadline = time.monotonic() + settings.LLM_TOTAL_TIMEOUT_SECONDS
+    last_error = ProviderUnavailable(int(settings.LLM_BREAKER_RESET_SECONDS), "All AI backends are unavailable")
+    for backend in router.candidates(len(prepared.text)):
+        if time.monotonic() >= deadline:
+            raise last_error
+        started = time.monotonic()
+        try:
+            completion = await call_with_resilience(
+                lambda: backend.provider.complete(messages, settings.LLM_ATTEMPT_TIMEOUT_SECONDS),
+                backend.breaker,
+                retry_budget,
+                backend.provider.is_retryable,
+                max_attempts=settings.LLM_MAX_ATTEMPTS,
+                attempt_timeout=settings.LLM_ATTEMPT_TIMEOUT_SECONDS,
+                backoff_base=settings.LLM_BACKOFF_BASE_SECONDS,
+                backoff_max=settings.LLM_BACKOFF_MAX_SECONDS,
+                deadline=deadline,
+            )
+        except ProviderUnavailable as e:
+            last_error = e
+            continue
+        except Exception as e:
+            # Not retryable on this backend (model, auth or context limits differ), so
+            # fall back; if every backend rejects it, the last error is raised as-is
+            logger.warning(f"LLM backend {backend.label} rejected the request: {e}")
+            last_error = e
+            continue
+        latency = time.monotonic() - started
+        backend.record_latency(latency)
+        break
+    else:
+        raise last_error
+
+    usage = _usage(completion, messages, prepared, latency)
+    token_totals["calls"] += 1
+    token_totals["prompt_tokens"] += usage["prompt_tokens"]
+    token_totals["completion_tokens"] += usage["completion_tokens"]
+    token_totals["input_tokens_saved"] += prepared.original_tokens - prepared.tokens
+    token_totals["truncated_inputs"] += prepared.truncated
+    logger.info(
+        f"LLM call {backend.label}: {usage['prompt_tokens']} prompt + "
+        f"{usage['completion_tokens']} completion tokens in {usage['latency_ms']} ms"
+        + (" (input truncated)" if prepared.truncated else "")
     )
 
     try:
-        return json.loads(completion.choices[0].message.content)
+        result = json.loads(completion.content)
     except json.JSONDecodeError:
-        return {
+        result = {
             "score": 0,
             "verdict": "error",
             "citations": [],
             "analysis_markdown": "Error parsing AI response."
         }
+    result["model"] = backend.label
+    result["usage"] = usage
+    return result
+
+async def analyze_for_user(user_id: str, text: str, db) -> dict:
+    """The billable part of an analysis: monthly quota check, then the fair-queued LLM call"""
+    await check_analysis_quota(user_id, db)
+    return await llm_scheduler.run(user_id, "user", analyze_text, text)
+
+# Alias for backward compatibility
+analyze_text_with_groq = analyze_text
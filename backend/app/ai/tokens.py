@@ -0,0 +1,123 @@
+"""
+Token counting and input budgeting for LLM prompts.
+
+Token counts use tiktoken when it is installed (`pip install tiktoken`);
+its cl100k_base encoding is within a few percent of the Llama 3 tokenizer
+on English text. Without it a regex estimate is used (about one token per
+4 characters of a word, plus one per punctuation mark).
+
+`prepare_input` shrinks text before it is sent:
+1. whitespace is normalised (trailing spaces, runs of blanks, blank lines)
+2. boilerplate lines (cookie banners, share/subscribe prompts...) are dropped
+3. repeated lines are dropped (the first occurrence is kept)
+4. text still over the token budget keeps its head and tail, with a marker
+   for the omitted middle
+"""
+import importlib.util
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+ESTIMATE_RE = re.compile(r"\w+|[^\w\s]")
+SPACES_RE = re.compile(r"[ \t\u00a0]+")
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+BOILERPLATE_RE = re.compile(
+    r"^(?:advertisement|sponsored content|skip to (?:main )?content|read more|related (?:articles|stories)"
+    r"|share (?:this|on \w+)|follow us on .*|sign up for .*|subscribe(?: to)? .*|accept (?:all )?cookies"
+    r"|we use cookies.*|this (?:site|website) uses cookies.*|all rights reserved.*|©.*|copyright ©?.*"
+    r"|click here .*|log ?in|sign ?in|menu|home)\.?$",
+    re.IGNORECASE,
+)
+
+HEAD_SHARE = 0.75  # share of the budget kept from the start when truncating
+
+
+@lru_cache()
+def _encoding(name: str):
+    if importlib.util.find_spec("tiktoken") is None:
+        return None
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception as e:  # e.g. the BPE file cannot be downloaded
+        logger.warning(f"tiktoken encoding {name} unavailable, estimating tokens: {e}")
+        return None
+
+
+def count_tokens(text: str, encoding: str = "cl100k_base") -> int:
+    enc = _encoding(encoding)
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return sum((len(t) + 3) // 4 for t in ESTIMATE_RE.findall(text))
+
+
+@dataclass
+class PreparedInput:
+    text: str
+    original_tokens: int
+    tokens: int
+    removed_lines: int = 0
+    truncated: bool = False
+
+
+def compact(text: str) -> tuple[str, int]:
+    """Normalise whitespace and drop boilerplate and repeated lines; returns (text, removed line count)"""
+    kept, seen, removed = [], set(), 0
+    for line in text.splitlines():
+        line = SPACES_RE.sub(" ", line).strip()
+        if not line:
+            kept.append("")
+            continue
+        key = line.lower()
+        if key in seen or BOILERPLATE_RE.match(line):
+            removed += 1
+            continue
+        seen.add(key)
+        kept.append(line)
+    return BLANK_LINES_RE.sub("\n\n", "\n".join(kept)).strip(), removed
+
+
+def truncate_middle(text: str, max_tokens: int, encoding: str = "cl100k_base") -> str:
+    """Keep whole lines from the head and tail that fit `max_tokens`"""
+    lines = text.split("\n")
+    costs = [count_tokens(line, encoding) + 1 for line in lines]
+
+    head, budget = [], int(max_tokens * HEAD_SHARE)
+    for line, cost in zip(lines, costs):
+        if cost > budget:
+            break
+        head.append(line)
+        budget -= cost
+
+    tail, budget = [], max_tokens - sum(costs[:len(head)])
+    for line, cost in zip(reversed(lines[len(head):]), reversed(costs[len(head):])):
+        if cost > budget:
+            break
+        tail.append(line)
+        budget -= cost
+    tail.reverse()
+
+    if not head and not tail:
+        # A single huge line: fall back to characters (~4 per token)
+        return text[:max_tokens * 4]
+
+    omitted = len(lines) - len(head) - len(tail)
+    return "\n".join(head + [f"[... {omitted} lines omitted ...]"] + tail)
+
+
+def prepare_input(text: str, max_tokens: int, encoding: str = "cl100k_base") -> PreparedInput:
+    original_tokens = count_tokens(text, encoding)
+    compacted, removed = compact(text)
+    tokens = count_tokens(compacted, encoding)
+
+    truncated = False
+    if tokens > max_tokens:
+        compacted = truncate_middle(compacted, max_tokens, encoding)
+        tokens = count_tokens(compacted, encoding)
+        truncated = True
+
+    return PreparedInput(compacted, original_tokens, tokens, removed, truncated)
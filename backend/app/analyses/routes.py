@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List
 from app.auth.service import get_current_user
 from app.db import get_database
 from app.analyses.schemas import AnalysisCreate, AnalysisResponse
 from app.analyses.service import create_analysis, get_analysis, get_project_analyses
+from app.projects.service import get_project_revision
+from app.utils.etag import make_etag, etag_matches, set_etag, not_modified
 
 router = APIRouter(
     prefix="/analyses",
@@ -32,7 +34,16 @@ async def read_analysis(
 @router.get("/project/{project_id}", response_model=List[AnalysisResponse])
 async def read_project_analyses(
     project_id: str,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     db = Depends(get_database)
 ):
+    revision = await get_project_revision(project_id, current_user["id"], db)
+    if revision is not None:
+        etag = make_etag("analyses", project_id, revision)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+
     return await get_project_analyses(project_id, current_user["id"], db)
@@ -1,19 +1,48 @@
 from app.analyses.schemas import AnalysisCreate
 from datetime import datetime
 from bson import ObjectId
+from app.indexes import declare_index, declare_query
+from app.projects.service import verify_project_owner
+from app.trends.service import record_score
+from app.realtime.hub import hub
+
+declare_index("analyses", [("project_id", 1), ("user_id", 1), ("created_at", -1)])
+declare_query(
+    "analyses.project_history",
+    "analyses",
+    {"project_id": "project", "user_id": "user"},
+    sort=[("created_at", -1)],
+)
 
 async def create_analysis(analysis: AnalysisCreate, user_id: str, db):
+    # project_id comes from the body: only the owner may add to its history and trends
+    await verify_project_owner(analysis.project_id, user_id, db)
+
     analysis_dict = analysis.model_dump()
     analysis_dict["user_id"] = user_id
     analysis_dict["created_at"] = datetime.utcnow()
     
     new_analysis = await db.analyses.insert_one(analysis_dict)
-    created_analysis = await db.analyses.find_one({"_id": new_analysis.inserted_id})
-    
-    # Convert _id to string to satisfy Pydantic
-    created_analysis["id"] = str(created_analysis.pop("_id"))
+
+    await record_score(
+        user_id, analysis.project_id, analysis.trust_score, analysis.verdict, analysis_dict["created_at"], db
+    )
+
+    # Invalidate ETags for the project's analysis listing
+    project_update = await db.projects.update_one(
+        {"_id": ObjectId(analysis.project_id), "user_id": user_id},
+        {"$inc": {"revision": 1}}
+    )
+
+    # Respond from the inserted document (insert_one sets its _id); no read-back
+    analysis_dict.pop("_id", None)
+    analysis_dict["id"] = str(new_analysis.inserted_id)
+
+    # Subscribers only hear about analyses of a project the caller still owns
+    if project_update.matched_count:
+        await hub.publish(analysis.project_id, "analysis.created", analysis_dict, db)
     
-    return created_analysis
+    return analysis_dict
 
 async def get_analysis(analysis_id: str, user_id: str, db):
     analysis = await db.analyses.find_one({"_id": ObjectId(analysis_id), "user_id": user_id})
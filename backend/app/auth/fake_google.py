@@ -0,0 +1,88 @@
+"""
+Local stand-in for Google's ID token signing keys.
+
+Serves a JWKS document like https://www.googleapis.com/oauth2/v3/certs and
+mints ID tokens signed with its current key:
+    FAKE_GOOGLE_MAX_AGE=600 uvicorn app.auth.fake_google:app --port 9100
+    GOOGLE_CERTS_URL=http://localhost:9100/oauth2/v3/certs uvicorn app.main:app
+
+    curl -X POST localhost:9100/token -H 'content-type: application/json' \\
+         -d '{"aud": "<GOOGLE_CLIENT_ID>", "email": "someone@example.com"}'
+
+POST /rotate switches to a new signing key (the previous one stays published),
+which exercises the unknown-key refresh path.
+"""
+import os
+import time
+from uuid import uuid4
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import FastAPI, Response
+from jose import jwk, jwt
+from pydantic import BaseModel
+
+app = FastAPI(title="Fake Google key server")
+
+MAX_AGE = int(os.getenv("FAKE_GOOGLE_MAX_AGE", "3600"))
+ISSUER = "https://accounts.google.com"
+
+keys: list[dict] = []  # newest first: {"kid", "pem", "jwk"}
+stats = {"cert_requests": 0, "tokens": 0}
+
+
+def new_key() -> dict:
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public_pem = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    kid = uuid4().hex
+    public = {**jwk.construct(public_pem, "RS256").to_dict(), "kid": kid, "use": "sig"}
+    return {"kid": kid, "pem": pem, "jwk": public}
+
+
+keys.append(new_key())
+
+
+class TokenRequest(BaseModel):
+    aud: str
+    email: str
+    name: str = "Test User"
+    picture: str = ""
+    email_verified: bool = True
+    expires_in: int = 3600
+
+
+@app.get("/oauth2/v3/certs")
+async def certs(response: Response):
+    stats["cert_requests"] += 1
+    response.headers["Cache-Control"] = f"public, max-age={MAX_AGE}, must-revalidate, no-transform"
+    return {"keys": [k["jwk"] for k in keys[:2]]}
+
+
+@app.post("/token")
+async def token(request: TokenRequest):
+    stats["tokens"] += 1
+    now = int(time.time())
+    claims = {
+        "iss": ISSUER,
+        "aud": request.aud,
+        "sub": uuid4().hex,
+        "email": request.email,
+        "email_verified": request.email_verified,
+        "name": request.name,
+        "picture": request.picture,
+        "iat": now,
+        "exp": now + request.expires_in,
+    }
+    current = keys[0]
+    return {"credential": jwt.encode(claims, current["pem"], algorithm="RS256", headers={"kid": current["kid"]})}
+
+
+@app.post("/rotate")
+async def rotate():
+    keys.insert(0, new_key())
+    return {"kid": keys[0]["kid"], "stats": stats}
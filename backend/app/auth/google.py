@@ -0,0 +1,183 @@
+"""
+Google ID token verification without blocking the event loop.
+
+Google's signing keys (a JWKS document at GOOGLE_CERTS_URL) are fetched with
+httpx and cached for as long as the response's Cache-Control max-age allows.
+A background task refreshes them shortly before they expire, so sign-ins
+normally never wait on Google; a token signed with a key id we have not seen
+triggers one immediate (throttled) refresh, which covers key rotation.
+Signatures and claims (audience, issuer, expiry) are checked locally.
+
+To test without Google, run the stand-in key server and point the backend at it:
+    uvicorn app.auth.fake_google:app --port 9100
+    GOOGLE_CERTS_URL=http://localhost:9100/oauth2/v3/certs uvicorn app.main:app
+"""
+import asyncio
+import logging
+import re
+import time
+
+import httpx
+from fastapi import HTTPException, status
+from jose import JWTError, jwt
+
+from app.config import get_settings
+from app.utils.metrics import register_metrics
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+DEFAULT_MAX_AGE_SECONDS = 3600  # when the response has no usable Cache-Control
+REFRESH_AHEAD_SECONDS = 300  # background refresh this long before expiry
+RETRY_SECONDS = 60  # background retry delay after a failed refresh
+UNKNOWN_KID_REFETCH_SECONDS = 30  # at most one on-demand refresh per interval
+STALE_GRACE_SECONDS = 6 * 3600  # keep using expired keys this long if Google is unreachable
+
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class InvalidGoogleToken(ValueError):
+    pass
+
+
+def cache_lifetime(headers: httpx.Headers) -> int:
+    """Seconds the key set may be cached: Cache-Control max-age minus Age"""
+    match = MAX_AGE_RE.search(headers.get("cache-control", ""))
+    if not match:
+        return DEFAULT_MAX_AGE_SECONDS
+    age = int(headers.get("age", "0") or 0)
+    return max(0, int(match.group(1)) - age)
+
+
+class GoogleKeyCache:
+    def __init__(self, certs_url: str, timeout: float = 5.0):
+        self.certs_url = certs_url
+        self.timeout = timeout
+        self.keys: dict[str, dict] = {}
+        self.expires_at = 0.0  # monotonic
+        self.fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self.fetches = 0
+        self.failures = 0
+
+    def _fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    async def refresh(self):
+        self.fetches += 1
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.get(self.certs_url)
+                response.raise_for_status()
+                keys = {key["kid"]: key for key in response.json()["keys"]}
+        except Exception:
+            self.failures += 1
+            raise
+        now = time.monotonic()
+        self.keys = keys
+        self.fetched_at = now
+        self.expires_at = now + cache_lifetime(response.headers)
+
+    async def get_key(self, kid: str) -> dict:
+        key = self.keys.get(kid)
+        if key is not None and self._fresh():
+            return key
+
+        async with self._lock:
+            # Another request may have refreshed while we waited
+            key = self.keys.get(kid)
+            stale = not self._fresh()
+            throttled = time.monotonic() - self.fetched_at < UNKNOWN_KID_REFETCH_SECONDS
+            if stale or (key is None and not throttled):
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    logger.warning(f"Failed to fetch Google signing keys: {e}")
+                    if not self.keys or time.monotonic() > self.expires_at + STALE_GRACE_SECONDS:
+                        raise HTTPException(
+                            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Google sign-in is temporarily unavailable",
+                        )
+                key = self.keys.get(kid)
+
+        if key is None:
+            raise InvalidGoogleToken("Token signed with an unknown key")
+        return key
+
+    # -------------------------
+    # BACKGROUND REFRESH
+    # -------------------------
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="google-keys-refresh")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                async with self._lock:
+                    await self.refresh()
+                delay = max(RETRY_SECONDS, self.expires_at - time.monotonic() - REFRESH_AHEAD_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Background refresh of Google signing keys failed: {e}")
+                delay = RETRY_SECONDS
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self.keys),
+            "fresh": self._fresh(),
+            "expires_in": round(max(0.0, self.expires_at - time.monotonic()), 1),
+            "fetches": self.fetches,
+            "failures": self.failures,
+        }
+
+
+google_keys = GoogleKeyCache(settings.GOOGLE_CERTS_URL)
+register_metrics("google_keys", google_keys.stats)
+
+
+async def verify_google_token(token: str, client_id: str | None = None) -> dict:
+    """Return the verified claims of a Google ID token; raises InvalidGoogleToken (a ValueError)"""
+    client_id = client_id or settings.GOOGLE_CLIENT_ID
+    if not client_id:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Google sign-in is not configured",
+        )
+
+    try:
+        header = jwt.get_unverified_header(token)
+    except JWTError:
+        raise InvalidGoogleToken("Malformed token")
+    if header.get("alg") != "RS256" or not header.get("kid"):
+        raise InvalidGoogleToken("Unexpected token header")
+
+    key = await google_keys.get_key(header["kid"])
+    try:
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=["RS256"],
+            audience=client_id,
+            issuer=GOOGLE_ISSUERS,
+            options={"verify_at_hash": False},
+        )
+    except JWTError as e:
+        raise InvalidGoogleToken(str(e))
+
+    if claims.get("email_verified") is False:
+        raise InvalidGoogleToken("Email address is not verified")
+    return claims
@@ -1,6 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 from app.auth.schemas import UserCreate, Token, UserResponse, UserLogin, UserUpdate, ForgotPasswordRequest, ResetPasswordRequest
+from app.auth.google import verify_google_token
 from app.auth.service import create_user, authenticate_user, get_current_user, update_user_profile, generate_password_reset_token, reset_password
 from app.db import get_database
 from app.utils.crypto import create_access_token
@@ -90,8 +93,6 @@ async def google_auth(request: dict, db = Depends(get_database)):
     Authenticate user with Google ID token.
     Creates a new user if they don't exist.
     """
-    from google.oauth2 import id_token
-    from google.auth.transport import requests
     import secrets
     
     token = request.get("credential")
@@ -102,12 +103,8 @@ async def google_auth(request: dict, db = Depends(get_database)):
         )
     
     try:
-        # Verify Google token
-        idinfo = id_token.verify_oauth2_token(
-            token, 
-            requests.Request(), 
-            settings.GOOGLE_CLIENT_ID
-        )
+        # Verify Google token locally against the cached signing keys
+        idinfo = await verify_google_token(token)
         
         email = idinfo.get("email", "").lower()
         name = idinfo.get("name", "")
@@ -119,36 +116,40 @@ async def google_auth(request: dict, db = Depends(get_database)):
                 detail="Email not provided by Google"
             )
         
-        # Check if user exists
+        # Existing user: log them in and stamp last_login in one round trip
         users_collection = db["users"]
-        existing_user = await users_collection.find_one({"email": email})
+        user = await users_collection.find_one_and_update(
+            {"email": email},
+            {"$set": {"last_login": datetime.now(timezone.utc)}},
+            return_document=ReturnDocument.AFTER
+        )
         
-        if existing_user:
-            # User exists - log them in
-            user = existing_user
-        else:
+        if user is None:
             # Create new user with random password (they'll use Google to login)
-            from app.utils.crypto import hash_password
+            from app.utils.crypto import get_password_hash
             random_password = secrets.token_urlsafe(32)
             
             new_user = {
                 "email": email,
                 "name": name,
-                "hashed_password": hash_password(random_password),
+                "password": get_password_hash(random_password),
                 "role": "user",
                 "picture": picture,
                 "auth_provider": "google",
                 "created_at": datetime.now(timezone.utc),
                 "last_login": datetime.now(timezone.utc)
             }
-            result = await users_collection.insert_one(new_user)
-            user = await users_collection.find_one({"_id": result.inserted_id})
-        
-        # Update last login
-        await users_collection.update_one(
-            {"_id": user["_id"]},
-            {"$set": {"last_login": datetime.now(timezone.utc)}}
-        )
+            try:
+                # insert_one sets new_user["_id"]; no read-back needed
+                await users_collection.insert_one(new_user)
+                user = new_user
+            except DuplicateKeyError:
+                # Created by a concurrent sign-in since the lookup above
+                user = await users_collection.find_one_and_update(
+                    {"email": email},
+                    {"$set": {"last_login": datetime.now(timezone.utc)}},
+                    return_document=ReturnDocument.AFTER
+                )
         
         # Create access token
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
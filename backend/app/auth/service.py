@@ -4,41 +4,47 @@ from jose import JWTError, jwt
 from app.db import get_database
 from app.auth.schemas import UserCreate, TokenData
 from app.config import settings
+from app.indexes import declare_index, declare_query
 from app.utils.crypto import create_access_token
 from app.utils.crypto import get_password_hash, verify_password
 from datetime import timedelta, datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from uuid import uuid4
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+declare_index("users", "email", unique=True)
+declare_query("users.by_email", "users", {"email": "user@example.com"})
+
 async def get_user_by_email(email: str, db):
     user = await db.users.find_one({"email": email})
     return user
 
 async def create_user(user: UserCreate, db):
-    existing_user = await get_user_by_email(user.email, db)
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
     hashed_password = get_password_hash(user.password)
     user_dict = user.model_dump()
     user_dict["password"] = hashed_password
     user_dict["role"] = "user"
     user_dict["last_login"] = datetime.utcnow()
     
-    new_user = await db.users.insert_one(user_dict)
-    created_user = await db.users.find_one({"_id": new_user.inserted_id})
+    # The unique email index rejects duplicates, so no lookup is needed first
+    try:
+        new_user = await db.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
+    # Respond from the document we just wrote instead of reading it back
     return {
-        "id": str(created_user["_id"]),
-        "email": created_user["email"],
-        "name": created_user["name"],
-        "role": created_user.get("role", "user"),
-        "last_login": created_user.get("last_login")
+        "id": str(new_user.inserted_id),
+        "email": user_dict["email"],
+        "name": user_dict["name"],
+        "role": user_dict["role"],
+        "last_login": user_dict["last_login"]
     }
 
 async def authenticate_user(email: str, password: str, db):
@@ -57,6 +63,10 @@ async def authenticate_user(email: str, password: str, db):
     return user
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db = Depends(get_database)):
+    return await get_user_from_token(token, db)
+
+async def get_user_from_token(token: str, db):
+    """Resolve a bearer token to the current user (also used where there is no Authorization header, e.g. WebSockets)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -95,13 +105,18 @@ async def update_user_profile(user_id: str, update_data: dict, db):
             detail="No valid fields provided"
         )
 
-        
-    await db.users.update_one(
+    updated_user = await db.users.find_one_and_update(
         {"_id": ObjectId(user_id)},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"email": 1, "name": 1, "bio": 1, "profile_image": 1},
+        return_document=ReturnDocument.AFTER
     )
-    
-    updated_user = await db.users.find_one({"_id": ObjectId(user_id)})
+    if updated_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
     return {
         "id": str(updated_user["_id"]),
         "email": updated_user["email"],
@@ -9,7 +9,9 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     GROQ_API_KEY: str
+    GROQ_BASE_URL: str = ""  # override to point at a local fake provider
     GOOGLE_CLIENT_ID: str = ""
+    GOOGLE_CERTS_URL: str = "https://www.googleapis.com/oauth2/v3/certs"  # JWKS used to verify Google ID tokens
     
     # Environment (development/production)
     ENVIRONMENT: str = "development"
@@ -26,6 +28,119 @@ class Settings(BaseSettings):
     EMAILS_FROM_NAME: str = "TrustAI"
     FRONTEND_URL: str = "http://localhost:5174"
 
+    # MongoDB connection pool & wire settings
+    MONGO_MAX_POOL_SIZE: int = 50
+    MONGO_MIN_POOL_SIZE: int = 10
+    MONGO_MAX_IDLE_TIME_MS: int = 30000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_CONNECT_TIMEOUT_MS: int = 10000
+    MONGO_SOCKET_TIMEOUT_MS: int = 0  # 0 = no socket timeout
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 0  # 0 = wait forever for a pooled connection
+    # primary, primaryPreferred, secondary, secondaryPreferred, nearest
+    MONGO_READ_PREFERENCE: str = "primary"
+    # Comma-separated wire compressors in preference order, e.g. "zstd,zlib,snappy"
+    MONGO_COMPRESSORS: str = ""
+    MONGO_ZLIB_COMPRESSION_LEVEL: int = -1  # -1 = zlib default, 0-9 otherwise
+
+    # Project ownership cache (project_id -> owner) used by nested resources.
+    # Deletes invalidate it in every worker via the realtime hub (REALTIME_BACKEND=mongo);
+    # otherwise other workers may accept writes to a deleted project for up to the TTL
+    PROJECT_OWNER_CACHE_TTL_SECONDS: int = 30
+    PROJECT_OWNER_CACHE_MAX_ENTRIES: int = 10000
+
+    # Response compression (br/zstd need the brotli/zstandard packages)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes; smaller single-body responses are sent as-is
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # Background analysis jobs
+    JOB_WORKERS: int = 2  # in-process workers; 0 when running `python -m app.jobs.worker` separately
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_LEASE_SECONDS: int = 180  # raised if needed to cover LLM_QUEUE_TIMEOUT_SECONDS + LLM_TOTAL_TIMEOUT_SECONDS
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_SECONDS: float = 5.0
+    JOB_RETENTION_HOURS: int = 72
+    JOB_EVENTS_POLL_INTERVAL_SECONDS: float = 1.0
+
+    # LLM scheduling / admission control
+    LLM_MAX_CONCURRENCY: int = 8  # upstream calls in flight per process
+    LLM_MAX_QUEUE_DEPTH: int = 64
+    LLM_GUEST_MAX_QUEUE_DEPTH: int = 8
+    LLM_MAX_QUEUED_PER_CALLER: int = 4
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    LLM_USER_WEIGHT: int = 4  # share of capacity for authenticated users vs guests
+    LLM_GUEST_WEIGHT: int = 1
+
+    # LLM provider resilience
+    LLM_ATTEMPT_TIMEOUT_SECONDS: float = 45.0
+    LLM_TOTAL_TIMEOUT_SECONDS: float = 100.0  # one analysis across all backends, attempts and backoff
+    LLM_MAX_ATTEMPTS: int = 3
+    LLM_BACKOFF_BASE_SECONDS: float = 0.5
+    LLM_BACKOFF_MAX_SECONDS: float = 4.0
+    LLM_RETRY_BUDGET_RATIO: float = 0.2  # retries allowed per request, on average
+    LLM_RETRY_MIN_PER_SECOND: float = 0.5
+    LLM_RETRY_BUDGET_MAX: float = 20.0
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5  # consecutive failures before opening
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+
+    # LLM backends & routing
+    LLM_BACKENDS: str = "groq"  # comma-separated: groq, openai, fake
+    GROQ_SMALL_MODEL: str = "llama-3.1-8b-instant"
+    GROQ_LARGE_MODEL: str = "llama-3.3-70b-versatile"
+    LLM_SMALL_INPUT_MAX_CHARS: int = 4000  # inputs up to this size prefer small/fast models
+    OPENAI_COMPAT_BASE_URL: str = ""  # e.g. http://localhost:11434/v1 for a local server
+    OPENAI_COMPAT_API_KEY: str = ""
+    OPENAI_COMPAT_MODEL: str = ""
+    OPENAI_COMPAT_SIZE_CLASS: str = "any"  # small, large or any
+    LLM_MAX_INPUT_TOKENS: int = 6000  # longer inputs keep their head and tail only
+
+    # Idempotency-Key handling for analysis and upload writes
+    IDEMPOTENCY_TTL_HOURS: int = 24  # how long a key's response can be replayed
+    IDEMPOTENCY_LEASE_SECONDS: int = 300  # an unfinished claim older than this is taken over
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0  # how long a retry waits for the original to finish
+
+    # Local heuristic pre-score
+    HEURISTIC_SKIP_TRIVIAL: bool = True  # answer trivially short inputs without calling the LLM
+
+    # Near-duplicate reuse (MinHash/LSH over earlier analyses)
+    DEDUP_ENABLED: bool = True
+    DEDUP_SIMILARITY_THRESHOLD: float = 0.8  # estimated Jaccard similarity of word 4-shingles
+    DEDUP_SCOPE: str = "user"  # user (reuse only your own analyses) or global
+    DEDUP_MAX_CANDIDATES: int = 50
+    DEDUP_RETENTION_DAYS: int = 30
+
+    # Live project updates (WebSocket / SSE)
+    REALTIME_BACKEND: str = "local"  # local (single worker) or mongo (change-stream fan-out, needs a replica set)
+    REALTIME_QUEUE_SIZE: int = 100  # events buffered per subscriber before it is told to resync
+    REALTIME_HEARTBEAT_SECONDS: float = 25.0
+    REALTIME_EVENT_RETENTION_MINUTES: int = 10  # how long published events stay in project_events
+
+    # File uploads
+    UPLOAD_MAX_FILE_MB: int = 10  # single-request uploads (POST /files/projects/{id}/upload)
+    UPLOAD_MAX_RESUMABLE_MB: int = 1024  # chunked uploads (POST /files/projects/{id}/uploads)
+    UPLOAD_CHUNK_MB: int = 8  # read size, and the chunk size suggested to resumable clients
+    UPLOAD_USER_QUOTA_MB: int = 2048  # stored + in-progress bytes per user; 0 = unlimited
+    UPLOAD_ALLOWED_TYPES: str = "pdf,png,jpeg,gif,webp,bmp,tiff,heic,office,text"  # sniffed from magic bytes
+    UPLOAD_SESSION_HOURS: int = 24  # an idle resumable upload expires after this
+
+    # Per-user monthly LLM quotas (0 = unlimited); storage is capped by UPLOAD_USER_QUOTA_MB
+    USAGE_MONTHLY_ANALYSES: int = 0
+    USAGE_MONTHLY_TOKENS: int = 0
+
+    # Upload garbage collection (files on disk without a document and vice versa)
+    UPLOAD_GC_INTERVAL_MINUTES: float = 360  # 0 disables the in-process sweeper
+    UPLOAD_GC_GRACE_MINUTES: float = 60  # younger files are never touched (uploads in flight)
+    UPLOAD_GC_ACTION: str = "quarantine"  # report, quarantine (move to uploads/.quarantine) or delete
+    UPLOAD_GC_QUARANTINE_DAYS: int = 7  # quarantined files are deleted after this
+    UPLOAD_GC_FIX_RECORDS: bool = False  # also remove documents whose file or project is gone
+
+    # State shared by all workers (guest credits, rate-limit counters)
+    SHARED_STATE_BACKEND: str = "memory"  # memory (single worker) or mongo (any number of workers)
+    RATE_LIMIT_STORAGE_URI: str = ""  # explicit `limits` storage URI; empty = follow SHARED_STATE_BACKEND
+    RATE_LIMIT_DB_NAME: str = "limits"  # database for rate-limit counters when stored in MongoDB
+
     class Config:
         env_file = ".env"
 
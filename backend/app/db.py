@@ -1,10 +1,65 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import get_settings
+from app.indexes import ensure_indexes
+import importlib.util
 import logging
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Wire compressors and the optional package each one needs (zlib ships with Python)
+COMPRESSOR_MODULES = {
+    "zstd": "zstandard",
+    "snappy": "snappy",
+    "zlib": None,
+}
+
+
+def available_compressors(requested: str) -> list[str]:
+    """
+    Filter a comma-separated compressor list down to the ones usable here.
+    Unknown names and compressors whose package is not installed are skipped
+    with a warning instead of failing the connection.
+    """
+    compressors = []
+    for name in (c.strip().lower() for c in requested.split(",")):
+        if not name or name in compressors:
+            continue
+        if name not in COMPRESSOR_MODULES:
+            logger.warning(f"Ignoring unknown MongoDB compressor: {name}")
+            continue
+        module = COMPRESSOR_MODULES[name]
+        if module and importlib.util.find_spec(module) is None:
+            logger.warning(f"MongoDB compressor '{name}' requires the '{module}' package; skipping")
+            continue
+        compressors.append(name)
+    return compressors
+
+
+def client_options(**overrides) -> dict:
+    """Build AsyncIOMotorClient keyword arguments from settings"""
+    options = {
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS or None,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "readPreference": settings.MONGO_READ_PREFERENCE,
+        "retryWrites": True,
+        "retryReads": True,
+    }
+    options.update(overrides)
+
+    compressors = available_compressors(options.pop("compressors", settings.MONGO_COMPRESSORS))
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+        if "zlib" in compressors:
+            options.setdefault("zlibCompressionLevel", settings.MONGO_ZLIB_COMPRESSION_LEVEL)
+    return options
+
+
 class Database:
     def __init__(self):
         self.client: AsyncIOMotorClient | None = None
@@ -12,16 +67,8 @@ class Database:
 
     async def connect(self):
         if self.client is None:
-            # Optimized connection with pooling
-            self.client = AsyncIOMotorClient(
-                settings.MONGODB_URL,
-                serverSelectionTimeoutMS=5000,
-                maxPoolSize=50,  # Connection pool
-                minPoolSize=10,  # Keep minimum connections ready
-                maxIdleTimeMS=30000,  # Close idle connections after 30s
-                retryWrites=True,
-                retryReads=True,
-            )
+            # Pool size, timeouts, read preference and wire compression come from settings
+            self.client = AsyncIOMotorClient(settings.MONGODB_URL, **client_options())
             try:
                 await self.client.admin.command('ping')
                 logger.info("Connected to MongoDB successfully")
@@ -35,30 +82,11 @@ class Database:
             await self._create_indexes()
 
     async def _create_indexes(self):
-        """Create database indexes for frequently queried fields"""
+        """Create the indexes declared next to each service's queries (see app/indexes.py)"""
         try:
-            # Users collection - email is frequently queried
-            await self.db.users.create_index("email", unique=True)
-            
-            # Projects collection - user_id is frequently queried
-            await self.db.projects.create_index("user_id")
-            await self.db.projects.create_index([("user_id", 1), ("created", -1)])
-            
-            # Analyses collection - project_id and user_id
-            await self.db.analyses.create_index("project_id")
-            await self.db.analyses.create_index("user_id")
-            await self.db.analyses.create_index([("user_id", 1), ("created_at", -1)])
-            
-            # Messages collection - project_id
-            await self.db.messages.create_index("project_id")
-            await self.db.messages.create_index([("project_id", 1), ("created_at", -1)])
-            
-            # Files collection - project_id
-            await self.db.files.create_index("project_id")
-            
-            logger.info("Database indexes created successfully")
+            await ensure_indexes(self.db)
         except Exception as e:
-            logger.warning(f"Some indexes may already exist: {e}")
+            logger.warning(f"Failed to ensure indexes: {e}")
 
     async def close(self):
         if self.client:
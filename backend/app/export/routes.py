@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
+from app.auth.service import get_current_user
+from app.db import get_database
+from app.projects.service import verify_project_owner
+from app.export.service import COLLECTIONS, iter_records, parse_resume, stream_csv, stream_ndjson
+
+router = APIRouter(
+    prefix="/projects/{project_id}/export",
+    tags=["Export"]
+)
+
+@router.get("/")
+async def export_project(
+    project_id: str,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    collections: List[Literal["messages", "analyses", "files"]] = Query(default=list(COLLECTIONS)),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """
+    Stream a project's messages, analyses and file metadata.
+
+    - ndjson: one JSON object per line with `_type` (collection) and `_cursor`
+    - csv: one collection per request (`collections=messages`), header row first
+
+    If the download breaks, request again with `cursor` set to the last
+    `_cursor` received to continue after that record.
+    """
+    await verify_project_owner(project_id, current_user["id"], db)
+
+    if format == "csv" and len(collections) != 1:
+        raise HTTPException(status_code=400, detail="CSV export takes exactly one collection")
+    resume = parse_resume(cursor, collections)
+
+    records = iter_records(project_id, current_user["id"], collections, db, resume)
+    if format == "csv":
+        body, media_type = stream_csv(records, collections[0]), "text/csv; charset=utf-8"
+        filename = f"project-{project_id}-{collections[0]}.csv"
+    else:
+        body, media_type = stream_ndjson(records), "application/x-ndjson"
+        filename = f"project-{project_id}.ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+        },
+    )
@@ -0,0 +1,151 @@
+"""
+Streaming export of a project's history.
+
+Records are read straight from Mongo cursors in `_id` order, batch by batch,
+and written out as NDJSON or CSV chunks, so memory use does not grow with
+project size. Collections are exported in a fixed order (messages, analyses,
+files). Every record carries a `_cursor` token naming its collection and
+`_id`; passing the last token received as `?cursor=` resumes right after
+that record.
+"""
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.indexes import declare_index, declare_query
+
+BATCH_SIZE = 500
+COLLECTIONS = ("messages", "analyses", "files")
+
+# Resumable walks: equality on the project, then _id order
+declare_index("messages", [("project_id", 1), ("_id", 1)])
+declare_index("analyses", [("project_id", 1), ("user_id", 1), ("_id", 1)])
+declare_index("files", [("project_id", 1), ("user_id", 1), ("_id", 1)])
+declare_query("messages.export", "messages", {"project_id": ObjectId(), "_id": {"$gt": ObjectId()}}, sort=[("_id", 1)])
+declare_query("analyses.export", "analyses", {"project_id": "project", "user_id": "user"}, sort=[("_id", 1)])
+declare_query("files.export", "files", {"project_id": ObjectId(), "user_id": "user"}, sort=[("_id", 1)])
+
+# CSV columns per collection (CSV exports one collection at a time)
+CSV_FIELDS = {
+    "messages": ["_id", "created_at", "role", "content", "score", "verdict", "model", "citations"],
+    "analyses": ["_id", "created_at", "input_type", "input_text", "trust_score", "verdict",
+                 "ai_model", "analysis_markdown", "citations"],
+    "files": ["_id", "created_at", "filename", "mimetype", "size"],
+}
+
+# Server-side details that never leave the API
+HIDDEN_FIELDS = {
+    "files": {"stored_path": 0, "stored_name": 0},
+}
+
+
+def encode_cursor(collection: str, last_id: ObjectId) -> str:
+    raw = json.dumps([collection, str(last_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[str, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        collection, last_id = json.loads(raw)
+        if collection not in COLLECTIONS or not ObjectId.is_valid(last_id):
+            raise ValueError(collection)
+        return collection, ObjectId(last_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid export cursor")
+
+
+def _plain(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _filter(collection: str, project_id: str, user_id: str) -> dict:
+    if collection == "messages":
+        return {"project_id": ObjectId(project_id)}
+    if collection == "analyses":
+        return {"project_id": project_id, "user_id": user_id}
+    return {"project_id": ObjectId(project_id), "user_id": user_id}
+
+
+def parse_resume(cursor: str | None, collections: list[str]) -> tuple[str | None, ObjectId | None]:
+    """Validate a resume cursor up front (errors can't be reported once streaming has started)"""
+    if not cursor:
+        return None, None
+    collection, last_id = decode_cursor(cursor)
+    if collection not in collections:
+        raise HTTPException(status_code=400, detail="Export cursor does not match the requested collections")
+    return collection, last_id
+
+
+async def iter_records(project_id: str, user_id: str, collections: list[str], db,
+                       resume: tuple[str | None, ObjectId | None] = (None, None)):
+    """Yield (collection, document) in export order, starting after the `resume` position"""
+    resume_collection, resume_after = resume
+    started = resume_collection is None
+    for collection in COLLECTIONS:
+        if collection not in collections:
+            continue
+        query = _filter(collection, project_id, user_id)
+        if not started:
+            if collection != resume_collection:
+                continue  # already exported before the cursor
+            query["_id"] = {"$gt": resume_after}
+            started = True
+
+        db_cursor = (
+            db[collection]
+            .find(query, HIDDEN_FIELDS.get(collection))
+            .sort("_id", 1)
+            .batch_size(BATCH_SIZE)
+        )
+        try:
+            async for doc in db_cursor:
+                yield collection, doc
+        finally:
+            await db_cursor.close()
+
+
+async def stream_ndjson(records):
+    buffer = []
+    async for collection, doc in records:
+        doc["_type"] = collection
+        doc["_cursor"] = encode_cursor(collection, doc["_id"])
+        buffer.append(json.dumps(doc, default=_plain, ensure_ascii=False))
+        if len(buffer) >= BATCH_SIZE:
+            yield "\n".join(buffer) + "\n"
+            buffer.clear()
+    if buffer:
+        yield "\n".join(buffer) + "\n"
+
+
+async def stream_csv(records, collection: str):
+    fields = CSV_FIELDS[collection] + ["_cursor"]
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(fields)
+    rows = 0
+    async for _, doc in records:
+        row = []
+        for field in fields[:-1]:
+            value = doc.get(field)
+            if isinstance(value, list):
+                value = "; ".join(str(v) for v in value)
+            row.append("" if value is None else _plain(value))
+        row.append(encode_cursor(collection, doc["_id"]))
+        writer.writerow(row)
+        rows += 1
+        if rows % BATCH_SIZE == 0:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue()
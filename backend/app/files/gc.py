@@ -0,0 +1,275 @@
+"""
+Reconciles the upload directory with the `files` collection.
+
+Disk pass: UPLOAD_DIR is walked with os.scandir in a worker thread, a bounded
+batch of entries at a time, and each batch is resolved with one `$in` query
+on `files.stored_path` (temp files of resumable uploads against
+`upload_sessions.temp_path`). Files with no document are orphans (failed
+uploads, disk deletes that errored); they are moved to UPLOAD_DIR/.quarantine
+or deleted. Anything younger than the grace period is left alone so uploads
+in flight are never touched.
+
+Record pass: `files` documents are read in _id order, a batch at a time.
+Documents whose file is missing on disk, or whose project no longer exists
+(deleted projects leave their files behind), are reported and, with
+`fix_records`, removed along with their file.
+
+Runs periodically from the API process (UPLOAD_GC_INTERVAL_MINUTES) or by hand:
+    python -m app.files.gc --action report
+    python -m app.files.gc --action quarantine --fix-records
+"""
+import asyncio
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.config import get_settings
+from app.files.pipeline import TEMP_PREFIX
+from app.files.service import UPLOAD_DIR
+from app.indexes import declare_index
+from app.usage.service import record_storage
+from app.utils.shared_state import shared_state
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+QUARANTINE_DIR = ".quarantine"
+ACTIONS = ("report", "quarantine", "delete")
+
+declare_index("files", "stored_path")
+declare_index("upload_sessions", "temp_path")
+
+
+def _scan(root: str, grace_seconds: float):
+    """Yield (path, size) of regular files older than the grace period; prunes empty old directories"""
+    cutoff = time.time() - grace_seconds
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        empty = True
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    empty = False
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != QUARANTINE_DIR:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        if stat.st_mtime < cutoff:
+                            yield entry.path, stat.st_size
+        except FileNotFoundError:
+            continue
+        if empty and directory != root:
+            try:
+                if os.stat(directory).st_mtime < cutoff:
+                    os.rmdir(directory)  # left behind by a deleted project; writers recreate it if needed
+            except OSError:
+                pass
+
+
+def _next_batch(entries, size: int) -> list:
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= size:
+            break
+    return batch
+
+
+def _dispose(path: str, action: str, root: str):
+    if action == "delete":
+        os.remove(path)
+    else:
+        target = os.path.join(root, QUARANTINE_DIR, datetime.utcnow().strftime("%Y-%m-%d"),
+                              os.path.relpath(path, root))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(path, target)
+
+
+def _purge_quarantine(root: str, retention_days: int) -> int:
+    """Delete quarantine days older than the retention; returns bytes freed"""
+    quarantine = os.path.join(root, QUARANTINE_DIR)
+    cutoff = datetime.utcnow().date().toordinal() - retention_days
+    freed = 0
+    try:
+        days = os.listdir(quarantine)
+    except FileNotFoundError:
+        return 0
+    for day in days:
+        try:
+            if datetime.strptime(day, "%Y-%m-%d").date().toordinal() >= cutoff:
+                continue
+        except ValueError:
+            continue
+        for dirpath, _, filenames in os.walk(os.path.join(quarantine, day)):
+            freed += sum(os.path.getsize(os.path.join(dirpath, f)) for f in filenames)
+        shutil.rmtree(os.path.join(quarantine, day), ignore_errors=True)
+    return freed
+
+
+async def sweep_disk(db, action: str = "quarantine", root: str = UPLOAD_DIR,
+                     grace_seconds: float | None = None, batch_size: int = BATCH_SIZE) -> dict:
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action: {action}")
+    grace = settings.UPLOAD_GC_GRACE_MINUTES * 60 if grace_seconds is None else grace_seconds
+    report = {"scanned": 0, "orphans": 0, "orphan_bytes": 0, "errors": 0}
+    disposed = 0
+
+    entries = _scan(root, grace)
+    while batch := await asyncio.to_thread(_next_batch, entries, batch_size):
+        report["scanned"] += len(batch)
+        temp = [p for p, _ in batch if os.path.basename(p).startswith(TEMP_PREFIX)]
+        stored = [p for p, _ in batch if not os.path.basename(p).startswith(TEMP_PREFIX)]
+
+        known = set()
+        if stored:
+            cursor = db.files.find({"stored_path": {"$in": stored}}, {"stored_path": 1, "_id": 0})
+            known.update([doc["stored_path"] async for doc in cursor])
+        if temp:
+            cursor = db.upload_sessions.find({"temp_path": {"$in": temp}}, {"temp_path": 1, "_id": 0})
+            known.update([doc["temp_path"] async for doc in cursor])
+
+        orphans = [(p, size) for p, size in batch if p not in known]
+        report["orphans"] += len(orphans)
+        report["orphan_bytes"] += sum(size for _, size in orphans)
+        if action == "report":
+            continue
+        for path, size in orphans:
+            try:
+                await asyncio.to_thread(_dispose, path, action, root)
+                disposed += size
+            except OSError as e:
+                report["errors"] += 1
+                logger.warning(f"Upload GC could not {action} {path}: {e}")
+
+    # Quarantined bytes are only freed once the quarantine day is purged
+    report["quarantined_bytes"] = disposed if action == "quarantine" else 0
+    report["purged_bytes"] = await asyncio.to_thread(_purge_quarantine, root, settings.UPLOAD_GC_QUARANTINE_DAYS)
+    report["reclaimed_bytes"] = (disposed if action == "delete" else 0) + report["purged_bytes"]
+    return report
+
+
+async def sweep_records(db, fix: bool = False, batch_size: int = BATCH_SIZE) -> dict:
+    report = {"checked": 0, "missing_on_disk": 0, "project_deleted": 0, "removed": 0}
+    last_id = None
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id else {}
+        docs = await (
+            db.files.find(query, {"stored_path": 1, "project_id": 1, "size": 1, "user_id": 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not docs:
+            return report
+        last_id = docs[-1]["_id"]
+        report["checked"] += len(docs)
+
+        project_ids = {d["project_id"] for d in docs if isinstance(d.get("project_id"), ObjectId)}
+        live = {p["_id"] async for p in db.projects.find({"_id": {"$in": list(project_ids)}}, {"_id": 1})}
+        exists = await asyncio.to_thread(
+            lambda: {d["_id"]: bool(d.get("stored_path")) and os.path.exists(d["stored_path"]) for d in docs}
+        )
+
+        stale = []
+        for doc in docs:
+            if doc.get("project_id") not in live:
+                report["project_deleted"] += 1
+                stale.append(doc)
+            elif not exists[doc["_id"]]:
+                report["missing_on_disk"] += 1
+                stale.append(doc)
+
+        if fix and stale:
+            for doc in stale:
+                if exists[doc["_id"]]:
+                    try:
+                        await asyncio.to_thread(os.remove, doc["stored_path"])
+                    except OSError as e:
+                        logger.warning(f"Upload GC could not delete {doc['stored_path']}: {e}")
+                        continue
+                result = await db.files.delete_one({"_id": doc["_id"]})
+                if result.deleted_count and doc.get("user_id"):
+                    await record_storage(doc["user_id"], -doc.get("size", 0), -1, db)
+                if doc.get("project_id") in live:
+                    await db.projects.update_one({"_id": doc["project_id"]}, {"$inc": {"files": -1, "revision": 1}})
+                report["removed"] += 1
+
+
+async def collect_garbage(db, action: str | None = None, fix_records: bool | None = None) -> dict:
+    action = action or settings.UPLOAD_GC_ACTION
+    fix_records = settings.UPLOAD_GC_FIX_RECORDS if fix_records is None else fix_records
+    started = time.perf_counter()
+    report = {
+        "disk": await sweep_disk(db, action),
+        "records": await sweep_records(db, fix_records),
+    }
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    logger.info(f"Upload GC: {report}")
+    return report
+
+
+# -------------------------
+# PERIODIC SWEEPER
+# -------------------------
+class UploadSweeper:
+    def __init__(self, db, interval_minutes: float):
+        self.db = db
+        self.interval = interval_minutes * 60
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="upload-gc")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                # One sweep per interval across all workers (first to take the slot runs it)
+                slot = await shared_state.incr("upload_gc", self.interval * 0.9)
+                if slot.value == 1:
+                    await collect_garbage(self.db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Upload GC failed: {e}")
+
+
+async def _main():
+    import argparse
+    import json
+    from app.db import db
+
+    parser = argparse.ArgumentParser(description="Reconcile uploads/ with the files collection")
+    parser.add_argument("--action", choices=ACTIONS, default="report",
+                        help="what to do with files that have no document")
+    parser.add_argument("--fix-records", action="store_true",
+                        help="remove documents whose file or project is gone")
+    args = parser.parse_args()
+
+    await db.connect()
+    try:
+        report = await collect_garbage(db.get_db(), args.action, args.fix_records)
+        print(json.dumps(report, indent=2))
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
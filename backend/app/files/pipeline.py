@@ -0,0 +1,214 @@
+"""
+Streaming upload pipeline.
+
+Chunks are written to a hidden temp file next to their final location while
+a SHA-256 digest is computed on the way; the file is moved into place with
+an atomic rename only once the upload is complete and accepted, so readers
+never see a partial file. The content type is sniffed from the magic bytes
+once SNIFF_BYTES have arrived (or the whole file, if smaller) and disallowed
+types are rejected before the rest of the body is stored. Resumable uploads
+carry the head bytes between chunks, so a short first chunk cannot decide
+the type of the file.
+
+Each chunk costs one worker-thread hop that both writes and hashes
+(hashlib releases the GIL on large buffers), so neither blocks the event loop.
+"""
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass
+from uuid import uuid4
+
+import aiofiles.os
+from fastapi import HTTPException, status
+
+TEMP_PREFIX = ".upload-"
+TEMP_SUFFIX = ".part"
+SNIFF_BYTES = 4096
+
+# (magic prefix, offset, kind)
+MAGIC = [
+    (b"%PDF-", 0, "pdf"),
+    (b"\x89PNG\r\n\x1a\n", 0, "png"),
+    (b"\xff\xd8\xff", 0, "jpeg"),
+    (b"GIF87a", 0, "gif"),
+    (b"GIF89a", 0, "gif"),
+    (b"BM", 0, "bmp"),
+    (b"II*\x00", 0, "tiff"),
+    (b"MM\x00*", 0, "tiff"),
+    (b"PK\x03\x04", 0, "office"),  # docx/xlsx/pptx (and any other zip)
+]
+HEIC_BRANDS = {b"heic", b"heix", b"mif1", b"msf1", b"heim", b"heis"}
+
+KIND_MIMETYPES = {
+    "pdf": "application/pdf",
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "bmp": "image/bmp",
+    "tiff": "image/tiff",
+    "heic": "image/heic",
+    "office": "application/zip",
+    "text": "text/plain",
+}
+
+
+def sniff(head: bytes) -> str | None:
+    """Kind of file from its first bytes, or None when unrecognised (e.g. executables)"""
+    for magic, offset, kind in MAGIC:
+        if head.startswith(magic, offset):
+            return kind
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[4:8] == b"ftyp" and head[8:12] in HEIC_BRANDS:
+        return "heic"
+    if head and b"\x00" not in head and not head.startswith(b"#!"):
+        try:
+            head.decode("utf-8")
+            return "text"
+        except UnicodeDecodeError as e:
+            if e.start >= len(head) - 3:  # a multi-byte character cut off by the sniff window
+                return "text"
+    return None
+
+
+def mimetype_for(kind: str, declared: str | None) -> str:
+    """Trust the declared type only within the sniffed family"""
+    declared = (declared or "").lower()
+    if kind == "text" and (declared.startswith("text/") or declared in ("application/json", "application/xml")):
+        return declared
+    if kind == "office" and declared.startswith("application/vnd.openxmlformats-officedocument"):
+        return declared
+    return KIND_MIMETYPES[kind]
+
+
+def temp_path_for(directory: str) -> str:
+    return os.path.join(directory, f"{TEMP_PREFIX}{uuid4().hex}{TEMP_SUFFIX}")
+
+
+async def ensure_dir(path: str):
+    """makedirs off the event loop; not cached, since the upload GC prunes empty directories"""
+    await aiofiles.os.makedirs(path, exist_ok=True)
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    size: int
+    sha256: str
+    kind: str
+
+
+class UploadWriter:
+    """
+    Writes one upload (or, for resumable uploads, one chunk of it starting at
+    `offset`) to `temp_path`. `max_bytes` bounds the whole file. Until the kind
+    is known, `head` holds the file's first bytes (from earlier chunks).
+    """
+
+    def __init__(self, temp_path: str, max_bytes: int, allowed_kinds: set[str],
+                 offset: int = 0, hasher=None, kind: str | None = None, head: bytes = b""):
+        self.temp_path = temp_path
+        self.max_bytes = max_bytes
+        self.allowed_kinds = allowed_kinds
+        self.offset = offset
+        self.size = offset
+        # Without the running digest of the bytes before `offset`, the file is re-hashed at commit
+        self.hasher = hasher if hasher is not None else (hashlib.sha256() if offset == 0 else None)
+        self.kind = kind
+        self.head = head
+        self._file = None
+
+    def _open(self):
+        mode = "r+b" if self.offset else "wb"
+        try:
+            self._file = open(self.temp_path, mode)
+        except FileNotFoundError:
+            if self.offset:
+                raise  # the temp file of an earlier chunk is gone
+            # The GC pruned the (empty) directory since ensure_dir
+            os.makedirs(os.path.dirname(self.temp_path), exist_ok=True)
+            self._file = open(self.temp_path, mode)
+        if self.offset:
+            self._file.seek(self.offset)
+            self._file.truncate()  # drop bytes of a chunk that was cut off mid-way
+
+    def _write(self, chunk: bytes):
+        if self._file is None:
+            self._open()
+        self._file.write(chunk)
+        if self.hasher is not None:
+            self.hasher.update(chunk)
+
+    def _check_kind(self, final: bool):
+        if self.kind is not None or (len(self.head) < SNIFF_BYTES and not final):
+            return
+        kind = sniff(self.head)
+        if kind is None or kind not in self.allowed_kinds:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="File type not allowed"
+            )
+        self.kind = kind
+
+    async def write(self, chunk: bytes):
+        if not chunk:
+            return
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="File too large"
+            )
+        if self.kind is None:
+            self.head += chunk[:SNIFF_BYTES - len(self.head)]
+            self._check_kind(final=False)
+        await asyncio.to_thread(self._write, chunk)
+
+    async def close(self, final: bool = False):
+        """
+        Flush and close after a (partial) chunk; the temp file stays for the next one.
+        `final` means the whole file has arrived, so a short head is sniffed as is.
+        """
+        if final and self.kind is None and self.head:
+            try:
+                self._check_kind(final=True)
+            except HTTPException:
+                await self.abort()
+                raise
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+
+    async def abort_chunk(self):
+        """Stop writing but keep the temp file; the next chunk truncates anything past its offset"""
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+
+    def _rehash(self) -> str:
+        hasher = hashlib.sha256()
+        with open(self.temp_path, "rb") as f:
+            while block := f.read(1024 * 1024):
+                hasher.update(block)
+        return hasher.hexdigest()
+
+    async def commit(self, final_path: str) -> StoredUpload:
+        """Close, then atomically move the finished file into place"""
+        await self.close(final=True)
+        if self.kind is None:
+            await self.abort()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty file")
+        digest = self.hasher.hexdigest() if self.hasher is not None else await asyncio.to_thread(self._rehash)
+        await aiofiles.os.replace(self.temp_path, final_path)
+        return StoredUpload(final_path, self.size, digest, self.kind)
+
+    async def abort(self):
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+        try:
+            await aiofiles.os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
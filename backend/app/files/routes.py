@@ -1,8 +1,14 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
-from fastapi.responses import FileResponse
-from app.files.service import save_upload_file, get_file
+from fastapi import APIRouter, UploadFile, File, Depends, Header, HTTPException, Request, status
+from fastapi.responses import FileResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
+from app.files.schemas import UploadSessionCreate
+from app.files.service import (
+    save_upload_file, get_file, create_upload_session, get_upload_session,
+    append_upload_chunk, cancel_upload_session, session_view,
+)
 from app.auth.service import get_current_user
 from app.db import get_database
+from app.utils.idempotency import run_idempotent, request_fingerprint
 import os
 
 router = APIRouter(
@@ -17,11 +23,21 @@ router = APIRouter(
 async def upload_file(
     project_id: str,
     file: UploadFile = File(...),
+    idempotency_key: str | None = Header(None),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_database)
 ):
+    """A repeated Idempotency-Key replays the first upload's response instead of storing the file again"""
     try:
-        return await save_upload_file(project_id, current_user["id"], file, db)
+        return await run_idempotent(
+            idempotency_key,
+            "files.upload",
+            current_user["id"],
+            request_fingerprint(project_id, file.filename, file.content_type, file.size),
+            db,
+            lambda: save_upload_file(project_id, current_user["id"], file, db),
+            status_code=status.HTTP_201_CREATED,
+        )
     except HTTPException:
         raise
     except Exception:
@@ -30,6 +46,63 @@ async def upload_file(
             detail="Failed to upload file"
         )
 
+# -------------------------
+# RESUMABLE UPLOADS
+# -------------------------
+@router.post(
+    "/projects/{project_id}/uploads",
+    status_code=status.HTTP_201_CREATED
+)
+async def start_upload(
+    project_id: str,
+    upload: UploadSessionCreate,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """
+    Start a chunked upload for a large file. Send the bytes with
+    PUT /files/uploads/{upload_id} and an `Upload-Offset` header; after a
+    failure, GET the upload to learn how many bytes arrived and resend from there.
+    """
+    return await create_upload_session(
+        project_id, current_user["id"], upload.filename, upload.content_type, upload.size, db
+    )
+
+@router.get("/uploads/{upload_id}")
+async def upload_status(
+    upload_id: str,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    session = await get_upload_session(upload_id, current_user["id"], db)
+    return JSONResponse(
+        jsonable_encoder(session_view(session)),
+        headers={"Upload-Offset": str(session["received"])}
+    )
+
+@router.put("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., ge=0),
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """Append the raw request body at `Upload-Offset`; 201 with the file once the last byte arrives"""
+    result = await append_upload_chunk(upload_id, current_user["id"], upload_offset, request.stream(), db)
+    if result["complete"]:
+        return JSONResponse(jsonable_encoder(result["file"]), status_code=status.HTTP_201_CREATED)
+    return JSONResponse(jsonable_encoder(result), headers={"Upload-Offset": str(result["received"])})
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_upload(
+    upload_id: str,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    await cancel_upload_session(upload_id, current_user["id"], db)
+    return None
+
 @router.get("/{file_id}")
 async def read_file(
     file_id: str,
@@ -11,6 +11,7 @@ class FileResponse(BaseModel):
     mimetype: str
     size: int
     stored_path: str
+    sha256: Optional[str] = None
     extracted_text: Optional[str] = None
     created_at: datetime
 
@@ -19,3 +20,9 @@ class FileResponse(BaseModel):
         json_encoders = {
             datetime: lambda v: v.isoformat()
         }
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: Optional[str] = None
+    size: int = Field(..., gt=0)
@@ -1,69 +1,49 @@
+import logging
 import os
-import aiofiles
+import aiofiles.os
 from fastapi import UploadFile, HTTPException, status
 from bson import ObjectId
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
+from pymongo import ReturnDocument
 from uuid import uuid4
+from app.config import get_settings
+from app.files.pipeline import UploadWriter, ensure_dir, mimetype_for, temp_path_for
+from app.indexes import declare_index, declare_query
+from app.projects.service import verify_project_owner
+from app.realtime.hub import hub
+from app.usage.service import check_storage_quota, record_storage
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 UPLOAD_DIR = "uploads"
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
+MB = 1024 * 1024
+MAX_FILE_SIZE = settings.UPLOAD_MAX_FILE_MB * MB  # single-request uploads
+MAX_RESUMABLE_SIZE = settings.UPLOAD_MAX_RESUMABLE_MB * MB
+CHUNK_SIZE = settings.UPLOAD_CHUNK_MB * MB
+ALLOWED_KINDS = {k.strip() for k in settings.UPLOAD_ALLOWED_TYPES.split(",") if k.strip()}
+SESSION_LEASE_SECONDS = 120  # a chunk writer that vanished releases the session after this
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Bytes reserved by a user's in-progress uploads count towards the storage quota
+declare_index("upload_sessions", "user_id")
+declare_index("upload_sessions", "expires_at", expireAfterSeconds=0)
 
-# -------------------------
-# SAVE FILE
-# -------------------------
-async def save_upload_file(project_id: str, user_id: str, file: UploadFile, db):
-    if not ObjectId.is_valid(project_id):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-
-    # Verify project ownership
-    project = await db.projects.find_one({
-        "_id": ObjectId(project_id),
-        "user_id": user_id
-    })
-
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to upload to this project"
-        )
-
-    # Secure filename
-    file_ext = Path(file.filename).suffix
-    safe_filename = f"{uuid4().hex}{file_ext}"
-
-    project_dir = os.path.join(UPLOAD_DIR, project_id)
-    os.makedirs(project_dir, exist_ok=True)
-
-    file_path = os.path.join(project_dir, safe_filename)
-
-    size = 0
-    async with aiofiles.open(file_path, "wb") as out_file:
-        while chunk := await file.read(1024 * 1024):
-            size += len(chunk)
-            if size > MAX_FILE_SIZE:
-                await out_file.close()
-                os.remove(file_path)
-                raise HTTPException(
-                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                    detail="File too large"
-                )
-            await out_file.write(chunk)
 
+async def _record_file(project_id: str, user_id: str, filename: str, content_type: str | None,
+                       stored, upload_id: str, db):
     file_doc = {
         "project_id": ObjectId(project_id),
         "user_id": user_id,
-        "filename": file.filename,
-        "stored_name": safe_filename,
-        "mimetype": file.content_type,
-        "stored_path": file_path,
-        "size": size,
+        "filename": filename,
+        "stored_name": os.path.basename(stored.path),
+        "mimetype": mimetype_for(stored.kind, content_type),
+        "detected_type": stored.kind,
+        "stored_path": stored.path,
+        "size": stored.size,
+        "sha256": stored.sha256,
         "extracted_text": None,
         "created_at": datetime.utcnow()
     }
@@ -74,15 +54,211 @@ async def save_upload_file(project_id: str, user_id: str, file: UploadFile, db):
     # 🔹 Update Project file count only (no embedding)
     await db.projects.update_one(
         {"_id": ObjectId(project_id)},
-        {"$inc": {"files": 1}}
+        {"$inc": {"files": 1, "revision": 1}}
     )
+    await record_storage(user_id, stored.size, 1, db)
 
     file_doc["_id"] = file_id
     file_doc["project_id"] = project_id
 
+    await hub.publish(project_id, "file.created", {
+        "upload_id": upload_id,
+        **{k: v for k, v in file_doc.items() if k not in ("stored_path", "stored_name")},
+    }, db)
+
     return file_doc
 
 
+# -------------------------
+# SAVE FILE
+# -------------------------
+async def save_upload_file(project_id: str, user_id: str, file: UploadFile, db):
+    # Verify project ownership
+    await verify_project_owner(
+        project_id, user_id, db, detail="Not authorized to upload to this project"
+    )
+    if file.size is not None:
+        if file.size > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="File too large"
+            )
+        await check_storage_quota(user_id, file.size, db)
+
+    project_dir = os.path.join(UPLOAD_DIR, project_id)
+    await ensure_dir(project_dir)
+
+    # Secure filename; the bytes land in a temp file and are renamed into place when accepted
+    upload_id = uuid4().hex
+    file_path = os.path.join(project_dir, f"{upload_id}{Path(file.filename).suffix}")
+    writer = UploadWriter(temp_path_for(project_dir), MAX_FILE_SIZE, ALLOWED_KINDS)
+
+    # Progress events let other open views show the upload; upload_id ties them to file.created
+    progress = {"upload_id": upload_id, "filename": file.filename, "received": 0, "total": file.size}
+
+    try:
+        while chunk := await file.read(CHUNK_SIZE):
+            await writer.write(chunk)
+            progress["received"] = writer.size
+            await hub.publish(project_id, "file.progress", progress, db)
+        stored = await writer.commit(file_path)
+    except BaseException:
+        await writer.abort()
+        raise
+
+    return await _record_file(project_id, user_id, file.filename, file.content_type, stored, upload_id, db)
+
+
+# -------------------------
+# RESUMABLE UPLOADS
+# -------------------------
+# Running digests of in-progress sessions on this worker: upload_id -> (offset, hasher).
+# A chunk served by another worker (or after a restart) makes the commit re-hash the file instead.
+_session_hashers: dict[str, tuple[int, object]] = {}
+MAX_SESSION_HASHERS = 1000
+
+
+def session_view(session: dict) -> dict:
+    return {
+        "upload_id": session["_id"],
+        "project_id": session["project_id"],
+        "filename": session["filename"],
+        "size": session["size"],
+        "received": session["received"],
+        "chunk_size": CHUNK_SIZE,
+        "expires_at": session["expires_at"],
+    }
+
+
+async def create_upload_session(project_id: str, user_id: str, filename: str,
+                                content_type: str | None, size: int, db):
+    await verify_project_owner(
+        project_id, user_id, db, detail="Not authorized to upload to this project"
+    )
+    if size <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty file")
+    if size > MAX_RESUMABLE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="File too large"
+        )
+    await check_storage_quota(user_id, size, db)
+
+    project_dir = os.path.join(UPLOAD_DIR, project_id)
+    await ensure_dir(project_dir)
+
+    now = datetime.utcnow()
+    session = {
+        "_id": uuid4().hex,
+        "user_id": user_id,
+        "project_id": project_id,
+        "filename": filename,
+        "content_type": content_type,
+        "size": size,
+        "received": 0,
+        "kind": None,
+        "head": b"",  # first bytes, kept until there are enough to sniff the type
+        "temp_path": temp_path_for(project_dir),
+        "locked_until": None,
+        "created_at": now,
+        "expires_at": now + timedelta(hours=settings.UPLOAD_SESSION_HOURS),
+    }
+    await db.upload_sessions.insert_one(session)
+    return session_view(session)
+
+
+async def get_upload_session(upload_id: str, user_id: str, db) -> dict:
+    session = await db.upload_sessions.find_one({"_id": upload_id, "user_id": user_id})
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    return session
+
+
+async def append_upload_chunk(upload_id: str, user_id: str, offset: int, chunks, db) -> dict:
+    """
+    Write the bytes from `chunks` (an async iterator) at `offset`, which must equal
+    the bytes received so far. The last chunk stores the file and ends the session.
+    """
+    now = datetime.utcnow()
+    session = await db.upload_sessions.find_one_and_update(
+        {
+            "_id": upload_id,
+            "user_id": user_id,
+            "received": offset,
+            "$or": [{"locked_until": None}, {"locked_until": {"$lt": now}}],
+        },
+        {"$set": {"locked_until": now + timedelta(seconds=SESSION_LEASE_SECONDS)}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if session is None:
+        current = await get_upload_session(upload_id, user_id, db)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Offset does not match the received bytes, or a chunk is in progress",
+                    "received": current["received"]},
+            headers={"Upload-Offset": str(current["received"])},
+        )
+
+    cached = _session_hashers.pop(upload_id, None)
+    hasher = cached[1].copy() if cached and cached[0] == offset else None
+    writer = UploadWriter(session["temp_path"], session["size"], ALLOWED_KINDS,
+                          offset=offset, hasher=hasher, kind=session["kind"], head=session.get("head") or b"")
+    try:
+        async for chunk in chunks:
+            await writer.write(chunk)
+        await writer.close(final=writer.size >= session["size"])
+    except HTTPException:
+        # Rejected content or size: the upload is over
+        await writer.abort()
+        await db.upload_sessions.delete_one({"_id": upload_id})
+        raise
+    except BaseException:
+        # Interrupted chunk: keep the confirmed offset so the client can resend from it
+        await writer.abort_chunk()
+        await db.upload_sessions.update_one({"_id": upload_id}, {"$set": {"locked_until": None}})
+        raise
+
+    if writer.size < session["size"]:
+        if writer.hasher is not None:
+            while len(_session_hashers) >= MAX_SESSION_HASHERS:
+                _session_hashers.pop(next(iter(_session_hashers)))
+            _session_hashers[upload_id] = (writer.size, writer.hasher)
+        session = await db.upload_sessions.find_one_and_update(
+            {"_id": upload_id},
+            {"$set": {
+                "received": writer.size,
+                "kind": writer.kind,
+                "head": writer.head if writer.kind is None else None,
+                "locked_until": None,
+                "expires_at": datetime.utcnow() + timedelta(hours=settings.UPLOAD_SESSION_HOURS),
+            }},
+            return_document=ReturnDocument.AFTER,
+        )
+        return {"complete": False, **session_view(session)}
+
+    project_dir = os.path.dirname(session["temp_path"])
+    stored = await writer.commit(os.path.join(project_dir, f"{upload_id}{Path(session['filename']).suffix}"))
+    file_doc = await _record_file(
+        session["project_id"], user_id, session["filename"], session["content_type"], stored, upload_id, db
+    )
+    await db.upload_sessions.delete_one({"_id": upload_id})
+    return {"complete": True, "file": file_doc}
+
+
+async def cancel_upload_session(upload_id: str, user_id: str, db):
+    session = await get_upload_session(upload_id, user_id, db)
+    _session_hashers.pop(upload_id, None)
+    await db.upload_sessions.delete_one({"_id": upload_id})
+    try:
+        await aiofiles.os.remove(session["temp_path"])
+    except FileNotFoundError:
+        pass
+    return True
+
+
 # -------------------------
 # GET FILE
 # -------------------------
@@ -109,6 +285,14 @@ async def get_file(file_id: str, user_id: str, db):
 
     return file_doc
 
+declare_index("files", [("project_id", 1), ("user_id", 1), ("created_at", -1)])
+declare_query(
+    "files.project_listing",
+    "files",
+    {"project_id": ObjectId(), "user_id": "user"},
+    sort=[("created_at", -1)],
+)
+
 async def get_project_files(project_id: str, user_id: str, db):
     cursor = db.files.find({"project_id": ObjectId(project_id), "user_id": user_id}).sort("created_at", -1)
     files = await cursor.to_list(length=100)
@@ -123,6 +307,7 @@ async def get_project_files(project_id: str, user_id: str, db):
             "size": f["size"],
             "created_at": f["created_at"],
             "stored_path": f.get("stored_path"),
+            "sha256": f.get("sha256"),
             "extracted_text": f.get("extracted_text")
         }
         for f in files
@@ -164,19 +349,56 @@ async def delete_file(file_id: str, user_id: str, db):
             if stored_name:
                 file_path = os.path.join(UPLOAD_DIR, project_id, stored_name)
 
-        if file_path and os.path.exists(file_path):
-            os.remove(file_path)
+        if file_path:
+            await aiofiles.os.remove(file_path)
+    except FileNotFoundError:
+        pass
     except Exception as e:
-        print(f"Error deleting file from disk: {e}")
-        # Continue to delete record even if disk delete fails
+        # Continue to delete record even if disk delete fails; the upload GC reclaims the file later
+        logger.warning(f"Error deleting file {file_path} from disk: {e}")
 
-    # 2. Delete from DB
-    await db.files.delete_one({"_id": ObjectId(file_id)})
+    # 2. Delete from DB; a concurrent delete that got there first has done the rest
+    result = await db.files.delete_one({"_id": ObjectId(file_id)})
+    if not result.deleted_count:
+        return True
+    await record_storage(user_id, -file_doc.get("size", 0), -1, db)
 
     # 3. Decrement Project File Count
     await db.projects.update_one(
         {"_id": file_doc["project_id"]},
-        {"$inc": {"files": -1}}
+        {"$inc": {"files": -1, "revision": 1}}
     )
 
+    await hub.publish(file_doc["project_id"], "file.deleted", {"id": file_id}, db)
+
     return True
+
+
+async def delete_project_files(project_id: str, db):
+    """Remove a deleted project's files and unfinished uploads, and give their bytes back to the quota"""
+    freed: dict[str, list[int]] = {}  # user_id -> [bytes, files]
+    async for file_doc in db.files.find({"project_id": ObjectId(project_id)},
+                                        {"stored_path": 1, "size": 1, "user_id": 1}):
+        result = await db.files.delete_one({"_id": file_doc["_id"]})
+        if not result.deleted_count:
+            continue
+        totals = freed.setdefault(file_doc["user_id"], [0, 0])
+        totals[0] += file_doc.get("size", 0)
+        totals[1] += 1
+        if file_doc.get("stored_path"):
+            try:
+                await aiofiles.os.remove(file_doc["stored_path"])
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Error deleting file {file_doc['stored_path']} from disk: {e}")
+    for user_id, (size, count) in freed.items():
+        await record_storage(user_id, -size, -count, db)
+
+    async for session in db.upload_sessions.find({"project_id": project_id}, {"temp_path": 1}):
+        _session_hashers.pop(session["_id"], None)
+        await db.upload_sessions.delete_one({"_id": session["_id"]})
+        try:
+            await aiofiles.os.remove(session["temp_path"])
+        except OSError:
+            pass
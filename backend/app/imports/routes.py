@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Request
+from app.auth.service import get_current_user
+from app.db import get_database
+from app.imports.schemas import ImportResult
+from app.imports.service import import_ndjson, iter_lines
+
+router = APIRouter(
+    prefix="/import",
+    tags=["Import"]
+)
+
+@router.post("/", response_model=ImportResult)
+async def bulk_import(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """
+    Import historical analyses and messages into your projects.
+
+    Send NDJSON (Content-Type: application/x-ndjson), one record per line
+    with "type": "analysis" or "message". The body is processed as it
+    streams in; invalid lines are skipped and reported with their line number.
+    """
+    return await import_ndjson(iter_lines(request.stream()), current_user["id"], db)
@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
+from datetime import datetime
+from app.analyses.schemas import AnalysisBase
+
+
+# -------------------------
+# NDJSON RECORDS
+# -------------------------
+class ImportedAnalysis(AnalysisBase):
+    type: Literal["analysis"]
+    created_at: Optional[datetime] = None  # original timestamp; defaults to import time
+
+
+class ImportedMessage(BaseModel):
+    type: Literal["message"]
+    project_id: str
+    role: Literal["user", "ai"]
+    content: str
+    score: Optional[float] = None
+    verdict: Optional[str] = None
+    citations: List[str] = Field(default_factory=list)
+    model: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+# -------------------------
+# RESULT
+# -------------------------
+class ImportRecordError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    received: int
+    inserted: Dict[str, int]
+    failed: int
+    projects: int
+    errors: List[ImportRecordError]  # first errors only
@@ -0,0 +1,216 @@
+"""
+Bulk import of historical analyses and messages from NDJSON.
+
+One record per line, tagged by `type`:
+    {"type": "analysis", "project_id": "...", "trust_score": 72, "verdict": "Neutral", ...}
+    {"type": "message", "project_id": "...", "role": "ai", "content": "...", "score": 72, ...}
+
+Lines are parsed and validated as they stream in and written in batches:
+- project ownership is checked with one `$in` query per batch
+- each collection gets one unordered `insert_many` per batch, so a bad
+  document only loses itself
+- project trust scores, revisions and the daily trend rollups are updated
+  once at the end, not once per record
+
+CLI:
+    python -m app.imports.service archive.ndjson --user-id <user id>
+"""
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from app.imports.schemas import ImportedAnalysis, ImportedMessage
+from app.messages.service import refresh_project_trust
+from app.trends.service import RollupBatch
+
+BATCH_SIZE = 1000
+MAX_LINE_BYTES = 1024 * 1024
+MAX_REPORTED_ERRORS = 50
+
+RECORD_MODELS = {
+    "analysis": ImportedAnalysis,
+    "message": ImportedMessage,
+}
+
+
+async def iter_lines(chunks):
+    """Split a stream of byte chunks into lines without holding more than one line"""
+    buffer, skipping = b"", False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if skipping:
+                skipping = False  # rest of an oversized line
+                continue
+            yield line
+        if len(buffer) > MAX_LINE_BYTES:
+            if not skipping:
+                yield buffer  # reported as too large by the importer
+            buffer, skipping = b"", True
+    if buffer and not skipping:
+        yield buffer
+
+
+class BulkImporter:
+    def __init__(self, user_id: str, db, batch_size: int = BATCH_SIZE):
+        self.user_id = user_id
+        self.db = db
+        self.batch_size = batch_size
+        self.received = 0
+        self.failed = 0
+        self.inserted = {"analyses": 0, "messages": 0}
+        self.errors: list[dict] = []
+        self.owned: dict[str, bool] = {}
+        self.touched: dict[str, set] = {}  # project_id -> collections written
+        self.rollups = RollupBatch()
+        self.pending: list[tuple[int, object]] = []
+
+    def _error(self, line_no: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    async def add_line(self, line_no: int, line: bytes | str):
+        if not line.strip():
+            return
+        self.received += 1
+        if len(line) > MAX_LINE_BYTES:
+            self._error(line_no, "Record too large")
+            return
+        try:
+            data = json.loads(line)
+            model = RECORD_MODELS.get(data.get("type")) if isinstance(data, dict) else None
+            if model is None:
+                self._error(line_no, "Unknown record type (expected 'analysis' or 'message')")
+                return
+            record = model.model_validate(data)
+        except json.JSONDecodeError as e:
+            self._error(line_no, f"Invalid JSON: {e.msg}")
+            return
+        except ValidationError as e:
+            first = e.errors()[0]
+            self._error(line_no, f"{'.'.join(str(p) for p in first['loc'])}: {first['msg']}")
+            return
+
+        self.pending.append((line_no, record))
+        if len(self.pending) >= self.batch_size:
+            await self.flush()
+
+    async def _check_ownership(self, project_ids: set[str]):
+        unknown = [pid for pid in project_ids if pid not in self.owned]
+        valid = [ObjectId(pid) for pid in unknown if ObjectId.is_valid(pid)]
+        found = set()
+        if valid:
+            cursor = self.db.projects.find({"_id": {"$in": valid}, "user_id": self.user_id}, {"_id": 1})
+            found = {str(p["_id"]) async for p in cursor}
+        for pid in unknown:
+            self.owned[pid] = pid in found
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        await self._check_ownership({record.project_id for _, record in batch})
+
+        docs = {"analyses": [], "messages": []}
+        now = datetime.utcnow()
+        for line_no, record in batch:
+            if not self.owned[record.project_id]:
+                self._error(line_no, "Project not found")
+                continue
+            doc = record.model_dump(exclude={"type"})
+            doc["user_id"] = self.user_id
+            doc["created_at"] = record.created_at or now
+            if isinstance(record, ImportedAnalysis):
+                docs["analyses"].append((line_no, doc))
+            else:
+                doc["project_id"] = ObjectId(record.project_id)  # messages reference projects by ObjectId
+                docs["messages"].append((line_no, doc))
+
+        for collection, entries in docs.items():
+            if entries:
+                await self._insert(collection, entries)
+
+    async def _insert(self, collection: str, entries: list[tuple[int, dict]]):
+        failed_at = set()
+        try:
+            await self.db[collection].insert_many([doc for _, doc in entries], ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get("writeErrors", []):
+                failed_at.add(err["index"])
+                self._error(entries[err["index"]][0], err.get("errmsg", "Write failed"))
+
+        for index, (_, doc) in enumerate(entries):
+            if index in failed_at:
+                continue
+            self.inserted[collection] += 1
+            project_id = str(doc["project_id"])
+            self.touched.setdefault(project_id, set()).add(collection)
+            if collection == "analyses":
+                self.rollups.add(self.user_id, project_id, doc["trust_score"], doc["verdict"], doc["created_at"])
+            elif doc.get("score") is not None:
+                self.rollups.add(self.user_id, project_id, doc["score"], doc.get("verdict"), doc["created_at"])
+
+    async def finish(self) -> dict:
+        await self.flush()
+
+        # Project aggregates once per project, not per record
+        for project_id, collections in self.touched.items():
+            if "messages" in collections:
+                await refresh_project_trust(project_id, self.db)
+            else:
+                await self.db.projects.update_one(
+                    {"_id": ObjectId(project_id)},
+                    {"$set": {"lastUpdated": datetime.utcnow()}, "$inc": {"revision": 1}},
+                )
+        await self.rollups.flush(self.db)
+
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "projects": len(self.touched),
+            "errors": self.errors,
+        }
+
+
+async def import_ndjson(lines, user_id: str, db, batch_size: int = BATCH_SIZE) -> dict:
+    """Import NDJSON lines (an async iterable of bytes or str) for `user_id`"""
+    importer = BulkImporter(user_id, db, batch_size)
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        await importer.add_line(line_no, line)
+    return await importer.finish()
+
+
+async def _main():
+    import argparse
+    from app.db import db
+
+    parser = argparse.ArgumentParser(description="Bulk import analyses and messages from NDJSON")
+    parser.add_argument("path", help="NDJSON file, one record per line")
+    parser.add_argument("--user-id", required=True, help="owner of the imported records")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    async def file_lines():
+        with open(args.path, "rb") as f:
+            for line in f:
+                yield line
+
+    await db.connect()
+    try:
+        result = await import_ndjson(file_lines(), args.user_id, db.get_db(), args.batch_size)
+        print(json.dumps(result, indent=2))
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(_main())
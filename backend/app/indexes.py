@@ -0,0 +1,230 @@
+"""
+Index management.
+
+Service modules declare the indexes their queries rely on right next to those
+queries with `declare_index`, and register representative "hot" queries with
+`declare_query`. On startup `ensure_indexes` creates every declared index and
+drops single-field indexes that a declared compound index already covers.
+Each index is created (or dropped) on its own, so one conflict, e.g. an existing
+index with different options, is logged and the others are still ensured.
+`check_query_plans` runs `explain()` on each hot query and reports plans that
+fall back to a collection scan or an in-memory sort.
+
+Run the plan check against a live database with:
+    python -m app.indexes --check
+"""
+import importlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from pymongo import IndexModel
+
+logger = logging.getLogger(__name__)
+
+# Modules that declare indexes/queries; imported before indexes are ensured so
+# declarations are complete even when routers were not loaded (e.g. CLI use)
+DECLARING_MODULES = [
+    "app.auth.service",
+    "app.projects.service",
+    "app.analyses.service",
+    "app.messages.service",
+    "app.files.service",
+    "app.files.gc",
+    "app.jobs.service",
+    "app.ai.dedup",
+    "app.utils.idempotency",
+    "app.search.service",
+    "app.export.service",
+    "app.realtime.hub",
+    "app.utils.shared_state",
+]
+
+# Plan stages that mean the query is not served by an index
+BAD_STAGES = {"COLLSCAN", "SORT"}
+
+
+@dataclass
+class IndexSpec:
+    collection: str
+    keys: list[tuple[str, Any]]
+    options: dict = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return self.options.get("name") or "_".join(f"{k}_{d}" for k, d in self.keys)
+
+    def model(self) -> IndexModel:
+        return IndexModel(self.keys, **{**self.options, "name": self.name})
+
+
+@dataclass
+class QuerySpec:
+    name: str
+    collection: str
+    filter: dict = field(default_factory=dict)
+    sort: list[tuple[str, int]] | None = None
+    pipeline: list[dict] | None = None
+    projection: dict | None = None
+
+
+_indexes: dict[tuple[str, str], IndexSpec] = {}
+_queries: dict[str, QuerySpec] = {}
+
+
+def declare_index(collection: str, keys, **options) -> IndexSpec:
+    """Declare an index; `keys` is a field name or a list of (field, direction) pairs"""
+    if isinstance(keys, str):
+        keys = [(keys, 1)]
+    spec = IndexSpec(collection, list(keys), options)
+    _indexes[(collection, spec.name)] = spec
+    return spec
+
+
+def declare_query(name: str, collection: str, filter: dict | None = None, sort=None, pipeline=None, projection=None):
+    """Register a representative query shape for `check_query_plans`"""
+    _queries[name] = QuerySpec(name, collection, filter or {}, sort, pipeline, projection)
+
+
+def declared_indexes() -> list[IndexSpec]:
+    _load_declarations()
+    return list(_indexes.values())
+
+
+def declared_queries() -> list[QuerySpec]:
+    _load_declarations()
+    return list(_queries.values())
+
+
+def _load_declarations():
+    for module in DECLARING_MODULES:
+        importlib.import_module(module)
+
+
+def _is_superseded(keys: list[tuple[str, Any]], options: dict, declared: list[IndexSpec]) -> bool:
+    """A plain single-field index is redundant when a declared compound index starts with it"""
+    if len(keys) != 1 or keys[0][0] == "_id":
+        return False
+    if any(options.get(o) for o in ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")):
+        return False
+    field_name, direction = keys[0]
+    if not isinstance(direction, (int, float)):
+        return False
+    return any(
+        len(spec.keys) > 1 and spec.keys[0][0] == field_name and isinstance(spec.keys[0][1], (int, float))
+        for spec in declared
+    )
+
+
+async def ensure_indexes(db, drop_redundant: bool = True) -> int:
+    """
+    Create declared indexes and drop single-field indexes superseded by compounds.
+    Returns the number of indexes that could not be created.
+    """
+    specs = declared_indexes()
+    by_collection: dict[str, list[IndexSpec]] = {}
+    for spec in specs:
+        by_collection.setdefault(spec.collection, []).append(spec)
+
+    failed = 0
+    for collection, collection_specs in by_collection.items():
+        declared_names = {spec.name for spec in collection_specs}
+
+        if drop_redundant:
+            try:
+                existing = await db[collection].index_information()
+            except Exception as e:
+                logger.warning(f"Could not list indexes of {collection}: {e}")
+                existing = {}
+            for name, info in existing.items():
+                if name in declared_names:
+                    continue
+                if _is_superseded(info["key"], info, collection_specs):
+                    try:
+                        await db[collection].drop_index(name)
+                        logger.info(f"Dropped redundant index {collection}.{name}")
+                    except Exception as e:
+                        logger.warning(f"Failed to drop redundant index {collection}.{name}: {e}")
+
+        for spec in collection_specs:
+            try:
+                await db[collection].create_indexes([spec.model()])
+            except Exception as e:
+                failed += 1
+                logger.warning(f"Failed to create index {collection}.{spec.name}: {e}")
+
+    logger.info(f"Ensured {len(specs) - failed} of {len(specs)} declared indexes")
+    return failed
+
+
+def _bad_stages(plan) -> set[str]:
+    """Collect offending stages from every winning plan in an explain document"""
+    found = set()
+
+    def walk(node, in_winning_plan):
+        if isinstance(node, dict):
+            if in_winning_plan and node.get("stage") in BAD_STAGES:
+                found.add(node["stage"])
+            for key, value in node.items():
+                if key == "rejectedPlans":
+                    continue
+                walk(value, in_winning_plan or key in ("winningPlan", "queryPlan"))
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_winning_plan)
+
+    walk(plan, False)
+    return found
+
+
+async def check_query_plans(db) -> dict[str, set[str]]:
+    """
+    Explain every declared hot query.
+    Returns {query name: offending stages} for queries that need a collection
+    scan or an in-memory sort; an empty dict means every query is index-backed.
+    """
+    problems = {}
+    for query in declared_queries():
+        if query.pipeline is not None:
+            command = {"aggregate": query.collection, "pipeline": query.pipeline, "cursor": {}}
+        else:
+            command = {"find": query.collection, "filter": query.filter}
+            if query.sort:
+                command["sort"] = dict(query.sort)
+            if query.projection:
+                command["projection"] = query.projection
+        plan = await db.command({"explain": command, "verbosity": "queryPlanner"})
+        stages = _bad_stages(plan)
+        if stages:
+            problems[query.name] = stages
+    return problems
+
+
+async def _main():
+    import argparse
+    from app.db import db
+    # Services register into `app.indexes`, not into this module when run as __main__
+    from app import indexes as registry
+
+    parser = argparse.ArgumentParser(description="Manage declared MongoDB indexes")
+    parser.add_argument("--check", action="store_true", help="explain hot queries and fail on scans/in-memory sorts")
+    parser.add_argument("--keep-redundant", action="store_true", help="do not drop superseded indexes")
+    args = parser.parse_args()
+
+    await db.connect()
+    try:
+        await registry.ensure_indexes(db.get_db(), drop_redundant=not args.keep_redundant)
+        if args.check:
+            problems = await registry.check_query_plans(db.get_db())
+            for name in (q.name for q in registry.declared_queries()):
+                status = ", ".join(sorted(problems[name])) if name in problems else "ok"
+                print(f"{name:<40} {status}")
+            if problems:
+                raise SystemExit(1)
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(_main())
@@ -0,0 +1,58 @@
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from app.auth.service import get_current_user
+from app.config import get_settings
+from app.db import get_database
+from app.jobs.schemas import JobResponse
+from app.jobs.service import get_job, TERMINAL_STATUSES
+
+settings = get_settings()
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Jobs"]
+)
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def read_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    return await get_job(job_id, current_user["id"], db)
+
+@router.get("/{job_id}/events")
+async def job_events(
+    job_id: str,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """
+    Server-sent events: one `status` event per state change, ending with the
+    terminal job (including its result) once it succeeds or fails.
+    """
+    # Validate ownership up front so a bad id is a plain 404, not an empty stream
+    job = await get_job(job_id, current_user["id"], db)
+
+    async def event_stream(job):
+        last_state = None
+        while True:
+            state = (job["status"], job["attempts"])
+            if state != last_state:
+                payload = JobResponse(**job).model_dump(by_alias=True)
+                yield f"event: status\ndata: {json.dumps(jsonable_encoder(payload))}\n\n"
+                last_state = state
+            if job["status"] in TERMINAL_STATUSES or await request.is_disconnected():
+                return
+            await asyncio.sleep(settings.JOB_EVENTS_POLL_INTERVAL_SECONDS)
+            job = await get_job(job_id, current_user["id"], db)
+
+    return StreamingResponse(
+        event_stream(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,32 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class JobSubmitted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    events_url: str
+    provisional: Optional[dict] = None  # instant heuristic score, shown until the job finishes
+
+
+class JobResponse(BaseModel):
+    id: str = Field(..., alias="_id", serialization_alias="id")
+    type: str
+    status: str  # queued, running, succeeded, failed
+    project_id: Optional[str] = None
+    attempts: int = 0
+    max_attempts: int
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    message_id: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        populate_by_name = True
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
@@ -0,0 +1,161 @@
+"""
+Mongo-backed job queue.
+
+Jobs are leased with an atomic find_one_and_update, so any number of workers
+(in-process or `python -m app.jobs.worker`) can share the queue. A lease
+expires if its worker dies; the job is then picked up again and counts as
+another attempt. Failed attempts are retried with exponential backoff until
+`max_attempts`, and finished jobs expire through a TTL index.
+"""
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+from app.config import get_settings
+from app.indexes import declare_index
+from app.projects.service import verify_project_owner
+
+settings = get_settings()
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+# A lease must outlive the slowest analysis (scheduler queue wait plus the overall
+# LLM deadline) or the job is leased again mid-run and executed twice
+LEASE_SECONDS = max(
+    settings.JOB_LEASE_SECONDS,
+    settings.LLM_QUEUE_TIMEOUT_SECONDS + settings.LLM_TOTAL_TIMEOUT_SECONDS + 30,
+)
+
+declare_index("jobs", [("status", 1), ("available_at", 1)])
+declare_index("jobs", [("status", 1), ("lease_expires_at", 1)])
+declare_index("jobs", "expires_at", expireAfterSeconds=0)
+
+
+# -------------------------
+# ENQUEUE
+# -------------------------
+async def enqueue_job(job_type: str, user_id: str, payload: dict, db, project_id: str | None = None):
+    # Reject foreign projects now rather than failing later inside the worker
+    if project_id:
+        await verify_project_owner(project_id, user_id, db)
+
+    now = datetime.utcnow()
+    job_doc = {
+        "type": job_type,
+        "user_id": user_id,
+        "project_id": project_id,
+        "payload": payload,
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": settings.JOB_MAX_ATTEMPTS,
+        "available_at": now,
+        "lease_expires_at": None,
+        "worker_id": None,
+        "result": None,
+        "error": None,
+        "message_id": None,
+        "created_at": now,
+        "updated_at": now,
+        "finished_at": None,
+        "expires_at": None,
+    }
+
+    result = await db.jobs.insert_one(job_doc)
+    job_doc["_id"] = str(result.inserted_id)
+    return job_doc
+
+
+# -------------------------
+# GET JOB
+# -------------------------
+async def get_job(job_id: str, user_id: str, db):
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    job = await db.jobs.find_one(
+        {"_id": ObjectId(job_id), "user_id": user_id},
+        {"payload": 0}
+    )
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    job["_id"] = str(job["_id"])
+    return job
+
+
+# -------------------------
+# LEASE / COMPLETE / FAIL
+# -------------------------
+async def lease_job(worker_id: str, db):
+    """Claim the oldest runnable job (queued and due, or running with an expired lease)"""
+    now = datetime.utcnow()
+    return await db.jobs.find_one_and_update(
+        {
+            "$or": [
+                {"status": "queued", "available_at": {"$lte": now}},
+                {"status": "running", "lease_expires_at": {"$lte": now}},
+            ]
+        },
+        {
+            "$set": {
+                "status": "running",
+                "worker_id": worker_id,
+                "lease_expires_at": now + timedelta(seconds=LEASE_SECONDS),
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("available_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _finished_fields(now: datetime) -> dict:
+    return {
+        "finished_at": now,
+        "updated_at": now,
+        "lease_expires_at": None,
+        "expires_at": now + timedelta(hours=settings.JOB_RETENTION_HOURS),
+    }
+
+
+async def complete_job(job: dict, worker_id: str, result: dict, db, message_id: str | None = None):
+    # Fenced on worker_id so a worker whose lease was taken over cannot overwrite the job
+    now = datetime.utcnow()
+    await db.jobs.update_one(
+        {"_id": job["_id"], "worker_id": worker_id, "status": "running"},
+        {"$set": {
+            "status": "succeeded",
+            "result": result,
+            "message_id": message_id,
+            "error": None,
+            **_finished_fields(now),
+        }}
+    )
+
+
+async def fail_job(job: dict, worker_id: str, error: str, db, retryable: bool = True):
+    now = datetime.utcnow()
+    if retryable and job["attempts"] < job["max_attempts"]:
+        delay = settings.JOB_RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1)
+        update = {
+            "status": "queued",
+            "available_at": now + timedelta(seconds=delay),
+            "lease_expires_at": None,
+            "error": error,
+            "updated_at": now,
+        }
+    else:
+        update = {"status": "failed", "error": error, **_finished_fields(now)}
+
+    await db.jobs.update_one(
+        {"_id": job["_id"], "worker_id": worker_id, "status": "running"},
+        {"$set": update}
+    )
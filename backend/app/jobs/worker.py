@@ -0,0 +1,152 @@
+"""
+Async job workers.
+
+Runs in-process when JOB_WORKERS > 0 (started from app.main), or as a
+separate process that only consumes the queue:
+    python -m app.jobs.worker --concurrency 4
+"""
+import asyncio
+import logging
+import os
+import socket
+from fastapi import HTTPException
+from app.config import get_settings
+from app.jobs.service import lease_job, complete_job, fail_job
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+# -------------------------
+# JOB HANDLERS
+# -------------------------
+async def run_analysis_job(job: dict, db):
+    from app.ai.service import analyze_for_user
+    from app.ai.dedup import analyze_with_reuse
+    from app.messages.service import create_ai_message
+    from app.usage.service import record_analysis
+
+    # Shares the same fair queues (and quota) as interactive calls; overload is retried with backoff
+    text = job["payload"]["text"]
+    ai_result = await analyze_with_reuse(
+        text,
+        job["user_id"],
+        db,
+        lambda: analyze_for_user(job["user_id"], text, db),
+    )
+    await record_analysis(job["user_id"], ai_result, db)
+
+    message_id = None
+    if job.get("project_id"):
+        try:
+            message = await create_ai_message(
+                project_id=job["project_id"],
+                user_id=job["user_id"],
+                ai_result=ai_result,
+                db=db
+            )
+            message_id = message["_id"]
+        except Exception as e:
+            # Same as the synchronous path: the analysis is still returned
+            logger.error(f"Failed to save AI message for job {job['_id']}: {e}")
+
+    return ai_result, message_id
+
+
+JOB_HANDLERS = {
+    "analysis": run_analysis_job,
+}
+
+
+# -------------------------
+# WORKER POOL
+# -------------------------
+class JobWorkerPool:
+    def __init__(self, db, concurrency: int, poll_interval: float):
+        self.db = db
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self._prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    async def start(self):
+        for n in range(self.concurrency):
+            worker_id = f"{self._prefix}:{n}"
+            self._tasks.append(asyncio.create_task(self._run(worker_id), name=f"job-worker-{n}"))
+        logger.info(f"Started {self.concurrency} job workers")
+
+    async def stop(self):
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _run(self, worker_id: str):
+        while not self._stopping.is_set():
+            try:
+                job = await lease_job(worker_id, self.db)
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} failed to lease: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._execute(worker_id, job)
+
+    async def _execute(self, worker_id: str, job: dict):
+        handler = JOB_HANDLERS.get(job["type"])
+        if handler is None:
+            await fail_job(job, worker_id, f"Unknown job type: {job['type']}", self.db, retryable=False)
+            return
+
+        if job["attempts"] > job["max_attempts"]:
+            # Lease expired on the final attempt (worker crashed or hung)
+            await fail_job(job, worker_id, "Job lease expired too many times", self.db, retryable=False)
+            return
+
+        try:
+            result, message_id = await handler(job, self.db)
+        except asyncio.CancelledError:
+            # Shutting down: leave the lease to expire so another worker retries it
+            raise
+        except HTTPException as e:
+            await fail_job(job, worker_id, str(e.detail), self.db, retryable=False)
+        except Exception as e:
+            logger.warning(f"Job {job['_id']} attempt {job['attempts']} failed: {e}")
+            await fail_job(job, worker_id, str(e), self.db)
+        else:
+            await complete_job(job, worker_id, result, self.db, message_id=message_id)
+
+
+async def _main():
+    import argparse
+    from app.db import db
+    from app.utils.logging import setup_logging
+
+    parser = argparse.ArgumentParser(description="Run TrustAI job workers")
+    parser.add_argument("--concurrency", type=int, default=max(settings.JOB_WORKERS, 1))
+    args = parser.parse_args()
+
+    setup_logging()
+    await db.connect()
+    pool = JobWorkerPool(db.get_db(), args.concurrency, settings.JOB_POLL_INTERVAL_SECONDS)
+    await pool.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+        await db.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
@@ -8,6 +8,7 @@ from slowapi.errors import RateLimitExceeded
 from app.config import get_settings
 from app.db import db
 from app.utils.rate_limit import limiter
+from app.utils.compression import CompressionMiddleware
 
 # 🔹 Global logging & exception handling
 from app.utils.logging import setup_logging
@@ -23,6 +24,19 @@ from app.messages import routes as messages_routes
 from app.files import routes as files_routes
 from app.ai import routes as ai_routes
 from app.analyses import routes as analyses_routes
+from app.metrics import routes as metrics_routes
+from app.jobs import routes as jobs_routes
+from app.search import routes as search_routes
+from app.trends import routes as trends_routes
+from app.export import routes as export_routes
+from app.imports import routes as imports_routes
+from app.realtime import routes as realtime_routes
+from app.usage import routes as usage_routes
+from app.realtime.hub import hub
+from app.auth.google import google_keys
+from app.files.gc import UploadSweeper
+from app.jobs.worker import JobWorkerPool
+from app.usage.service import warn_if_not_backfilled
 
 
 settings = get_settings()
@@ -61,6 +75,17 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
 app.add_middleware(SecurityHeadersMiddleware)
 
 
+# 🔹 Response compression (negotiated gzip / brotli / zstd, streaming-aware)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+    )
+
+
 # 🔹 CORS (dynamic from environment)
 # In production, set CORS_ORIGINS="https://yourdomain.com,https://api.yourdomain.com"
 origins = [origin.strip() for origin in settings.CORS_ORIGINS.split(",")]
@@ -78,8 +103,36 @@ app.add_middleware(
 async def startup_db_client():
     await db.connect()
 
+    # Live project events (change-stream fan-out when REALTIME_BACKEND=mongo)
+    await hub.start(db.get_db())
+
+    # Usage counters need a one-off backfill on deployments that predate them
+    await warn_if_not_backfilled(db.get_db())
+
+    # Keep Google's signing keys cached so sign-ins never wait on a fetch
+    if settings.GOOGLE_CLIENT_ID:
+        await google_keys.start()
+
+    # Periodic reconciliation of uploads/ with the files collection
+    if settings.UPLOAD_GC_INTERVAL_MINUTES > 0:
+        app.state.upload_sweeper = UploadSweeper(db.get_db(), settings.UPLOAD_GC_INTERVAL_MINUTES)
+        await app.state.upload_sweeper.start()
+
+    # In-process job workers (set JOB_WORKERS=0 when running app.jobs.worker separately)
+    if settings.JOB_WORKERS > 0:
+        app.state.job_workers = JobWorkerPool(
+            db.get_db(), settings.JOB_WORKERS, settings.JOB_POLL_INTERVAL_SECONDS
+        )
+        await app.state.job_workers.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if getattr(app.state, "job_workers", None):
+        await app.state.job_workers.stop()
+    await hub.stop()
+    await google_keys.stop()
+    if getattr(app.state, "upload_sweeper", None):
+        await app.state.upload_sweeper.stop()
     await db.close()
 
 
@@ -90,6 +143,14 @@ app.include_router(messages_routes.router)
 app.include_router(files_routes.router)
 app.include_router(ai_routes.router)
 app.include_router(analyses_routes.router)
+app.include_router(metrics_routes.router)
+app.include_router(jobs_routes.router)
+app.include_router(search_routes.router)
+app.include_router(trends_routes.router)
+app.include_router(export_routes.router)
+app.include_router(imports_routes.router)
+app.include_router(realtime_routes.router)
+app.include_router(usage_routes.router)
 
 # 🔹 Health check
 @app.get("/")
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List
 from app.messages.schemas import MessageCreate, MessageResponse
 from app.messages.service import create_message, get_messages
 from app.auth.service import get_current_user
 from app.db import get_database
+from app.projects.service import get_project_revision
+from app.utils.etag import make_etag, etag_matches, set_etag, not_modified
 
 router = APIRouter(
     prefix="/projects/{project_id}/messages",
@@ -42,10 +44,20 @@ async def create_new_message(
 )
 async def read_messages(
     project_id: str,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     db = Depends(get_database)
 ):
     try:
+        # Any new message bumps the project revision, so it versions the whole list
+        revision = await get_project_revision(project_id, current_user["id"], db)
+        if revision is not None:
+            etag = make_etag("messages", project_id, revision)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            set_etag(response, etag)
+
         return await get_messages(
             project_id=project_id,
             user_id=current_user["id"],
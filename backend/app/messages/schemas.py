@@ -28,7 +28,10 @@ class MessageResponse(BaseModel):
     content: str
     analysis_markdown: Optional[str] = None
     score: Optional[float] = None
+    verdict: Optional[str] = None
     citations: List[str] = Field(default_factory=list)
+    model: Optional[str] = None
+    usage: Optional[dict] = None  # token counts and latency of the LLM call
     created_at: datetime
 
     class Config:
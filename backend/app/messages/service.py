@@ -2,29 +2,38 @@ from datetime import datetime
 from bson import ObjectId
 from fastapi import HTTPException, status
 from app.messages.schemas import MessageCreate
+from app.indexes import declare_index, declare_query
+from app.projects.service import verify_project_owner
+from app.realtime.hub import hub
+from app.trends.service import record_score
+
+# History reads: equality on project_id, sorted by created_at (either direction)
+declare_index("messages", [("project_id", 1), ("created_at", -1)])
+declare_query(
+    "messages.project_history",
+    "messages",
+    {"project_id": ObjectId()},
+    sort=[("created_at", 1)],
+)
+
+# Trust score recalculation only touches project_id + score, so this index covers it
+declare_index("messages", [("project_id", 1), ("score", 1)])
+declare_query(
+    "messages.project_score_average",
+    "messages",
+    pipeline=[
+        {"$match": {"project_id": ObjectId(), "score": {"$ne": None}}},
+        {"$group": {"_id": None, "avg_score": {"$avg": "$score"}}},
+    ],
+)
 
 
 # -------------------------
 # CREATE MESSAGE
 # -------------------------
 async def create_message(project_id: str, user_id: str, message: MessageCreate, db):
-    if not ObjectId.is_valid(project_id):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-
     # Verify project ownership
-    project = await db.projects.find_one({
-        "_id": ObjectId(project_id),
-        "user_id": user_id
-    })
-
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this project"
-        )
+    await verify_project_owner(project_id, user_id, db)
 
     message_doc = {
         "project_id": ObjectId(project_id),
@@ -35,9 +44,17 @@ async def create_message(project_id: str, user_id: str, message: MessageCreate,
     }
 
     result = await db.messages.insert_one(message_doc)
+
+    await db.projects.update_one(
+        {"_id": ObjectId(project_id)},
+        {"$set": {"lastUpdated": datetime.utcnow()}, "$inc": {"revision": 1}}
+    )
+
     message_doc["_id"] = str(result.inserted_id)
     message_doc["project_id"] = project_id
 
+    await hub.publish(project_id, "message.created", message_doc, db)
+
     return message_doc
 
 
@@ -45,23 +62,8 @@ async def create_message(project_id: str, user_id: str, message: MessageCreate,
 # GET MESSAGES
 # -------------------------
 async def get_messages(project_id: str, user_id: str, db):
-    if not ObjectId.is_valid(project_id):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-
     # Verify project ownership
-    project = await db.projects.find_one({
-        "_id": ObjectId(project_id),
-        "user_id": user_id
-    })
-
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this project"
-        )
+    await verify_project_owner(project_id, user_id, db)
 
     messages = []
 
@@ -84,50 +86,71 @@ async def create_ai_message(
     ai_result: dict,
     db
 ):
+    await verify_project_owner(project_id, user_id, db)
+
     message_doc = {
         "project_id": ObjectId(project_id),
         "user_id": user_id,
         "role": "ai",
         "content": ai_result["analysis_markdown"],
         "score": ai_result["score"],
+        "verdict": ai_result.get("verdict"),
         "citations": ai_result.get("citations", []),
+        "model": ai_result.get("model"),
+        "usage": ai_result.get("usage"),
         "created_at": datetime.utcnow()
     }
 
     result = await db.messages.insert_one(message_doc)
 
-    # --- RECALCULATE PROJECT TRUST SCORE ---
-    # Fetch all scored messages for this project
+    # Daily trend rollups (per project and per user)
+    await record_score(
+        user_id, project_id, message_doc["score"], message_doc["verdict"], message_doc["created_at"], db
+    )
+
+    message_doc["_id"] = str(result.inserted_id)
+    message_doc["project_id"] = project_id
+
+    await hub.publish(project_id, "message.created", message_doc, db)
+
+    await refresh_project_trust(project_id, db)
+
+    return message_doc
+
+
+# -------------------------
+# PROJECT TRUST SCORE
+# -------------------------
+async def refresh_project_trust(project_id: str, db):
+    """Recalculate a project's trust score and status from its scored messages"""
     pipeline = [
         {"$match": {"project_id": ObjectId(project_id), "score": {"$ne": None}}},
         {"$group": {"_id": None, "avg_score": {"$avg": "$score"}}}
     ]
-    
+
     agg_result = await db.messages.aggregate(pipeline).to_list(length=1)
-    
+
+    project_update = {"lastUpdated": datetime.utcnow()}
     if agg_result:
         avg_score = round(agg_result[0]["avg_score"], 1)
-        
+
         # Determine Status
         status_val = "Neutral"
         if avg_score >= 80:
             status_val = "Trustworthy"
         elif avg_score < 50:
             status_val = "Risky"
-            
-        # Update Project
-        await db.projects.update_one(
-            {"_id": ObjectId(project_id)},
-            {
-                "$set": {
-                    "trust_score": avg_score,
-                    "status": status_val,
-                    "lastUpdated": datetime.utcnow()
-                }
-            }
-        )
 
-    message_doc["_id"] = str(result.inserted_id)
-    message_doc["project_id"] = project_id
+        project_update["trust_score"] = avg_score
+        project_update["status"] = status_val
 
-    return message_doc
+    await db.projects.update_one(
+        {"_id": ObjectId(project_id)},
+        {"$set": project_update, "$inc": {"revision": 1}}
+    )
+
+    if "trust_score" in project_update:
+        await hub.publish(project_id, "project.trust", {
+            "trust_score": project_update["trust_score"],
+            "status": project_update["status"],
+        }, db)
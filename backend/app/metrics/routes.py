@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.auth.service import get_current_user
+from app.utils.metrics import collect_metrics
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"]
+)
+
+@router.get("/")
+async def read_metrics(current_user: dict = Depends(get_current_user)):
+    """Per-process cache, scheduler and provider metrics (admin only)"""
+    if current_user.get("role") != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return collect_metrics()
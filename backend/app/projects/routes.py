@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List
 from app.projects.schemas import ProjectCreate, ProjectResponse
 from app.projects.service import (
@@ -6,9 +6,12 @@ from app.projects.service import (
     get_projects,
     get_project,
     delete_project,
+    get_project_revision,
+    get_projects_version,
 )
 from app.auth.service import get_current_user
 from app.db import get_database
+from app.utils.etag import make_etag, etag_matches, set_etag, not_modified
 
 router = APIRouter(
     prefix="/projects",
@@ -38,10 +41,16 @@ async def create_new_project(
     response_model=List[ProjectResponse]
 )
 async def read_projects(
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     db = Depends(get_database),
 ):
     try:
+        etag = make_etag("projects", await get_projects_version(current_user["id"], db))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
         return await get_projects(current_user["id"], db)
     except Exception:
         raise HTTPException(
@@ -55,9 +64,18 @@ async def read_projects(
 )
 async def read_project(
     project_id: str,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     db = Depends(get_database),
 ):
+    revision = await get_project_revision(project_id, current_user["id"], db)
+    if revision is not None:
+        etag = make_etag("project", project_id, revision)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+
     project = await get_project(project_id, current_user["id"], db)
     if not project:
         raise HTTPException(
@@ -1,7 +1,25 @@
 from datetime import datetime
+from hashlib import sha1
 from bson import ObjectId
 from fastapi import HTTPException, status
 from app.projects.schemas import ProjectCreate
+from app.indexes import declare_index, declare_query
+from app.config import get_settings
+from app.utils.cache import TTLCache
+from app.utils.metrics import register_metrics
+from app.realtime.hub import hub
+
+settings = get_settings()
+
+# Owners never change, so a cached owner stays valid until the project is deleted.
+# Deletes are broadcast through the realtime hub so every worker drops its entry;
+# the TTL bounds staleness when events are not shared between workers.
+ownership_cache = TTLCache(
+    ttl_seconds=settings.PROJECT_OWNER_CACHE_TTL_SECONDS,
+    max_entries=settings.PROJECT_OWNER_CACHE_MAX_ENTRIES,
+)
+register_metrics("project_ownership_cache", ownership_cache.stats)
+hub.on("project.deleted", lambda project_id, data: ownership_cache.invalidate(project_id))
 
 # -------------------------
 # CREATE PROJECT
@@ -24,6 +42,8 @@ async def create_project(project: ProjectCreate, user_id: str, db):
         "notes": [],
         "activityLog": [],
         "tags": [],
+        # Bumped on every write that changes what project/message/analysis reads return
+        "revision": 0,
     }
 
     result = await db.projects.insert_one(project_doc)
@@ -32,9 +52,48 @@ async def create_project(project: ProjectCreate, user_id: str, db):
     return project_doc
 
 
+# -------------------------
+# VERIFY PROJECT OWNERSHIP
+# -------------------------
+async def verify_project_owner(
+    project_id: str,
+    user_id: str,
+    db,
+    detail: str = "Not authorized to access this project",
+):
+    """
+    Ensure `user_id` owns `project_id`, answering from the ownership cache when possible.
+    Raises 404 for malformed ids and 403 when the project is missing or owned by someone else.
+    """
+    if not ObjectId.is_valid(project_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    owner = ownership_cache.get(project_id)
+    if owner is None:
+        project = await db.projects.find_one(
+            {"_id": ObjectId(project_id)},
+            {"user_id": 1}
+        )
+        if project:
+            owner = project["user_id"]
+            ownership_cache.set(project_id, owner)
+
+    if owner != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=detail
+        )
+
+
 # -------------------------
 # GET ALL PROJECTS
 # -------------------------
+declare_index("projects", [("user_id", 1), ("created", -1)])
+declare_query("projects.list_for_user", "projects", {"user_id": "user"}, sort=[("created", -1)])
+
 async def get_projects(user_id: str, db):
     projects = []
 
@@ -51,6 +110,32 @@ async def get_projects(user_id: str, db):
     return projects
 
 
+# -------------------------
+# VERSION LOOKUPS (ETags)
+# -------------------------
+async def get_project_revision(project_id: str, user_id: str, db):
+    """Current revision of a project the user owns, or None if it doesn't exist / isn't theirs"""
+    if not ObjectId.is_valid(project_id):
+        return None
+
+    project = await db.projects.find_one(
+        {"_id": ObjectId(project_id), "user_id": user_id},
+        {"revision": 1}
+    )
+    if not project:
+        return None
+    return project.get("revision", 0)
+
+
+async def get_projects_version(user_id: str, db) -> str:
+    """Digest of (id, revision) for all of a user's projects; changes on any write, create or delete"""
+    digest = sha1()
+    cursor = db.projects.find({"user_id": user_id}, {"revision": 1})
+    async for project in cursor:
+        digest.update(f"{project['_id']}:{project.get('revision', 0)};".encode())
+    return digest.hexdigest()[:16]
+
+
 # -------------------------
 # GET SINGLE PROJECT
 # -------------------------
@@ -97,6 +182,13 @@ async def delete_project(project_id: str, user_id: str, db):
             detail="Project not found",
         )
 
+    ownership_cache.invalidate(project_id)
+    await hub.publish(project_id, "project.deleted", {"id": project_id}, db)
+
+    # Files go with the project, so their bytes stop counting against the quota
+    from app.files.service import delete_project_files
+    await delete_project_files(project_id, db)
+
     return True
 
 
@@ -123,7 +215,7 @@ async def add_note(project_id: str, user_id: str, content: str, db):
 
     result = await db.projects.update_one(
         {"_id": ObjectId(project_id), "user_id": user_id},
-        {"$push": {"notes": note}}
+        {"$push": {"notes": note}, "$inc": {"revision": 1}}
     )
 
     if result.matched_count == 0:
@@ -132,6 +224,8 @@ async def add_note(project_id: str, user_id: str, content: str, db):
             detail="Project not found or access denied",
         )
 
+    await hub.publish(project_id, "note.created", note, db)
+
     return note
 
 
@@ -147,7 +241,7 @@ async def delete_note(project_id: str, user_id: str, note_id: str, db):
 
     result = await db.projects.update_one(
         {"_id": ObjectId(project_id), "user_id": user_id},
-        {"$pull": {"notes": {"id": note_id}}}
+        {"$pull": {"notes": {"id": note_id}}, "$inc": {"revision": 1}}
     )
 
     if result.matched_count == 0:
@@ -159,5 +253,7 @@ async def delete_note(project_id: str, user_id: str, note_id: str, db):
     if result.modified_count == 0:
         # Note not found in the array
         pass 
+    else:
+        await hub.publish(project_id, "note.deleted", {"id": note_id}, db)
 
     return True
@@ -0,0 +1,169 @@
+"""
+Per-project live updates.
+
+Write paths call `hub.publish(project_id, event, data, db)` right after a
+write, and only once the caller's ownership of the project is verified
+(subscribers trust event payloads as the owner's data); every WebSocket/SSE subscriber of that project then receives
+    {"event": "message.created", "project_id": "...", "data": {...}, "at": "..."}
+
+Backends (REALTIME_BACKEND):
+- local: in-process fan-out; enough when a single worker serves the API
+- mongo: events are inserted into `project_events` and every process tails
+  that collection with a change stream, so subscribers connected to any
+  worker see writes made on any other. Change streams need a replica set;
+  while the stream is not open, events are delivered locally instead.
+
+`hub.on(event, callback)` runs a callback in every process that receives an
+event, e.g. to drop per-process caches when a project is deleted.
+
+A subscriber that falls REALTIME_QUEUE_SIZE events behind has its backlog
+dropped and gets a single `resync` event, telling the client to refetch.
+"""
+import asyncio
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from app.config import get_settings
+from app.indexes import declare_index
+from app.utils.metrics import register_metrics
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+declare_index("project_events", "expires_at", expireAfterSeconds=0)
+
+WATCH_RETRY_SECONDS = 5.0
+
+
+class ProjectHub:
+    def __init__(self, backend: str = "local", queue_size: int = 100):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._listeners: dict[str, list] = {}
+        self._watch_task: asyncio.Task | None = None
+        self._watching = False
+        self.published = 0
+        self.delivered = 0
+        self.resyncs = 0
+
+    # -------------------------
+    # SUBSCRIBE
+    # -------------------------
+    @contextmanager
+    def subscribe(self, project_id: str):
+        """Register a subscriber queue for the duration of the `with` block"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(project_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(project_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[project_id]
+
+    def on(self, event: str, callback):
+        """Call `callback(project_id, data)` whenever `event` is delivered to this process"""
+        self._listeners.setdefault(event, []).append(callback)
+
+    def deliver(self, project_id: str, message: dict):
+        for callback in self._listeners.get(message["event"], ()):
+            try:
+                callback(project_id, message["data"])
+            except Exception as e:
+                logger.warning(f"Realtime listener for {message['event']} failed: {e}")
+        for queue in self._subscribers.get(project_id, ()):
+            try:
+                queue.put_nowait(message)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog, ask the client to refetch
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"event": "resync", "project_id": project_id, "data": None,
+                                  "at": message["at"]})
+                self.resyncs += 1
+
+    # -------------------------
+    # PUBLISH
+    # -------------------------
+    async def publish(self, project_id: str, event: str, data, db=None):
+        """Best effort: a failed publish never fails the write that triggered it"""
+        project_id = str(project_id)
+        message = {
+            "event": event,
+            "project_id": project_id,
+            "data": jsonable_encoder(data, custom_encoder={ObjectId: str}),
+            "at": datetime.utcnow().isoformat(),
+        }
+        self.published += 1
+        if self._watching and db is not None:
+            try:
+                await db.project_events.insert_one({
+                    **message,
+                    "expires_at": datetime.utcnow() + timedelta(minutes=settings.REALTIME_EVENT_RETENTION_MINUTES),
+                })
+                return
+            except Exception as e:
+                logger.warning(f"Failed to publish {event} for project {project_id}: {e}")
+        self.deliver(project_id, message)
+
+    # -------------------------
+    # CHANGE STREAM FAN-OUT
+    # -------------------------
+    async def start(self, db):
+        if self.backend == "mongo" and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch(db), name="realtime-watch")
+
+    async def stop(self):
+        if self._watch_task:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+        self._watching = False
+
+    async def _watch(self, db):
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        while True:
+            try:
+                async with db.project_events.watch(pipeline) as stream:
+                    self._watching = True
+                    logger.info("Realtime events: following project_events change stream")
+                    async for change in stream:
+                        doc = change["fullDocument"]
+                        self.deliver(doc["project_id"], {
+                            "event": doc["event"],
+                            "project_id": doc["project_id"],
+                            "data": doc.get("data"),
+                            "at": doc["at"],
+                        })
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Realtime change stream unavailable, delivering locally: {e}")
+            self._watching = False
+            await asyncio.sleep(WATCH_RETRY_SECONDS)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "watching": self._watching,
+            "projects": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "resyncs": self.resyncs,
+        }
+
+
+hub = ProjectHub(settings.REALTIME_BACKEND, settings.REALTIME_QUEUE_SIZE)
+register_metrics("realtime", hub.stats)
@@ -0,0 +1,90 @@
+import asyncio
+import json
+from contextlib import suppress
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket
+from fastapi.responses import StreamingResponse
+from app.auth.service import get_current_user, get_user_from_token
+from app.config import get_settings
+from app.db import get_database
+from app.projects.service import verify_project_owner
+from app.realtime.hub import hub
+
+settings = get_settings()
+
+router = APIRouter(
+    prefix="/projects/{project_id}",
+    tags=["Realtime"]
+)
+
+# Policy violation: sent when the token or project check fails
+WS_POLICY_VIOLATION = 1008
+
+
+@router.websocket("/ws")
+async def project_socket(
+    websocket: WebSocket,
+    project_id: str,
+    token: str | None = None,
+    db = Depends(get_database)
+):
+    """
+    Live project events as JSON messages. Browsers cannot set headers on a
+    WebSocket, so the access token may be passed as `?token=`.
+    """
+    auth = websocket.headers.get("authorization", "")
+    token = token or (auth[7:] if auth.lower().startswith("bearer ") else None)
+    try:
+        if not token:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        user = await get_user_from_token(token, db)
+        await verify_project_owner(project_id, user["id"], db)
+    except HTTPException:
+        await websocket.close(code=WS_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    with hub.subscribe(project_id) as queue:
+        async def forward():
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), settings.REALTIME_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    message = {"event": "ping", "project_id": project_id, "data": None}
+                await websocket.send_json(message)
+
+        sender = asyncio.create_task(forward())
+        try:
+            # Client messages are ignored; this only waits for the disconnect
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        finally:
+            sender.cancel()
+            with suppress(asyncio.CancelledError, Exception):
+                await sender
+
+
+@router.get("/events")
+async def project_events(
+    project_id: str,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """Server-sent events twin of the WebSocket, for clients that only need to listen"""
+    await verify_project_owner(project_id, current_user["id"], db)
+
+    async def event_stream():
+        with hub.subscribe(project_id) as queue:
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), settings.REALTIME_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"  # keeps proxies from closing an idle stream
+                    continue
+                yield f"event: {message['event']}\ndata: {json.dumps(message)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List, Literal, Optional
+from app.auth.service import get_current_user
+from app.db import get_database
+from app.search.schemas import SearchResponse
+from app.search.service import search
+
+router = APIRouter(
+    prefix="/search",
+    tags=["Search"]
+)
+
+@router.get("/", response_model=SearchResponse)
+async def search_history(
+    q: str = Query(..., min_length=1, max_length=200),
+    project_id: Optional[str] = None,
+    types: List[Literal["message", "analysis"]] = Query(default=["message", "analysis"]),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=50),
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """
+    Ranked search over your messages and analyses (content, input text,
+    analysis markdown and citations). Supports "quoted phrases" and -excluded
+    words. Optionally limited to one project.
+    """
+    return await search(
+        current_user["id"], q, db,
+        project_id=project_id, types=set(types), page=page, page_size=page_size
+    )
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class SearchHit(BaseModel):
+    type: str  # message or analysis
+    id: str
+    project_id: str
+    score: float  # text relevance
+    snippet: str
+    role: Optional[str] = None  # messages only
+    verdict: Optional[str] = None  # analyses only
+    trust_score: Optional[float] = None
+    created_at: datetime
+
+
+class SearchResponse(BaseModel):
+    query: str
+    page: int
+    page_size: int
+    has_more: bool
+    hits: List[SearchHit]
@@ -0,0 +1,125 @@
+"""
+Full-text search over a user's messages and analyses.
+
+Both collections have a compound text index prefixed by user_id, so a
+search only walks the index entries of one user's documents. Each
+collection returns its best `page * page_size` hits sorted by text score;
+the two lists are merged by score and the requested page is sliced out.
+Deep pages are capped by MAX_RESULTS.
+"""
+import re
+from bson import ObjectId
+from fastapi import HTTPException, status
+from app.indexes import declare_index, declare_query
+
+MAX_RESULTS = 200
+SNIPPET_CHARS = 160
+
+declare_index(
+    "messages",
+    [("user_id", 1), ("content", "text"), ("citations", "text")],
+    weights={"content": 3, "citations": 1},
+    default_language="english",
+)
+declare_index(
+    "analyses",
+    [("user_id", 1), ("input_text", "text"), ("analysis_markdown", "text"), ("citations", "text")],
+    weights={"input_text": 3, "analysis_markdown": 2, "citations": 1},
+    default_language="english",
+)
+declare_query("messages.search", "messages", {"user_id": "user", "$text": {"$search": "vaccine study"}})
+declare_query("analyses.search", "analyses", {"user_id": "user", "$text": {"$search": "vaccine study"}})
+
+TERM_RE = re.compile(r'"([^"]+)"|(\S+)')
+MARKDOWN_RE = re.compile(r"[#*_`>\[\]]+")
+
+
+def _terms(query: str) -> list[str]:
+    terms = []
+    for phrase, word in TERM_RE.findall(query):
+        term = phrase or word
+        if not term.startswith("-"):  # negated terms never appear in a hit
+            terms.append(term.lower())
+    return terms
+
+
+def make_snippet(text: str, terms: list[str]) -> str:
+    """About SNIPPET_CHARS of plain text around the first matching term"""
+    text = " ".join(MARKDOWN_RE.sub(" ", text or "").split())
+    lowered = text.lower()
+    positions = [p for p in (lowered.find(t) for t in terms) if p >= 0]
+    start = max(0, min(positions) - SNIPPET_CHARS // 4) if positions else 0
+    snippet = text[start:start + SNIPPET_CHARS]
+    return ("…" if start else "") + snippet + ("…" if start + SNIPPET_CHARS < len(text) else "")
+
+
+async def search(user_id: str, query: str, db, project_id: str | None = None,
+                 types: set[str] | None = None, page: int = 1, page_size: int = 20) -> dict:
+    query = query.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Search query is required")
+    if page * page_size > MAX_RESULTS:
+        raise HTTPException(status_code=400, detail=f"Only the first {MAX_RESULTS} results can be paged through")
+    if project_id is not None and not ObjectId.is_valid(project_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+    types = types or {"message", "analysis"}
+    # One extra hit tells whether another page exists
+    limit = page * page_size + 1
+    # Messages already have a "score" field (the trust score)
+    relevance = {"relevance": {"$meta": "textScore"}}
+    terms = _terms(query)
+    hits = []
+
+    if "message" in types:
+        match = {"user_id": user_id, "$text": {"$search": query}}
+        if project_id:
+            match["project_id"] = ObjectId(project_id)
+        cursor = db.messages.find(
+            match, {"project_id": 1, "role": 1, "content": 1, "score": 1, "created_at": 1, **relevance}
+        ).sort([("relevance", {"$meta": "textScore"})]).limit(limit)
+        async for doc in cursor:
+            hits.append({
+                "type": "message",
+                "id": str(doc["_id"]),
+                "project_id": str(doc["project_id"]),
+                "score": doc["relevance"],
+                "snippet": make_snippet(doc["content"], terms),
+                "role": doc.get("role"),
+                "trust_score": doc.get("score"),
+                "created_at": doc["created_at"],
+            })
+
+    if "analysis" in types:
+        match = {"user_id": user_id, "$text": {"$search": query}}
+        if project_id:
+            match["project_id"] = project_id
+        cursor = db.analyses.find(
+            match,
+            {"project_id": 1, "input_text": 1, "analysis_markdown": 1, "verdict": 1,
+             "trust_score": 1, "created_at": 1, **relevance},
+        ).sort([("relevance", {"$meta": "textScore"})]).limit(limit)
+        async for doc in cursor:
+            text = doc.get("input_text") or ""
+            if not any(t in text.lower() for t in terms):
+                text = doc.get("analysis_markdown") or text
+            hits.append({
+                "type": "analysis",
+                "id": str(doc["_id"]),
+                "project_id": str(doc["project_id"]),
+                "score": doc["relevance"],
+                "snippet": make_snippet(text, terms),
+                "verdict": doc.get("verdict"),
+                "trust_score": doc.get("trust_score"),
+                "created_at": doc["created_at"],
+            })
+
+    hits.sort(key=lambda h: (h["score"], h["created_at"]), reverse=True)
+    start = (page - 1) * page_size
+    return {
+        "query": query,
+        "page": page,
+        "page_size": page_size,
+        "has_more": len(hits) > start + page_size,
+        "hits": hits[start:start + page_size],
+    }
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, Query
+from app.auth.service import get_current_user
+from app.db import get_database
+from app.projects.service import verify_project_owner
+from app.trends.schemas import TrendResponse
+from app.trends.service import get_series
+
+router = APIRouter(
+    prefix="/trends",
+    tags=["Trends"]
+)
+
+@router.get("/me", response_model=TrendResponse)
+async def read_user_trend(
+    days: int = Query(30, ge=1, le=366),
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """Daily trust-score series across all of your analyses"""
+    points = await get_series("user", current_user["id"], db, days=days)
+    return {"scope": "user", "id": current_user["id"], "days": days, "points": points}
+
+@router.get("/projects/{project_id}", response_model=TrendResponse)
+async def read_project_trend(
+    project_id: str,
+    days: int = Query(30, ge=1, le=366),
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """Daily trust-score series for one project"""
+    await verify_project_owner(project_id, current_user["id"], db)
+    points = await get_series("project", project_id, db, days=days)
+    return {"scope": "project", "id": project_id, "days": days, "points": points}
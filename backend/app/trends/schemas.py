@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+
+class TrendPoint(BaseModel):
+    day: str  # YYYY-MM-DD (UTC)
+    count: int
+    avg: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    verdicts: Dict[str, int]
+
+
+class TrendResponse(BaseModel):
+    scope: str  # project or user
+    id: str
+    days: int
+    points: List[TrendPoint]
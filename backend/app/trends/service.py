@@ -0,0 +1,215 @@
+"""
+Daily trust-score rollups.
+
+Every scored analysis increments two rollup documents, one for its project
+and one for its user, keyed by day:
+    _id: "<scope>:<key>:<YYYY-MM-DD>"   e.g. "project:65f...:2024-05-01"
+    count, sum, min, max, verdicts.<verdict>
+
+Updates are single upserts using $inc/$min/$max, sent together in one
+unordered bulk write. Because the day is the last part of the _id, a date
+range of one series is an _id range scan, so charts read at most one
+document per day and never touch message history.
+
+Rebuild the rollups from stored messages and analyses with:
+    python -m app.trends.service --rebuild
+"""
+from datetime import date, datetime, timedelta
+from pymongo import UpdateOne
+
+VERDICTS = ("trustworthy", "neutral", "risky")
+UNSCORED_VERDICTS = [None, "", "error"]  # skipped by record_score and the rebuild alike
+
+
+def verdict_for(score: float) -> str:
+    if score >= 80:
+        return "trustworthy"
+    if score < 50:
+        return "risky"
+    return "neutral"
+
+
+def _verdict_expr(score_field: str, verdict_field: str) -> dict:
+    """Aggregation twin of record_score's verdict handling"""
+    verdict = {"$toLower": {"$ifNull": [verdict_field, ""]}}
+    return {"$cond": [
+        {"$in": [verdict, list(VERDICTS)]},
+        verdict,
+        {"$switch": {
+            "branches": [
+                {"case": {"$gte": [score_field, 80]}, "then": "trustworthy"},
+                {"case": {"$lt": [score_field, 50]}, "then": "risky"},
+            ],
+            "default": "neutral",
+        }},
+    ]}
+
+
+def _rollup_id(scope: str, key: str, day: str) -> str:
+    return f"{scope}:{key}:{day}"
+
+
+def _rollup_update(scope: str, key: str, user_id: str, day: str, count: int, total: float,
+                   low: float, high: float, verdicts: dict) -> UpdateOne:
+    inc = {"count": count, "sum": total}
+    inc.update({f"verdicts.{v}": n for v, n in verdicts.items()})
+    return UpdateOne(
+        {"_id": _rollup_id(scope, key, day)},
+        {
+            "$inc": inc,
+            "$min": {"min": low},
+            "$max": {"max": high},
+            "$setOnInsert": {"scope": scope, "key": key, "user_id": user_id, "day": day},
+        },
+        upsert=True,
+    )
+
+
+# -------------------------
+# RECORD
+# -------------------------
+async def record_score(user_id: str, project_id: str | None, score: float, verdict: str | None,
+                       created_at: datetime, db):
+    """Add one scored analysis to its project's and user's daily rollups"""
+    batch = RollupBatch()
+    batch.add(user_id, project_id, score, verdict, created_at)
+    ops = batch.operations()
+    if ops:
+        await db.trust_rollups.bulk_write(ops, ordered=False)
+
+
+class RollupBatch:
+    """Accumulates many scores in memory and writes one upsert per rollup document"""
+
+    def __init__(self):
+        self.buckets: dict[tuple, dict] = {}
+
+    def add(self, user_id: str, project_id: str | None, score: float, verdict: str | None, created_at: datetime):
+        verdict = (verdict or "").lower()
+        # Error replies, and legacy placeholder replies stored without a verdict, are not scores
+        if verdict in ("", "error"):
+            return
+        if verdict not in VERDICTS:
+            verdict = verdict_for(score)
+        self.merge(user_id, project_id, created_at.date().isoformat(), verdict, 1, score, score, score)
+
+    def merge(self, user_id: str, project_id: str | None, day: str, verdict: str,
+              count: int, total: float, low: float, high: float):
+        targets = [("user", user_id)] + ([("project", str(project_id))] if project_id else [])
+        for scope, key in targets:
+            bucket = self.buckets.setdefault((scope, key, user_id, day), {
+                "count": 0, "sum": 0.0, "min": low, "max": high, "verdicts": {},
+            })
+            bucket["count"] += count
+            bucket["sum"] += total
+            bucket["min"] = min(bucket["min"], low)
+            bucket["max"] = max(bucket["max"], high)
+            bucket["verdicts"][verdict] = bucket["verdicts"].get(verdict, 0) + count
+
+    def operations(self) -> list[UpdateOne]:
+        return [
+            _rollup_update(scope, key, user_id, day, b["count"], b["sum"], b["min"], b["max"], b["verdicts"])
+            for (scope, key, user_id, day), b in self.buckets.items()
+        ]
+
+    async def flush(self, db) -> int:
+        ops = self.operations()
+        for i in range(0, len(ops), 1000):
+            await db.trust_rollups.bulk_write(ops[i:i + 1000], ordered=False)
+        self.buckets.clear()
+        return len(ops)
+
+
+# -------------------------
+# READ
+# -------------------------
+async def get_series(scope: str, key: str, db, days: int = 30, end: date | None = None) -> list[dict]:
+    """One point per day (oldest first); days without analyses have count 0"""
+    end = end or datetime.utcnow().date()
+    start = end - timedelta(days=days - 1)
+
+    cursor = db.trust_rollups.find({
+        "_id": {
+            "$gte": _rollup_id(scope, key, start.isoformat()),
+            "$lte": _rollup_id(scope, key, end.isoformat()),
+        }
+    })
+    rollups = {doc["day"]: doc async for doc in cursor}
+
+    series = []
+    for offset in range(days):
+        day = (start + timedelta(days=offset)).isoformat()
+        doc = rollups.get(day)
+        if doc is None:
+            series.append({"day": day, "count": 0, "avg": None, "min": None, "max": None,
+                           "verdicts": dict.fromkeys(VERDICTS, 0)})
+            continue
+        series.append({
+            "day": day,
+            "count": doc["count"],
+            "avg": round(doc["sum"] / doc["count"], 1),
+            "min": doc["min"],
+            "max": doc["max"],
+            "verdicts": {v: doc.get("verdicts", {}).get(v, 0) for v in VERDICTS},
+        })
+    return series
+
+
+# -------------------------
+# REBUILD
+# -------------------------
+async def rebuild_rollups(db) -> int:
+    """Recompute every rollup from messages and analyses; returns the number of rollup documents"""
+    day = {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}
+    sources = [
+        (db.messages, {"role": "ai", "score": {"$ne": None}, "verdict": {"$nin": UNSCORED_VERDICTS}},
+         "$score", "$verdict"),
+        (db.analyses, {"trust_score": {"$ne": None}, "verdict": {"$nin": UNSCORED_VERDICTS}},
+         "$trust_score", "$verdict"),
+    ]
+
+    batch = RollupBatch()
+    for collection, match, score_field, verdict_field in sources:
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "user_id": "$user_id",
+                    "project_id": {"$toString": "$project_id"},
+                    "day": day,
+                    "verdict": _verdict_expr(score_field, verdict_field),
+                },
+                "count": {"$sum": 1},
+                "sum": {"$sum": score_field},
+                "min": {"$min": score_field},
+                "max": {"$max": score_field},
+            }},
+        ]
+        async for group in collection.aggregate(pipeline, allowDiskUse=True):
+            g = group["_id"]
+            batch.merge(g["user_id"], g["project_id"], g["day"], g["verdict"],
+                        group["count"], group["sum"], group["min"], group["max"])
+
+    await db.trust_rollups.delete_many({})
+    return await batch.flush(db)
+
+
+async def _main():
+    import argparse
+    from app.db import db
+
+    parser = argparse.ArgumentParser(description="Daily trust-score rollups")
+    parser.add_argument("--rebuild", action="store_true", help="recompute all rollups from stored analyses")
+    args = parser.parse_args()
+
+    await db.connect()
+    try:
+        if args.rebuild:
+            print(f"Wrote {await rebuild_rollups(db.get_db())} rollup documents")
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(_main())
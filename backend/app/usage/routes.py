@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+from app.auth.service import get_current_user
+from app.db import get_database
+from app.usage.schemas import UsageResponse
+from app.usage.service import get_usage
+
+router = APIRouter(
+    prefix="/usage",
+    tags=["Usage"]
+)
+
+@router.get("/me", response_model=UsageResponse)
+async def read_my_usage(
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """Your storage and analysis usage with the configured quotas (reads one counter document)"""
+    return await get_usage(current_user["id"], db)
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class UsageLimits(BaseModel):
+    bytes_stored: Optional[int] = None  # None = unlimited
+    period_analyses: Optional[int] = None
+    period_tokens: Optional[int] = None
+
+
+class UsageResponse(BaseModel):
+    bytes_stored: int
+    files: int
+    analyses: int
+    tokens: int
+    period: str  # YYYY-MM (UTC)
+    period_analyses: int
+    period_tokens: int
+    limits: UsageLimits
+    remaining: UsageLimits
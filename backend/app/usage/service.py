@@ -0,0 +1,251 @@
+"""
+Per-user usage counters and quotas.
+
+One document per user in `user_usage`, keyed by user id:
+    bytes_stored, files            current storage (upload +, delete -)
+    analyses, tokens               lifetime LLM usage (billable analyses)
+    period, period_analyses, period_tokens
+                                   the current calendar month (UTC)
+
+A billable analysis is one that called the LLM (`billable_tokens`): heuristic
+answers and near-duplicate reuses are neither counted nor blocked by quotas.
+The live counters, the quota check and the rebuild all use that definition.
+
+Every update is a single atomic upsert, so concurrent requests and workers
+never lose counts; LLM updates use an aggregation-pipeline update that
+restarts the month counters when the period changes. Quotas are checked
+against these counters before the expensive work starts, and GET /usage/me
+is one _id lookup.
+
+Rebuild the storage and lifetime counters from stored data with:
+    python -m app.usage.service --rebuild
+Deployments that had files or analyses before usage tracking existed must
+run this once; until then every counter starts at 0 (a warning is logged at
+startup while `user_usage` is empty).
+"""
+import logging
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from pymongo import UpdateOne
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def current_period(now: datetime | None = None) -> str:
+    return (now or datetime.utcnow()).strftime("%Y-%m")
+
+
+def _limits() -> dict:
+    return {
+        "bytes_stored": settings.UPLOAD_USER_QUOTA_MB * MB or None,
+        "period_analyses": settings.USAGE_MONTHLY_ANALYSES or None,
+        "period_tokens": settings.USAGE_MONTHLY_TOKENS or None,
+    }
+
+
+def billable_tokens(result: dict) -> int | None:
+    """
+    Tokens of an analysis that called the LLM, or None when it did not (heuristic
+    answers carry no usage, reuses carry `reused_similarity`). Works on analysis
+    results and on the AI messages saved from them.
+    """
+    if result.get("reused_similarity") is not None:
+        return None
+    tokens = (result.get("usage") or {}).get("total_tokens")
+    return int(tokens) if tokens else None
+
+
+# -------------------------
+# RECORD
+# -------------------------
+async def record_storage(user_id: str, bytes_delta: int, files_delta: int, db):
+    await db.user_usage.update_one(
+        {"_id": user_id},
+        {
+            "$inc": {"bytes_stored": bytes_delta, "files": files_delta},
+            "$set": {"updated_at": datetime.utcnow()},
+        },
+        upsert=True,
+    )
+
+
+async def record_analysis(user_id: str, ai_result: dict, db):
+    """Count one billable analysis and its tokens; anything else is free"""
+    tokens = billable_tokens(ai_result)
+    if tokens is None:
+        return
+    period = current_period()
+    same_period = {"$eq": ["$period", period]}
+    await db.user_usage.update_one(
+        {"_id": user_id},
+        [{"$set": {
+            "analyses": {"$add": [{"$ifNull": ["$analyses", 0]}, 1]},
+            "tokens": {"$add": [{"$ifNull": ["$tokens", 0]}, tokens]},
+            "period_analyses": {"$cond": [same_period, {"$add": ["$period_analyses", 1]}, 1]},
+            "period_tokens": {"$cond": [same_period, {"$add": ["$period_tokens", tokens]}, tokens]},
+            "period": period,
+            "updated_at": datetime.utcnow(),
+        }}],
+        upsert=True,
+    )
+
+
+# -------------------------
+# QUOTAS
+# -------------------------
+async def check_storage_quota(user_id: str, incoming: int, db):
+    """Stored bytes (counter) plus bytes reserved by in-progress resumable uploads"""
+    limit = _limits()["bytes_stored"]
+    if not limit:
+        return
+    doc = await db.user_usage.find_one({"_id": user_id}, {"bytes_stored": 1})
+    used = doc.get("bytes_stored", 0) if doc else 0
+    reserved = await db.upload_sessions.aggregate([
+        {"$match": {"user_id": user_id}},
+        {"$group": {"_id": None, "bytes": {"$sum": "$size"}}},
+    ]).to_list(length=1)
+    if reserved:
+        used += reserved[0]["bytes"]
+    if used + incoming > limit:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Storage quota exceeded"
+        )
+
+
+async def check_analysis_quota(user_id: str, db):
+    """Call right before the LLM is (or would be queued to be) called"""
+    limits = _limits()
+    if not limits["period_analyses"] and not limits["period_tokens"]:
+        return
+    doc = await db.user_usage.find_one({"_id": user_id, "period": current_period()},
+                                       {"period_analyses": 1, "period_tokens": 1})
+    if not doc:
+        return
+    for field in ("period_analyses", "period_tokens"):
+        if limits[field] and doc.get(field, 0) >= limits[field]:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail={
+                    "message": "Monthly analysis quota reached",
+                    "quota": field.replace("period_", ""),
+                    "limit": limits[field],
+                    "period": current_period(),
+                }
+            )
+
+
+# -------------------------
+# READ
+# -------------------------
+async def get_usage(user_id: str, db) -> dict:
+    doc = await db.user_usage.find_one({"_id": user_id}) or {}
+    period = current_period()
+    in_period = doc.get("period") == period
+    usage = {
+        "bytes_stored": doc.get("bytes_stored", 0),
+        "files": doc.get("files", 0),
+        "analyses": doc.get("analyses", 0),
+        "tokens": doc.get("tokens", 0),
+        "period": period,
+        "period_analyses": doc.get("period_analyses", 0) if in_period else 0,
+        "period_tokens": doc.get("period_tokens", 0) if in_period else 0,
+    }
+    limits = _limits()
+    usage["limits"] = limits
+    usage["remaining"] = {
+        field: max(0, limit - usage[field]) if limit else None for field, limit in limits.items()
+    }
+    return usage
+
+
+# -------------------------
+# REBUILD
+# -------------------------
+async def count_usage(db) -> dict[str, dict]:
+    """Storage from `files` and billable analyses from saved AI messages, per user"""
+    totals: dict[str, dict] = {}
+    async for row in db.files.aggregate([
+        {"$group": {"_id": "$user_id", "bytes_stored": {"$sum": "$size"}, "files": {"$sum": 1}}},
+    ]):
+        totals.setdefault(row["_id"], {}).update(bytes_stored=row["bytes_stored"], files=row["files"])
+
+    cursor = db.messages.find(
+        {"role": "ai", "usage.total_tokens": {"$gt": 0}}, {"user_id": 1, "usage.total_tokens": 1}
+    ).batch_size(1000)
+    async for message in cursor:
+        tokens = billable_tokens(message)
+        if tokens is None:
+            continue
+        counts = totals.setdefault(message.get("user_id"), {})
+        counts["analyses"] = counts.get("analyses", 0) + 1
+        counts["tokens"] = counts.get("tokens", 0) + tokens
+    totals.pop(None, None)
+    return totals
+
+
+async def rebuild_usage(db) -> int:
+    """
+    Recompute storage counters and backfill lifetime LLM counters; month counters are kept.
+    Analyses without a project leave no message, so LLM counters are only ever raised.
+    """
+    totals = await count_usage(db)
+
+    storage = {"bytes_stored": 0, "files": 0}
+    await db.user_usage.update_many({}, {"$set": storage})
+    ops = [
+        UpdateOne(
+            {"_id": user_id},
+            {
+                "$set": {**storage, **{k: counts[k] for k in storage if k in counts},
+                         "updated_at": datetime.utcnow()},
+                "$max": {k: counts.get(k, 0) for k in ("analyses", "tokens")},
+            },
+            upsert=True,
+        )
+        for user_id, counts in totals.items()
+    ]
+    for i in range(0, len(ops), 1000):
+        await db.user_usage.bulk_write(ops[i:i + 1000], ordered=False)
+    return len(ops)
+
+
+async def warn_if_not_backfilled(db):
+    """Log the backfill step when there is data but no usage counters yet"""
+    try:
+        if await db.user_usage.estimated_document_count():
+            return
+        if await db.files.estimated_document_count() or await db.messages.find_one({"role": "ai"}, {"_id": 1}):
+            logger.warning(
+                "user_usage is empty but files/analyses exist: quotas start at 0 until "
+                "`python -m app.usage.service --rebuild` is run"
+            )
+    except Exception as e:
+        logger.warning(f"Could not check usage counters: {e}")
+
+
+async def _main():
+    import argparse
+    from app.db import db
+
+    parser = argparse.ArgumentParser(description="Per-user usage counters")
+    parser.add_argument("--rebuild", action="store_true", help="recompute counters from files and messages")
+    args = parser.parse_args()
+
+    await db.connect()
+    try:
+        if args.rebuild:
+            print(f"Rebuilt usage for {await rebuild_usage(db.get_db())} users")
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(_main())
@@ -0,0 +1,215 @@
+"""
+Negotiated response compression (zstd, brotli, gzip).
+
+A pure ASGI middleware so streaming responses are compressed chunk by chunk
+instead of being buffered:
+- Single-body responses below `minimum_size` are sent as-is.
+- Server-sent events are flushed after every chunk so events are not held back.
+- Other streams (e.g. file downloads) are compressed incrementally and only
+  finished at the end of the body.
+- Responses that are already encoded, partial (206), or of an already
+  compressed media type (images, archives, PDFs...) pass through untouched.
+
+brotli and zstd are used only when the `brotli` / `zstandard` packages are installed.
+"""
+import importlib.util
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+# Media types that are already compressed or gain nothing from it
+EXCLUDED_MEDIA_PREFIXES = (
+    "image/",
+    "video/",
+    "audio/",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/pdf",
+    "application/octet-stream",
+    "application/vnd.openxmlformats-officedocument",
+)
+
+# Server preference when the client accepts several encodings with equal q-values
+ENCODING_PREFERENCE = ("zstd", "br", "gzip")
+
+
+def available_encodings() -> set[str]:
+    encodings = {"gzip"}
+    if importlib.util.find_spec("brotli") is not None:
+        encodings.add("br")
+    if importlib.util.find_spec("zstandard") is not None:
+        encodings.add("zstd")
+    return encodings
+
+
+def select_encoding(accept_encoding: str, available: set[str]) -> str | None:
+    """Pick the best encoding from an Accept-Encoding header, honouring q-values"""
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        token, _, params = item.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best, best_q = None, 0.0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in available:
+            continue
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Compressor:
+    """Uniform compress/flush/finish interface over gzip, brotli and zstd"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int, zstd_level: int):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+        elif encoding == "br":
+            import brotli
+            self._obj = brotli.Compressor(quality=brotli_quality)
+        else:
+            import zstandard
+            self._zstd = zstandard
+            self._obj = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data)
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "gzip":
+            return self._obj.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            return self._obj.flush()
+        return self._obj.flush(self._zstd.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = dict(gzip_level=gzip_level, brotli_quality=brotli_quality, zstd_level=zstd_level)
+        self.available = available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = select_encoding(headers.get("accept-encoding", ""), self.available)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message = None
+        self.compressor: _Compressor | None = None
+        self.passthrough = False
+        self.flush_each_chunk = False
+
+    async def send(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Hold the headers until the first body chunk tells us how to encode
+            self.start_message = {**message, "headers": list(message.get("headers", []))}
+            return
+
+        if message_type != "http.response.body":
+            # e.g. http.response.pathsend / zerocopysend: not something we can rewrite
+            await self._send_start()
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None and self._should_skip(body, more_body):
+            self.passthrough = True
+            await self._send_start()
+
+        if self.passthrough:
+            await self.downstream(message)
+            return
+
+        if self.compressor is None:
+            self._start_compression()
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        elif self.flush_each_chunk:
+            chunk += self.compressor.flush()
+
+        if self.start_message is not None:
+            if not more_body:
+                # Whole body in one message: we know the final length
+                MutableHeaders(raw=self.start_message["headers"])["Content-Length"] = str(len(chunk))
+            await self._send_start()
+
+        await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _should_skip(self, body: bytes, more_body: bool) -> bool:
+        headers = Headers(raw=self.start_message["headers"])
+        if self.start_message["status"] in (204, 206, 304) or "content-encoding" in headers:
+            return True
+        content_type = headers.get("content-type", "").lower()
+        if content_type.startswith(EXCLUDED_MEDIA_PREFIXES):
+            return True
+        if not more_body and len(body) < self.middleware.minimum_size:
+            return True
+        return False
+
+    def _start_compression(self):
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        self.compressor = _Compressor(self.encoding, **self.middleware.levels)
+        self.flush_each_chunk = headers.get("content-type", "").startswith("text/event-stream")
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if "content-length" in headers:
+            del headers["content-length"]
+        # Strong validators describe the identity bytes, so weaken them
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    async def _send_start(self):
+        if self.start_message is not None:
+            await self.downstream(self.start_message)
+            self.start_message = None
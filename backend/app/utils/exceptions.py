@@ -10,7 +10,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     )
     return JSONResponse(
         status_code=exc.status_code,
-        content={"success": False, "error": exc.detail}
+        content={"success": False, "error": exc.detail},
+        headers=getattr(exc, "headers", None)
     )
 
 async def unhandled_exception_handler(request: Request, exc: Exception):
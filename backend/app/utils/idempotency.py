@@ -0,0 +1,135 @@
+"""
+Idempotency-Key support for non-idempotent POSTs.
+
+The first request with a given key claims it by inserting an `in_progress`
+record and runs; its response (status + JSON body) is then stored on that
+record. A retry with the same key costs one `_id` lookup and:
+- replays the stored response when the first request completed
+- waits (up to IDEMPOTENCY_WAIT_SECONDS) while it is still running, then
+  replays it, or answers 409 with Retry-After
+- is rejected with 422 if the request body differs from the first one
+
+A request that fails with an exception releases its key so it can be retried.
+A claim whose process died is taken over once its lease expires. Records
+expire through a TTL index.
+"""
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pymongo.errors import DuplicateKeyError
+
+from app.config import get_settings
+from app.indexes import declare_index
+
+settings = get_settings()
+
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL_SECONDS = 0.25
+
+declare_index("idempotency_keys", "expires_at", expireAfterSeconds=0)
+
+
+def request_fingerprint(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+async def _claim(db, record_id: str, fingerprint: str) -> dict | None:
+    """Claim the key (returns None) or return the existing record"""
+    while True:
+        now = datetime.utcnow()
+        record = await db.idempotency_keys.find_one({"_id": record_id})
+        if record is not None:
+            # The original request's process died: take the key over, but only for the
+            # same request; a different body gets the record back and is rejected (422)
+            if (record["status"] == "in_progress" and record["lease_expires_at"] <= now
+                    and record["fingerprint"] == fingerprint):
+                taken = await db.idempotency_keys.update_one(
+                    {"_id": record_id, "status": "in_progress", "lease_expires_at": record["lease_expires_at"],
+                     "fingerprint": fingerprint},
+                    {"$set": {"lease_expires_at": now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)}},
+                )
+                if taken.modified_count:
+                    return None
+                continue
+            return record
+
+        try:
+            await db.idempotency_keys.insert_one({
+                "_id": record_id,
+                "status": "in_progress",
+                "fingerprint": fingerprint,
+                "lease_expires_at": now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+                "created_at": now,
+                "expires_at": now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+            })
+            return None
+        except DuplicateKeyError:
+            continue  # lost the race; read the winner's record
+
+
+def _replay(record: dict) -> Response:
+    return JSONResponse(
+        status_code=record["status_code"],
+        content=record["body"],
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+async def run_idempotent(key: str | None, scope: str, user_id: str, fingerprint: str, db, handler, status_code: int = 200):
+    """
+    Run `handler()` at most once per (user, scope, key). Without a key this
+    just awaits the handler. The handler's result is either a Response with
+    a JSON body or data that is stored with `status_code`.
+    """
+    if key is None:
+        return await handler()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+    record_id = f"{user_id}:{scope}:{key}"
+    deadline = asyncio.get_running_loop().time() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        record = await _claim(db, record_id, fingerprint)
+        if record is None:
+            break
+        if record["fingerprint"] != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request",
+            )
+        if record["status"] == "completed":
+            return _replay(record)
+        if asyncio.get_running_loop().time() >= deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"},
+            )
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+    try:
+        result = await handler()
+    except BaseException:
+        await db.idempotency_keys.delete_one({"_id": record_id, "status": "in_progress"})
+        raise
+
+    if isinstance(result, Response):
+        stored_status, body = result.status_code, json.loads(result.body)
+    else:
+        stored_status, body = status_code, jsonable_encoder(result)
+
+    await db.idempotency_keys.update_one(
+        {"_id": record_id},
+        {"$set": {
+            "status": "completed",
+            "status_code": stored_status,
+            "body": body,
+            "completed_at": datetime.utcnow(),
+        }},
+    )
+    return result
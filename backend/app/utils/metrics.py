@@ -0,0 +1,15 @@
+"""
+Process-local metrics registry.
+Components register a callable returning a dict snapshot; `/metrics` serves them all.
+"""
+from typing import Callable, Dict
+
+_providers: Dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics(name: str, provider: Callable[[], dict]):
+    _providers[name] = provider
+
+
+def collect_metrics() -> dict:
+    return {name: provider() for name, provider in _providers.items()}
@@ -1,9 +1,47 @@
 """
 Rate limiting utility using slowapi.
 Prevents brute-force attacks on authentication endpoints.
+
+Counters live in memory by default. With SHARED_STATE_BACKEND=mongo they are
+kept in MongoDB (the `limits` library's storage, database RATE_LIMIT_DB_NAME)
+so every worker enforces the same limits; RATE_LIMIT_STORAGE_URI overrides
+the storage explicitly (any `limits` storage URI).
+
+slowapi only drives the synchronous `limits` storages, so with a shared
+storage every rate-limited request makes one blocking round trip on the event
+loop. That is acceptable for the few auth endpoints limited here; keep the
+storage close to the API (or use a redis:// URI, which answers in well under
+a millisecond) and don't put limits on hot endpoints.
 """
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-# Create limiter instance using IP address as key
-limiter = Limiter(key_func=get_remote_address)
+from app.config import get_settings
+
+settings = get_settings()
+
+
+def storage_uri() -> str:
+    if settings.RATE_LIMIT_STORAGE_URI:
+        return settings.RATE_LIMIT_STORAGE_URI
+    if settings.SHARED_STATE_BACKEND == "mongo":
+        return settings.MONGODB_URL
+    return "memory://"
+
+
+def storage_options(uri: str) -> dict:
+    if uri.startswith(("mongodb://", "mongodb+srv://")):
+        return {"database_name": settings.RATE_LIMIT_DB_NAME}
+    return {}
+
+
+_uri = storage_uri()
+
+# Create limiter instance using IP address as key; if the shared storage is
+# unreachable, limits fall back to per-process memory instead of failing requests
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=_uri,
+    storage_options=storage_options(_uri),
+    in_memory_fallback_enabled=_uri != "memory://",
+)
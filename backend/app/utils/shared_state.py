@@ -0,0 +1,131 @@
+"""
+State that must agree across worker processes (quotas, counters, small caches).
+
+Two backends, picked by SHARED_STATE_BACKEND:
+- memory: a dict in this process; right for a single uvicorn worker
+- mongo: one document per key in `shared_state`
+      {_id: key, value, expires_at}
+  Counters are updated with a single atomic update (an aggregation pipeline
+  that restarts the window when the stored one has expired), so concurrent
+  workers never lose increments. A TTL index removes expired keys.
+
+Counters are fixed windows: the first increment sets `expires_at` and later
+increments keep it. Give back with `decr`, which only touches a live window:
+an `incr(key, ttl, -1)` after the window expired would open a new one at -1.
+"""
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple
+
+from pymongo import ReturnDocument
+
+from app.config import get_settings
+from app.db import db
+from app.indexes import declare_index
+
+settings = get_settings()
+
+declare_index("shared_state", "expires_at", expireAfterSeconds=0)
+
+
+class Counter(NamedTuple):
+    value: int
+    expires_at: datetime | None
+
+
+class MemoryState:
+    def __init__(self):
+        self._entries: dict[str, tuple[Any, datetime]] = {}
+
+    def _live(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] <= datetime.utcnow():
+            del self._entries[key]
+            return None
+        return entry
+
+    async def incr(self, key: str, ttl_seconds: float, amount: int = 1) -> Counter:
+        entry = self._live(key)
+        if entry is None:
+            entry = (0, datetime.utcnow() + timedelta(seconds=ttl_seconds))
+        value, expires_at = entry[0] + amount, entry[1]
+        self._entries[key] = (value, expires_at)
+        return Counter(value, expires_at)
+
+    async def decr(self, key: str, amount: int = 1):
+        entry = self._live(key)
+        if entry is not None and entry[0] >= amount:
+            self._entries[key] = (entry[0] - amount, entry[1])
+
+    async def counter(self, key: str) -> Counter:
+        entry = self._live(key)
+        return Counter(entry[0], entry[1]) if entry else Counter(0, None)
+
+    async def get(self, key: str, default=None):
+        entry = self._live(key)
+        return entry[0] if entry else default
+
+    async def set(self, key: str, value: Any, ttl_seconds: float):
+        self._entries[key] = (value, datetime.utcnow() + timedelta(seconds=ttl_seconds))
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+
+class MongoState:
+    def __init__(self, get_db):
+        # Resolved per call so the backend can be created before the DB connects
+        self._get_db = get_db
+
+    @property
+    def _collection(self):
+        return self._get_db().shared_state
+
+    async def incr(self, key: str, ttl_seconds: float, amount: int = 1) -> Counter:
+        now = datetime.utcnow()
+        live = {"$gt": ["$expires_at", now]}
+        doc = await self._collection.find_one_and_update(
+            {"_id": key},
+            [{"$set": {
+                "value": {"$cond": [live, {"$add": ["$value", amount]}, amount]},
+                "expires_at": {"$cond": [live, "$expires_at", now + timedelta(seconds=ttl_seconds)]},
+            }}],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return Counter(doc["value"], doc["expires_at"])
+
+    async def decr(self, key: str, amount: int = 1):
+        """No upsert: an expired (or missing) window is left alone"""
+        await self._collection.update_one(
+            {"_id": key, "expires_at": {"$gt": datetime.utcnow()}, "value": {"$gte": amount}},
+            {"$inc": {"value": -amount}},
+        )
+
+    async def counter(self, key: str) -> Counter:
+        doc = await self._collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+        return Counter(doc["value"], doc["expires_at"]) if doc else Counter(0, None)
+
+    async def get(self, key: str, default=None):
+        doc = await self._collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+        return doc["value"] if doc else default
+
+    async def set(self, key: str, value: Any, ttl_seconds: float):
+        await self._collection.update_one(
+            {"_id": key},
+            {"$set": {"value": value, "expires_at": datetime.utcnow() + timedelta(seconds=ttl_seconds)}},
+            upsert=True,
+        )
+
+    async def delete(self, key: str):
+        await self._collection.delete_one({"_id": key})
+
+
+def create_shared_state(backend: str):
+    if backend == "mongo":
+        return MongoState(db.get_db)
+    if backend != "memory":
+        raise ValueError(f"Unknown SHARED_STATE_BACKEND: {backend}")
+    return MemoryState()
+
+
+shared_state = create_shared_state(settings.SHARED_STATE_BACKEND)
@@ -0,0 +1,127 @@
+"""
+Throughput of the NDJSON bulk importer versus one request per record.
+
+Generates an archive of analyses and AI messages spread over a few projects
+in a throwaway database, then imports it:
+- per-record: `create_analysis` / `create_ai_message`-style writes, one record
+  at a time (insert, read-back, project update)
+- bulk: `app.imports.service.import_ndjson` with the given batch size
+
+and reports records per second for each.
+
+Usage (from backend/):
+    python -m benchmarks.bulk_import --records 20000 --projects 10 --batch-size 1000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import get_settings
+from app.db import client_options
+from app.imports.service import import_ndjson
+
+settings = get_settings()
+
+USER_ID = "bench-user"
+VERDICTS = ["Trustworthy", "Neutral", "Risky"]
+
+
+def archive(records: int, project_ids: list[str]) -> list[bytes]:
+    start = datetime(2023, 1, 1)
+    lines = []
+    for i in range(records):
+        score = round(random.uniform(0, 100), 1)
+        created_at = (start + timedelta(minutes=17 * i)).isoformat()
+        project_id = random.choice(project_ids)
+        if i % 2:
+            record = {
+                "type": "analysis", "project_id": project_id, "input_text": "Claim text " * 30,
+                "trust_score": score, "verdict": random.choice(VERDICTS),
+                "analysis_markdown": "### Analysis\n" + "Finding. " * 80,
+                "citations": ["https://example.com/a"], "created_at": created_at,
+            }
+        else:
+            record = {
+                "type": "message", "project_id": project_id, "role": "ai",
+                "content": "### Analysis\n" + "Finding. " * 80, "score": score,
+                "citations": ["https://example.com/a"], "created_at": created_at,
+            }
+        lines.append(json.dumps(record).encode())
+    return lines
+
+
+async def seed_projects(db, count: int) -> list[str]:
+    await db.projects.delete_many({})
+    result = await db.projects.insert_many([
+        {"user_id": USER_ID, "name": f"Bench {i}", "revision": 0, "files": 0} for i in range(count)
+    ])
+    return [str(pid) for pid in result.inserted_ids]
+
+
+async def per_record(db, lines: list[bytes]) -> float:
+    started = time.perf_counter()
+    for line in lines:
+        record = json.loads(line)
+        record.pop("type")
+        record["user_id"] = USER_ID
+        record["created_at"] = datetime.fromisoformat(record["created_at"])
+        collection = db.analyses if "trust_score" in record else db.messages
+        if collection is db.messages:
+            record["project_id"] = ObjectId(record["project_id"])
+        result = await collection.insert_one(record)
+        await collection.find_one({"_id": result.inserted_id})
+        await db.projects.update_one({"_id": ObjectId(str(record["project_id"]))}, {"$inc": {"revision": 1}})
+    return len(lines) / (time.perf_counter() - started)
+
+
+async def bulk(db, lines: list[bytes], batch_size: int) -> float:
+    async def stream():
+        for line in lines:
+            yield line
+
+    started = time.perf_counter()
+    result = await import_ndjson(stream(), USER_ID, db, batch_size)
+    elapsed = time.perf_counter() - started
+    assert result["failed"] == 0, result["errors"][:3]
+    return len(lines) / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=f"{settings.DB_NAME}_bench")
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--per-record-sample", type=int, default=2000,
+                        help="records imported one at a time for the baseline")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL, **client_options())
+    db = client[args.db]
+    await client.drop_database(args.db)
+
+    project_ids = await seed_projects(db, args.projects)
+    lines = archive(args.records, project_ids)
+
+    baseline = await per_record(db, lines[:args.per_record_sample])
+    await db.analyses.delete_many({})
+    await db.messages.delete_many({})
+
+    bulk_rate = await bulk(db, lines, args.batch_size)
+
+    print(f"{'mode':<24} {'records/s':>10}")
+    print(f"{'per-record':<24} {baseline:>10.0f}")
+    print(f"{f'bulk (batch {args.batch_size})':<24} {bulk_rate:>10.0f}   {bulk_rate / baseline:.1f}x")
+
+    await client.drop_database(args.db)
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
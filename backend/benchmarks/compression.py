@@ -0,0 +1,94 @@
+"""
+CPU cost versus bytes saved for response compression on a typical project history.
+
+Builds a `/projects/{id}/messages/`-shaped JSON payload (alternating user
+prompts and markdown AI analyses) and compresses it with every available
+encoding and a range of levels, using the same compressor wrapper as
+CompressionMiddleware.
+
+Usage (from backend/):
+    python -m benchmarks.compression --messages 200 --repeat 20
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.utils.compression import _Compressor, available_encodings
+
+LEVELS = {
+    "gzip": [1, 6, 9],
+    "br": [1, 4, 6, 11],
+    "zstd": [1, 3, 9, 19],
+}
+
+SECTIONS = ["Summary", "Claims Checked", "Source Quality", "Red Flags", "Verdict"]
+PHRASES = [
+    "The article cites a peer-reviewed study but misstates its sample size.",
+    "No primary sources are linked for the central statistical claim.",
+    "The author has a documented history of accurate reporting on this topic.",
+    "Several quotes could not be traced to the people they are attributed to.",
+    "Independent outlets corroborate the timeline of events described.",
+    "The headline overstates the certainty expressed in the body text.",
+]
+
+
+def fake_history(count: int) -> bytes:
+    start = datetime(2024, 1, 1)
+    messages = []
+    for i in range(count):
+        created = (start + timedelta(minutes=i)).isoformat()
+        if i % 2 == 0:
+            content = " ".join(random.choices(PHRASES, k=random.randint(3, 12)))
+            messages.append({"_id": f"{i:024x}", "project_id": "p" * 24, "user_id": "u" * 24,
+                             "role": "user", "content": content, "citations": [], "created_at": created})
+        else:
+            body = "\n\n".join(
+                f"### {section}\n" + "\n".join(f"- {p}" for p in random.choices(PHRASES, k=random.randint(3, 8)))
+                for section in SECTIONS
+            )
+            messages.append({"_id": f"{i:024x}", "project_id": "p" * 24, "user_id": "u" * 24,
+                             "role": "ai", "content": body, "score": round(random.uniform(0, 100), 1),
+                             "citations": [f"https://example.com/source/{random.randint(1, 999)}"],
+                             "created_at": created})
+    return json.dumps(messages).encode()
+
+
+def measure(payload: bytes, encoding: str, level: int, repeat: int):
+    kwargs = {"gzip_level": 6, "brotli_quality": 4, "zstd_level": 3}
+    kwargs[{"gzip": "gzip_level", "br": "brotli_quality", "zstd": "zstd_level"}[encoding]] = level
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        compressor = _Compressor(encoding, **kwargs)
+        output = compressor.compress(payload) + compressor.finish()
+    elapsed = (time.perf_counter() - started) / repeat
+    return len(output), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(7)
+    payload = fake_history(args.messages)
+    print(f"payload: {len(payload) / 1024:.1f} KiB, {args.messages} messages\n")
+    print(f"{'encoding':<10} {'level':>5} {'size KiB':>10} {'saved':>7} {'ms/resp':>9} {'MB/s':>8}")
+
+    available = available_encodings()
+    for encoding, levels in LEVELS.items():
+        if encoding not in available:
+            print(f"{encoding:<10} skipped (package not installed)")
+            continue
+        for level in levels:
+            size, seconds = measure(payload, encoding, level, args.repeat)
+            saved = 1 - size / len(payload)
+            throughput = len(payload) / seconds / 1e6
+            print(f"{encoding:<10} {level:>5} {size / 1024:>10.1f} {saved:>6.1%} {seconds * 1000:>9.2f} {throughput:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Throughput and per-call latency of the local heuristic pre-score.
+
+Generates a batch of synthetic articles (mixing neutral prose, clickbait
+phrasing, sourcing cues, shouting and links) and scores every one with
+`app.ai.heuristics.prescore`, reporting texts/s, MB/s and latency percentiles
+per input size.
+
+Usage (from backend/):
+    python -m benchmarks.heuristics --texts 5000 --sizes 500,5000,50000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.ai.heuristics import CLICKBAIT_PHRASES, SOURCE_CUES, prescore
+
+PROSE = [
+    "The city council voted on the new transit budget after a long debate.",
+    "Officials said the changes would take effect early next year.",
+    "Residents raised concerns about noise and traffic near the site.",
+    "The company reported higher revenue but lower margins this quarter.",
+    "Experts cautioned that the early results are not yet conclusive.",
+]
+LINKS = [
+    "https://www.reuters.com/world/article-123",
+    "https://apnews.com/article/abc",
+    "https://www.infowars.com/posts/xyz",
+    "https://blog.example.org/post/42",
+]
+
+
+def synthetic_text(size: int, rng: random.Random) -> str:
+    parts = []
+    length = 0
+    while length < size:
+        roll = rng.random()
+        if roll < 0.08:
+            piece = rng.choice(CLICKBAIT_PHRASES).upper() + "!!!"
+        elif roll < 0.16:
+            piece = f"{rng.choice(SOURCE_CUES).capitalize()} the report, {rng.choice(PROSE).lower()}"
+        elif roll < 0.20:
+            piece = rng.choice(LINKS)
+        else:
+            piece = rng.choice(PROSE)
+        parts.append(piece)
+        length += len(piece) + 1
+    return " ".join(parts)[:size]
+
+
+def bench(texts: list[str]) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for text in texts:
+        t0 = time.perf_counter()
+        prescore(text)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    total_bytes = sum(len(t) for t in texts)
+    return {
+        "texts_per_s": len(texts) / elapsed,
+        "mb_per_s": total_bytes / elapsed / 1e6,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=5000, help="texts per size")
+    parser.add_argument("--sizes", default="500,5000,50000", help="comma-separated text sizes in characters")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'size':>8} {'texts/s':>10} {'MB/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        # Fewer texts for very large inputs keeps the run time bounded
+        count = max(50, min(args.texts, args.texts * 5000 // size))
+        texts = [synthetic_text(size, rng) for _ in range(count)]
+        prescore(texts[0])  # warm-up
+        r = bench(texts)
+        print(
+            f"{size:>8} {r['texts_per_s']:>10.0f} {r['mb_per_s']:>8.1f} "
+            f"{r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['max_ms']:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
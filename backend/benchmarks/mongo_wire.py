@@ -0,0 +1,137 @@
+"""
+Benchmark message-history reads under different MongoDB client configurations.
+
+Seeds a throwaway database with one project's worth of markdown-heavy AI
+messages, then replays `get_messages`-shaped reads with each configuration
+and reports throughput plus bytes sent by the server (logical vs. on the wire).
+
+Usage (from backend/):
+    python -m benchmarks.mongo_wire --messages 300 --reads 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import random
+import string
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import get_settings
+from app.db import available_compressors, client_options
+
+settings = get_settings()
+
+CONFIGURATIONS = {
+    "uncompressed": {"compressors": ""},
+    "zlib": {"compressors": "zlib"},
+    "zstd": {"compressors": "zstd"},
+    "snappy": {"compressors": "snappy"},
+    "zstd-small-pool": {"compressors": "zstd", "maxPoolSize": 5, "minPoolSize": 0},
+}
+
+
+def fake_markdown(size: int) -> str:
+    words = ["".join(random.choices(string.ascii_lowercase, k=random.randint(3, 10))) for _ in range(400)]
+    parts = ["### Trust Analysis\n"]
+    length = 0
+    while length < size:
+        line = f"- **{random.choice(words)}**: " + " ".join(random.choices(words, k=20)) + "\n"
+        parts.append(line)
+        length += len(line)
+    return "".join(parts)
+
+
+async def seed(db, project_id: ObjectId, count: int, size: int):
+    await db.messages.delete_many({})
+    await db.messages.create_index([("project_id", 1), ("created_at", -1)])
+    start = datetime.utcnow() - timedelta(days=1)
+    docs = [
+        {
+            "project_id": project_id,
+            "user_id": "bench-user",
+            "role": "ai",
+            "content": fake_markdown(size),
+            "score": random.uniform(0, 100),
+            "citations": ["https://example.com/source"],
+            "created_at": start + timedelta(seconds=i),
+        }
+        for i in range(count)
+    ]
+    await db.messages.insert_many(docs)
+
+
+async def network_counters(client):
+    status = await client.admin.command("serverStatus")
+    network = status.get("network", {})
+    return network.get("bytesOut", 0), network.get("physicalBytesOut", network.get("bytesOut", 0))
+
+
+async def run_config(name: str, overrides: dict, args, project_id: ObjectId):
+    requested = overrides.get("compressors", "")
+    if requested and not available_compressors(requested):
+        return name, None
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL, **client_options(**overrides))
+    db = client[args.db]
+
+    async def read_history():
+        cursor = db.messages.find({"project_id": project_id}).sort("created_at", 1)
+        return await cursor.to_list(length=None)
+
+    # Warm up the pool and the server cache
+    await read_history()
+
+    logical_before, physical_before = await network_counters(client)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one_read():
+        async with semaphore:
+            await read_history()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_read() for _ in range(args.reads)))
+    elapsed = time.perf_counter() - started
+
+    logical_after, physical_after = await network_counters(client)
+    client.close()
+
+    return name, {
+        "reads_per_sec": args.reads / elapsed,
+        "logical_mb": (logical_after - logical_before) / 1e6,
+        "wire_mb": (physical_after - physical_before) / 1e6,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=f"{settings.DB_NAME}_bench")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--size", type=int, default=6000, help="approximate bytes of markdown per message")
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    project_id = ObjectId()
+    seed_client = AsyncIOMotorClient(settings.MONGODB_URL, **client_options(compressors=""))
+    await seed(seed_client[args.db], project_id, args.messages, args.size)
+
+    print(f"{'configuration':<18} {'reads/s':>10} {'logical MB':>12} {'wire MB':>10} {'ratio':>7}")
+    for name, overrides in CONFIGURATIONS.items():
+        name, result = await run_config(name, overrides, args, project_id)
+        if result is None:
+            print(f"{name:<18} {'skipped (compressor not installed)':>42}")
+            continue
+        ratio = result["logical_mb"] / result["wire_mb"] if result["wire_mb"] else 0
+        print(
+            f"{name:<18} {result['reads_per_sec']:>10.1f} {result['logical_mb']:>12.1f} "
+            f"{result['wire_mb']:>10.1f} {ratio:>6.2f}x"
+        )
+
+    await seed_client.drop_database(args.db)
+    seed_client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
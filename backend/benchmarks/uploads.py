@@ -0,0 +1,79 @@
+"""
+Upload write throughput: previous copy loop versus the streaming pipeline.
+
+Streams a generated file (a PDF header followed by random bytes) through:
+- copy: the previous loop (1 MB aiofiles writes straight to the final path,
+  size check only)
+- pipeline: `app.files.pipeline.UploadWriter` (magic-byte sniff, SHA-256,
+  temp file + atomic rename) at the given chunk sizes
+
+and reports MB/s for each. No database is needed.
+
+Usage (from backend/):
+    python -m benchmarks.uploads --size-mb 512 --chunk-mb 1 8
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import aiofiles
+from starlette.datastructures import UploadFile
+
+from app.files.pipeline import UploadWriter, temp_path_for
+
+MB = 1024 * 1024
+
+
+def make_source(path: str, size_mb: int):
+    block = os.urandom(MB)
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.7\n")
+        for _ in range(size_mb):
+            f.write(block)
+
+
+async def copy_loop(source: str, target_dir: str) -> float:
+    started = time.perf_counter()
+    with open(source, "rb") as raw:
+        upload = UploadFile(raw)
+        size = 0
+        async with aiofiles.open(os.path.join(target_dir, "copy.pdf"), "wb") as out:
+            while chunk := await upload.read(MB):
+                size += len(chunk)
+                await out.write(chunk)
+    return size / MB / (time.perf_counter() - started)
+
+
+async def pipeline(source: str, target_dir: str, chunk_mb: int) -> float:
+    started = time.perf_counter()
+    with open(source, "rb") as raw:
+        upload = UploadFile(raw)
+        writer = UploadWriter(temp_path_for(target_dir), 1 << 40, {"pdf"})
+        while chunk := await upload.read(chunk_mb * MB):
+            await writer.write(chunk)
+        stored = await writer.commit(os.path.join(target_dir, f"pipeline-{chunk_mb}.pdf"))
+    return stored.size / MB / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--chunk-mb", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--dir", default=None, help="where to write (defaults to a temp dir)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as workdir:
+        source = os.path.join(workdir, "source.bin")
+        make_source(source, args.size_mb)
+
+        print(f"{'mode':<22} {'MB/s':>8}")
+        print(f"{'copy (1 MB)':<22} {await copy_loop(source, workdir):>8.0f}")
+        for chunk_mb in args.chunk_mb:
+            rate = await pipeline(source, workdir, chunk_mb)
+            print(f"{f'pipeline ({chunk_mb} MB)':<22} {rate:>8.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""
+Mongo round trips and latency of the create/update write paths.
+
+Runs each write path against a throwaway database twice:
+- before: the previous implementations, which read back the document they
+  had just written (`insert_one` + `find_one`, `update_one` + `find_one`)
+- after: the current service functions, which respond from the inserted
+  document or use `find_one_and_update(..., ReturnDocument.AFTER)`
+
+Round trips are counted with a pymongo command listener, so they are the
+commands actually sent to the server. Signup latency includes password
+hashing in both columns.
+
+Usage (from backend/):
+    python -m benchmarks.write_roundtrips --iterations 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from app.analyses.schemas import AnalysisCreate
+from app.analyses.service import create_analysis
+from app.auth.schemas import UserCreate
+from app.auth.service import create_user, get_password_hash, update_user_profile
+from app.config import get_settings
+from app.db import client_options
+from app.trends.service import record_score
+
+settings = get_settings()
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# -------------------------
+# BEFORE (read-after-write)
+# -------------------------
+async def legacy_create_user(user: UserCreate, db):
+    await db.users.find_one({"email": user.email})
+    user_dict = user.model_dump()
+    user_dict["password"] = get_password_hash(user.password)
+    user_dict["role"] = "user"
+    user_dict["last_login"] = datetime.utcnow()
+    new_user = await db.users.insert_one(user_dict)
+    created = await db.users.find_one({"_id": new_user.inserted_id})
+    return {"id": str(created["_id"]), "email": created["email"]}
+
+
+async def legacy_update_user_profile(user_id: str, update_data: dict, db):
+    await db.users.update_one({"_id": ObjectId(user_id)}, {"$set": update_data})
+    updated = await db.users.find_one({"_id": ObjectId(user_id)})
+    return {"id": str(updated["_id"]), "name": updated.get("name")}
+
+
+async def legacy_create_analysis(analysis: AnalysisCreate, user_id: str, db):
+    analysis_dict = analysis.model_dump()
+    analysis_dict["user_id"] = user_id
+    analysis_dict["created_at"] = datetime.utcnow()
+    new_analysis = await db.analyses.insert_one(analysis_dict)
+    await record_score(user_id, analysis.project_id, analysis.trust_score, analysis.verdict,
+                       analysis_dict["created_at"], db)
+    await db.projects.update_one({"_id": ObjectId(analysis.project_id), "user_id": user_id},
+                                 {"$inc": {"revision": 1}})
+    created = await db.analyses.find_one({"_id": new_analysis.inserted_id})
+    created["id"] = str(created.pop("_id"))
+    return created
+
+
+# -------------------------
+# RUN
+# -------------------------
+async def measure(counter: CommandCounter, iterations: int, op) -> tuple[float, float]:
+    """Returns (round trips per call, median milliseconds per call)"""
+    timings = []
+    counter.count = 0
+    for i in range(iterations):
+        started = time.perf_counter()
+        await op(i)
+        timings.append((time.perf_counter() - started) * 1000)
+    return counter.count / iterations, statistics.median(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=f"{settings.DB_NAME}_bench")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--signups", type=int, default=50, help="signups are bounded by password hashing")
+    args = parser.parse_args()
+
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(settings.MONGODB_URL, event_listeners=[counter], **client_options())
+    db = client[args.db]
+    await client.drop_database(args.db)
+    await db.users.create_index("email", unique=True)
+
+    user_id = str((await db.users.insert_one({"email": "bench@example.com", "name": "Bench"})).inserted_id)
+    project_id = str((await db.projects.insert_one({"user_id": user_id, "name": "Bench", "revision": 0})).inserted_id)
+    analysis = AnalysisCreate(
+        project_id=project_id, input_text="Claim text " * 30, trust_score=72.0,
+        verdict="Neutral", analysis_markdown="### Analysis\n" + "Finding. " * 80,
+    )
+
+    paths = [
+        ("signup", args.signups,
+         lambda i: legacy_create_user(UserCreate(email=f"before{i}@example.com", password="Bench-pass1", name="B"), db),
+         lambda i: create_user(UserCreate(email=f"after{i}@example.com", password="Bench-pass1", name="B"), db)),
+        ("update profile", args.iterations,
+         lambda i: legacy_update_user_profile(user_id, {"name": f"Bench {i}"}, db),
+         lambda i: update_user_profile(user_id, {"name": f"Bench {i}"}, db)),
+        ("create analysis", args.iterations,
+         lambda i: legacy_create_analysis(analysis, user_id, db),
+         lambda i: create_analysis(analysis, user_id, db)),
+    ]
+
+    print(f"{'path':<16} {'trips before':>12} {'trips after':>12} {'ms before':>10} {'ms after':>10}")
+    for name, iterations, before, after in paths:
+        trips_before, ms_before = await measure(counter, iterations, before)
+        trips_after, ms_after = await measure(counter, iterations, after)
+        print(f"{name:<16} {trips_before:>12.1f} {trips_after:>12.1f} {ms_before:>10.2f} {ms_after:>10.2f}")
+
+    await client.drop_database(args.db)
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
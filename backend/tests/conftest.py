@@ -0,0 +1,6 @@
+import os
+
+# Settings are read at import time; tests never talk to these services
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GROQ_API_KEY", "test-key")
@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import pytest
+
+from app.ai import service
+from app.ai.providers import Backend, Completion, LLMProvider, ModelRouter
+from app.ai.resilience import ProviderUnavailable
+
+
+class SlowProvider(LLMProvider):
+    name = "slow"
+
+    def __init__(self, model: str):
+        super().__init__(model)
+        self.calls = 0
+
+    async def complete(self, messages, timeout):
+        self.calls += 1
+        await asyncio.sleep(10)
+
+    def is_retryable(self, exc):
+        return True
+
+
+class RejectingProvider(SlowProvider):
+    name = "rejecting"
+
+    async def complete(self, messages, timeout):
+        self.calls += 1
+        raise ValueError("model does not exist")
+
+    def is_retryable(self, exc):
+        return False
+
+
+class AnsweringProvider(SlowProvider):
+    name = "answering"
+
+    async def complete(self, messages, timeout):
+        self.calls += 1
+        body = {"score": 70, "verdict": "neutral", "citations": [], "analysis_markdown": "ok"}
+        return Completion(content=json.dumps(body), model=self.model)
+
+
+def use_backends(monkeypatch, *providers):
+    backends = [Backend(provider, "any") for provider in providers]
+    monkeypatch.setattr(service, "router", ModelRouter(backends, small_input_max=4000))
+
+
+def test_expired_deadline_with_fallback_pending_raises_provider_unavailable(monkeypatch):
+    slow, fallback = SlowProvider("a"), AnsweringProvider("b")
+    use_backends(monkeypatch, slow, fallback)
+    monkeypatch.setattr(service.settings, "LLM_TOTAL_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(service.settings, "LLM_BACKOFF_BASE_SECONDS", 0.5)
+
+    with pytest.raises(ProviderUnavailable):
+        asyncio.run(service.analyze_text("Is this claim supported by the cited study?"))
+
+    assert slow.calls >= 1
+    assert fallback.calls == 0  # the deadline passed before the fallback's turn
+
+
+def test_non_retryable_error_falls_back_to_next_backend(monkeypatch):
+    rejecting, fallback = RejectingProvider("a"), AnsweringProvider("b")
+    use_backends(monkeypatch, rejecting, fallback)
+
+    result = asyncio.run(service.analyze_text("Is this claim supported by the cited study?"))
+
+    assert result["model"] == "answering/b"
+    assert rejecting.calls == 1
@@ -0,0 +1,136 @@
+import asyncio
+
+from bson import ObjectId
+
+from app.ai.heuristics import heuristic_analysis
+from app.messages.service import create_ai_message
+from app.projects.service import ownership_cache
+from app.usage.service import count_usage, get_usage, record_analysis
+
+
+# Just enough of a Motor collection for the usage and message write paths
+def _get(doc, path):
+    for part in path.split("."):
+        doc = (doc or {}).get(part)
+    return doc
+
+
+def _matches(doc, query):
+    for field, condition in query.items():
+        value = _get(doc, field)
+        if isinstance(condition, dict) and "$gt" in condition:
+            if value is None or not value > condition["$gt"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _evaluate(expr, doc):
+    if isinstance(expr, str) and expr.startswith("$"):
+        return _get(doc, expr[1:])
+    if isinstance(expr, dict) and len(expr) == 1:
+        (op, args), = expr.items()
+        if op == "$add":
+            return sum(_evaluate(a, doc) or 0 for a in args)
+        if op == "$ifNull":
+            value = _evaluate(args[0], doc)
+            return _evaluate(args[1], doc) if value is None else value
+        if op == "$eq":
+            return _evaluate(args[0], doc) == _evaluate(args[1], doc)
+        if op == "$cond":
+            return _evaluate(args[1] if _evaluate(args[0], doc) else args[2], doc)
+    return expr
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def batch_size(self, size):
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self.docs[doc["_id"]] = dict(doc)
+
+        class Result:
+            inserted_id = doc["_id"]
+        return Result()
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(d) for d in self.docs.values() if _matches(d, query)])
+
+    async def find_one(self, query, projection=None):
+        return next((dict(d) for d in self.docs.values() if _matches(d, query)), None)
+
+    async def update_one(self, query, update, upsert=False):
+        doc = next((d for d in self.docs.values() if _matches(d, query)), None)
+        if doc is None:
+            if not upsert:
+                return
+            doc = self.docs.setdefault(query["_id"], {"_id": query["_id"]})
+        if isinstance(update, list):
+            for stage in update:
+                doc.update({k: _evaluate(v, doc) for k, v in stage["$set"].items()})
+        else:
+            doc.update(update.get("$set", {}))
+
+    def aggregate(self, pipeline, **kwargs):
+        return FakeCursor([])
+
+    async def bulk_write(self, ops, ordered=True):
+        pass
+
+
+class FakeDB:
+    def __init__(self):
+        self.collections = {}
+
+    def __getattr__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+def llm_result(total_tokens: int) -> dict:
+    return {"score": 70, "verdict": "neutral", "citations": [], "analysis_markdown": "ok",
+            "model": "groq/test", "usage": {"total_tokens": total_tokens, "truncated": False}}
+
+
+def test_rebuilt_counts_match_live_counts():
+    db = FakeDB()
+    project_id = str(ObjectId())
+    ownership_cache.set(project_id, "u1")
+
+    results = [
+        llm_result(120),
+        llm_result(80),
+        {**heuristic_analysis("ok"), "usage": None},                    # answered locally
+        {**llm_result(0), "usage": None, "reused_similarity": 0.93},   # near-duplicate reuse
+    ]
+
+    async def scenario():
+        for result in results:
+            await record_analysis("u1", result, db)
+            await create_ai_message(project_id, "u1", result, db)
+        return await get_usage("u1", db), (await count_usage(db))["u1"]
+
+    live, rebuilt = asyncio.run(scenario())
+
+    assert (live["analyses"], live["tokens"]) == (2, 200)
+    assert (rebuilt["analyses"], rebuilt["tokens"]) == (live["analyses"], live["tokens"])
+    assert live["period_analyses"] == 2